@@ -0,0 +1,274 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Headless batch generation for the Imagen pipeline.
+
+Reads a JSONL file of records such as
+
+    {"id": "sku-123", "prompt": "a red sneaker on a plinth",
+     "modifiers": {"content_type": "Product Photography", "lighting": "Softbox"},
+     "model": "imagen-4.0-generate-001", "aspect_ratio": "1:1",
+     "number_of_images": 4, "negative_prompt": "", "seed": 0}
+
+composes each prompt exactly as the UI does, generates the images with a
+bounded pool of asyncio workers, and appends one line per record to a JSONL
+manifest. Records already in the manifest with status "ok" are skipped, so an
+interrupted run is resumed by running the same command again.
+
+    python batch.py records.jsonl --manifest manifest.jsonl --workers 8
+"""
+import argparse
+import asyncio
+import datetime
+import hashlib
+import json
+import os
+import time
+from types import SimpleNamespace
+from typing import Optional
+
+import vertexai
+
+from common.modifiers import ModifierRegistry
+from common.result_cache import PromptResultCache
+from config.default import IMAGE_MODIFIER_DEFAULTS, IMAGE_MODIFIER_OPTIONS, Config
+from models.imagen import ImageRequest, backoff_delay, generate_image_uris
+
+cfg = Config()
+modifier_registry = ModifierRegistry(cfg.image_modifiers, IMAGE_MODIFIER_OPTIONS)
+
+
+class RateLimiter:
+    """Async token bucket allowing `per_minute` requests per minute."""
+
+    def __init__(self, per_minute: float):
+        self._rate = per_minute / 60.0
+        self._capacity = max(per_minute / 60.0, 1.0)
+        self._tokens = self._capacity
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self, tokens: float = 1.0):
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(
+                    self._capacity, self._tokens + (now - self._updated) * self._rate
+                )
+                self._updated = now
+                if self._tokens >= min(tokens, self._capacity):
+                    self._tokens -= tokens
+                    return
+                await asyncio.sleep((min(tokens, self._capacity) - self._tokens) / self._rate)
+
+
+def record_id(record: dict) -> str:
+    """The record's own id, or a content hash of the record."""
+    if record.get("id"):
+        return str(record["id"])
+    canonical = json.dumps(record, sort_keys=True)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()[:16]
+
+
+def build_request(record: dict) -> ImageRequest:
+    """Composes a record into an ImageRequest, validating its modifiers."""
+    modifiers = dict(record.get("modifiers", {}))
+    # Modifiers a record leaves out take the UI's starting values
+    values = {
+        f"image_{key}": IMAGE_MODIFIER_DEFAULTS.get(key, "None")
+        for key in modifier_registry.order
+    }
+    for key, value in modifiers.items():
+        spec = modifier_registry.specs.get(key)
+        if spec is None or not spec.is_valid(value):
+            raise ValueError(f"invalid modifier {key}={value!r}")
+        values[f"image_{key}"] = value
+    prompt = modifier_registry.compose_prompt(
+        record["prompt"], SimpleNamespace(**values)
+    )
+    return ImageRequest(
+        prompt=prompt,
+        model_name=record.get("model", cfg.MODEL_IMAGEN3_FAST),
+        aspect_ratio=record.get("aspect_ratio", values["image_aspect_ratio"]),
+        number_of_images=int(record.get("number_of_images", 1)),
+        negative_prompt=record.get("negative_prompt", ""),
+        add_watermark=record.get("add_watermark", True),
+        seed=int(record.get("seed", 0)),
+    )
+
+
+def completed_ids(manifest_path: str) -> set[str]:
+    """Ids of records that already succeeded in a previous run."""
+    done = set()
+    if not os.path.exists(manifest_path):
+        return done
+    with open(manifest_path, "r", encoding="utf-8") as manifest:
+        for line in manifest:
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                continue  # a partially written last line from an interrupted run
+            if entry.get("status") == "ok":
+                done.add(entry["id"])
+    return done
+
+
+class BatchRunner:
+    """Runs records through a bounded pool of workers with per-model rate limits."""
+
+    def __init__(
+        self,
+        manifest_path: str,
+        run_id: str,
+        workers: int,
+        attempts: int,
+        cache: Optional[PromptResultCache] = None,
+    ):
+        if workers < 1:
+            raise ValueError(f"workers must be at least 1, got {workers}")
+        if attempts < 1:
+            raise ValueError(f"attempts must be at least 1, got {attempts}")
+        self._manifest_path = manifest_path
+        self._run_id = run_id
+        self._workers = workers
+        self._attempts = attempts
+        self._cache = cache
+        self._limiters: dict[str, RateLimiter] = {}
+
+    def _limiter(self, model_name: str) -> RateLimiter:
+        if model_name not in self._limiters:
+            self._limiters[model_name] = RateLimiter(
+                cfg.IMAGEN_REQUESTS_PER_MINUTE.get(
+                    model_name, cfg.IMAGEN_DEFAULT_REQUESTS_PER_MINUTE
+                )
+            )
+        return self._limiters[model_name]
+
+    def _generate(self, request: ImageRequest, rid: str) -> list[str]:
+        """Blocking generation for one record, consulting the result cache."""
+        cache_key = None
+        if self._cache is not None and request.deterministic:
+            cache_key = PromptResultCache.key(request.model_name, request.generation_params())
+            cached_uris = self._cache.get(cache_key)
+            if cached_uris:
+                return cached_uris
+        folder_name = f"batch/{self._run_id}/{rid}"
+        uris = list(generate_image_uris(request, cfg.IMAGE_CREATION_BUCKET, folder_name))
+        if not uris:
+            raise RuntimeError("no images were generated")
+        # A partial result (e.g. a failed Ultra call) is not reused
+        if cache_key and len(uris) == request.number_of_images:
+            self._cache.put(cache_key, uris)
+        return uris
+
+    async def _process(self, record: dict) -> dict:
+        rid = record_id(record)
+        entry = {"id": rid, "run_id": self._run_id}
+        start = time.monotonic()
+        try:
+            request = build_request(record)
+        except (KeyError, ValueError) as e:
+            return {**entry, "status": "invalid", "error": str(e)}
+        entry.update(prompt=request.prompt, model=request.model_name)
+        # Ultra fans out one API call per image
+        calls = request.number_of_images if request.model_name == cfg.MODEL_IMAGEN4_ULTRA else 1
+        for attempt in range(self._attempts):
+            await self._limiter(request.model_name).acquire(calls)
+            try:
+                uris = await asyncio.to_thread(self._generate, request, rid)
+                return {
+                    **entry,
+                    "status": "ok",
+                    "gcs_uris": uris,
+                    "attempts": attempt + 1,
+                    "elapsed": round(time.monotonic() - start, 3),
+                }
+            except Exception as e:
+                error = str(e)
+                if attempt < self._attempts - 1:
+                    delay = backoff_delay(
+                        attempt, cfg.IMAGEN_RETRY_BASE_DELAY, cfg.IMAGEN_RETRY_MAX_DELAY
+                    )
+                    print(f"{rid}: attempt {attempt + 1} failed ({error}); retrying in {delay:.1f}s")
+                    await asyncio.sleep(delay)
+        return {
+            **entry,
+            "status": "failed",
+            "error": error,
+            "attempts": self._attempts,
+            "elapsed": round(time.monotonic() - start, 3),
+        }
+
+    async def run(self, records: list[dict]) -> dict[str, int]:
+        """Processes records not yet completed; returns a count per status."""
+        done = completed_ids(self._manifest_path)
+        queue: asyncio.Queue = asyncio.Queue()
+        for record in records:
+            if record_id(record) not in done:
+                queue.put_nowait(record)
+        print(f"batch {self._run_id}: {queue.qsize()} to run, {len(done)} already done")
+        counts = {"skipped": len(done)}
+
+        with open(self._manifest_path, "a", encoding="utf-8") as manifest:
+
+            async def worker():
+                while True:
+                    try:
+                        record = queue.get_nowait()
+                    except asyncio.QueueEmpty:
+                        return
+                    entry = await self._process(record)
+                    # The manifest doubles as the resume checkpoint
+                    manifest.write(json.dumps(entry) + "\n")
+                    manifest.flush()
+                    counts[entry["status"]] = counts.get(entry["status"], 0) + 1
+                    print(f"{entry['id']}: {entry['status']}")
+
+            await asyncio.gather(*(worker() for _ in range(self._workers)))
+        return counts
+
+
+def read_records(path: str) -> list[dict]:
+    with open(path, "r", encoding="utf-8") as file:
+        return [json.loads(line) for line in file if line.strip()]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Batch Imagen generation from a JSONL file.")
+    parser.add_argument("records", help="JSONL file of prompt + modifier records")
+    parser.add_argument("--manifest", default="manifest.jsonl", help="JSONL manifest of outputs; also the resume checkpoint")
+    parser.add_argument("--workers", type=int, default=cfg.BATCH_WORKERS)
+    parser.add_argument("--attempts", type=int, default=cfg.BATCH_RETRY_ATTEMPTS)
+    parser.add_argument("--run-id", default=datetime.datetime.now().strftime("%Y-%m-%d-%H-%M-%S"))
+    parser.add_argument("--no-cache", action="store_true", help="ignore the prompt result cache")
+    args = parser.parse_args()
+    if args.workers < 1:
+        parser.error("--workers must be at least 1")
+    if args.attempts < 1:
+        parser.error("--attempts must be at least 1")
+
+    vertexai.init(project=cfg.PROJECT_ID, location=cfg.LOCATION)
+    cache = None
+    if not args.no_cache:
+        cache = PromptResultCache(
+            cfg.PROMPT_CACHE_INDEX,
+            max_entries=cfg.PROMPT_CACHE_SIZE,
+            ttl_seconds=cfg.PROMPT_CACHE_TTL_HOURS * 3600,
+        )
+    runner = BatchRunner(args.manifest, args.run_id, args.workers, args.attempts, cache)
+    counts = asyncio.run(runner.run(read_records(args.records)))
+    print(f"batch {args.run_id} finished: {counts}")
+
+
+if __name__ == "__main__":
+    main()
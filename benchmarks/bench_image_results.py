@@ -0,0 +1,78 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Micro-benchmark: per-batch cost of logging generated images.
+
+Compares the old `len(img._as_base64_string())` logging with ImageResult,
+which reports size and a sha256 from the raw bytes.
+
+    python -m benchmarks.bench_image_results [--images 4] [--mb 3] [--rounds 20]
+"""
+import argparse
+import base64
+import os
+import time
+import tracemalloc
+
+from models.image_models import ImageResult
+
+
+class _FakeGeneratedImage:
+    """Stands in for vertexai's GeneratedImage with bytes already loaded."""
+
+    def __init__(self, data: bytes):
+        self._loaded_bytes = data
+        self._gcs_uri = None
+
+    def _as_base64_string(self) -> str:
+        return base64.b64encode(self._loaded_bytes).decode("ascii")
+
+
+def _before(batch):
+    return [len(img._as_base64_string()) for img in batch]
+
+
+def _after(batch):
+    return [(r.size, r.sha256) for r in map(ImageResult.from_imagen, batch)]
+
+
+def _measure(fn, batch, rounds: int) -> tuple[float, int]:
+    """Returns (CPU ms per batch, peak traced bytes per batch)."""
+    fn(batch)  # warm up
+    tracemalloc.start()
+    start = time.process_time()
+    for _ in range(rounds):
+        fn(batch)
+    cpu = time.process_time() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return cpu / rounds * 1000, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--images", type=int, default=4)
+    parser.add_argument("--mb", type=float, default=3.0)
+    parser.add_argument("--rounds", type=int, default=20)
+    args = parser.parse_args()
+
+    size = int(args.mb * 1024 * 1024)
+    batch = [_FakeGeneratedImage(os.urandom(size)) for _ in range(args.images)]
+    print(f"batch: {args.images} images x {args.mb} MB, {args.rounds} rounds")
+    for label, fn in (("base64 logging", _before), ("ImageResult", _after)):
+        cpu_ms, peak = _measure(fn, batch, args.rounds)
+        print(f"{label:>16}: {cpu_ms:8.2f} ms CPU/batch  {peak / 1024 / 1024:8.2f} MB peak")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Micro-benchmark: per-render Python work for the modifier controls.
+
+Compares rebuilding every select's option list on each render (and composing
+the prompt with two getattr calls per modifier) against the precomputed
+ModifierRegistry lookups used by main.py.
+
+    python -m benchmarks.bench_modifier_render [--renders 2000]
+"""
+import argparse
+import time
+from dataclasses import dataclass
+
+from common.modifiers import ModifierRegistry
+from config.default import IMAGE_MODIFIER_OPTIONS, Config
+
+try:
+    from mesop import SelectOption
+except ImportError:  # measure list building alone when mesop is not installed
+
+    @dataclass
+    class SelectOption:
+        label: str
+        value: str
+
+
+class _State:
+    def __init__(self, modifiers):
+        for mod in modifiers:
+            setattr(self, f"image_{mod}", "None")
+        self.image_content_type = "Photo"
+        self.image_color_tone = "Cinematic"
+        self.image_composition = "Wide angle"
+
+
+def _render_before(modifiers, state):
+    for key, table in IMAGE_MODIFIER_OPTIONS.items():
+        options = []
+        for option in table["options"]:
+            label, value = (option, option) if isinstance(option, str) else option
+            options.append(SelectOption(label=label, value=value))
+        getattr(state, f"image_{key}")
+    prompt_modifiers = []
+    for mod in modifiers:
+        if mod != "aspect_ratio":
+            if getattr(state, f"image_{mod}") != "None":
+                prompt_modifiers.append(getattr(state, f"image_{mod}"))
+    return f"a cat {', '.join(prompt_modifiers)}"
+
+
+def _render_after(registry, select_options, state):
+    for key in registry.specs:
+        select_options[key]
+        getattr(state, f"image_{key}")
+    return registry.compose_prompt("a cat", state)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--renders", type=int, default=2000)
+    args = parser.parse_args()
+
+    modifiers = Config().image_modifiers
+    state = _State(modifiers)
+    registry = ModifierRegistry(modifiers, IMAGE_MODIFIER_OPTIONS)
+    select_options = {
+        key: [SelectOption(label=l, value=v) for l, v in zip(spec.labels, spec.values)]
+        for key, spec in registry.specs.items()
+    }
+    assert _render_before(modifiers, state) == _render_after(registry, select_options, state)
+
+    print(f"SelectOption: {SelectOption.__module__}.{SelectOption.__qualname__}")
+    for label, render in (
+        ("per-render lists", lambda: _render_before(modifiers, state)),
+        ("registry", lambda: _render_after(registry, select_options, state)),
+    ):
+        start = time.perf_counter()
+        for _ in range(args.renders):
+            render()
+        elapsed = time.perf_counter() - start
+        print(f"{label:>16}: {elapsed / args.renders * 1e6:8.1f} us/render")
+
+
+if __name__ == "__main__":
+    main()
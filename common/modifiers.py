@@ -0,0 +1,90 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+""" Precomputed image modifier registry """
+import operator
+from dataclasses import dataclass, field
+from typing import Any, Callable, Optional
+
+# Modifiers that are passed as generation parameters rather than prompt text
+NON_PROMPT_MODIFIERS = frozenset({"aspect_ratio"})
+
+
+@dataclass(frozen=True)
+class ModifierSpec:
+    """Option table for a single image modifier."""
+
+    key: str
+    label: str
+    width: Optional[str]
+    labels: tuple[str, ...]
+    values: tuple[str, ...]
+    index: dict[str, int] = field(default_factory=dict, compare=False)
+
+    def is_valid(self, value: str) -> bool:
+        """Whether value is one of this modifier's option values."""
+        return value in self.index
+
+
+def _build_spec(key: str, table: dict) -> ModifierSpec:
+    labels, values = [], []
+    for option in table["options"]:
+        label, value = (option, option) if isinstance(option, str) else option
+        labels.append(label)
+        values.append(value)
+    return ModifierSpec(
+        key=key,
+        label=table["label"],
+        width=table.get("width"),
+        labels=tuple(labels),
+        values=tuple(values),
+        index={value: idx for idx, value in enumerate(values)},
+    )
+
+
+class ModifierRegistry:
+    """Option tables and prompt composition for the image modifiers.
+
+    Built once at import; renders and generation requests only do lookups.
+    """
+
+    def __init__(self, modifier_order: list[str], options: dict[str, dict]):
+        self.order = tuple(modifier_order)
+        self.specs = {
+            key: _build_spec(key, options[key]) for key in self.order if key in options
+        }
+        self.prompt_modifiers = tuple(
+            key for key in self.order if key not in NON_PROMPT_MODIFIERS
+        )
+        self._get_prompt_values = self._compile_getter(self.prompt_modifiers)
+
+    @staticmethod
+    def _compile_getter(keys: tuple[str, ...]) -> Callable[[Any], tuple]:
+        """One attrgetter for every `image_<modifier>` attribute, returning a tuple."""
+        if not keys:
+            return lambda _: ()
+        getter = operator.attrgetter(*(f"image_{key}" for key in keys))
+        if len(keys) == 1:
+            return lambda source: (getter(source),)
+        return getter
+
+    def __getitem__(self, key: str) -> ModifierSpec:
+        return self.specs[key]
+
+    def prompt_values(self, source: Any) -> list[str]:
+        """Selected prompt modifier values on source, skipping "None"."""
+        return [value for value in self._get_prompt_values(source) if value != "None"]
+
+    def compose_prompt(self, input_txt: str, source: Any) -> str:
+        """The prompt text for input_txt with source's modifiers appended."""
+        return f"{input_txt} {', '.join(self.prompt_values(source))}"
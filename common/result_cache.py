@@ -0,0 +1,109 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+""" Content-addressed cache of deterministic Imagen results """
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional
+
+
+class PromptResultCache:
+    """Maps fully-composed generation parameters to the GCS uris they produced.
+
+    Only meaningful for deterministic requests (a fixed seed with the
+    watermark off). Entries expire after `ttl_seconds` and the least recently
+    used entry is evicted beyond `max_entries`. The index is persisted as a
+    JSON file so it survives restarts.
+    """
+
+    def __init__(self, index_path: str, max_entries: int = 2048, ttl_seconds: float = 7 * 24 * 3600):
+        self._index_path = index_path
+        self._max_entries = max_entries
+        self._ttl_seconds = ttl_seconds
+        # key -> (created_at, uris); ordered from least to most recently used
+        self._entries: OrderedDict[str, tuple[float, list[str]]] = OrderedDict()
+        self._lock = threading.Lock()
+        self._load()
+
+    @staticmethod
+    def key(model_name: str, generation_params: dict) -> str:
+        """Content address for a request; output location does not affect it."""
+        params = {k: v for k, v in generation_params.items() if k != "output_gcs_uri"}
+        canonical = json.dumps(
+            {"model": model_name, "params": params}, sort_keys=True, default=str
+        )
+        return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+    def _load(self):
+        if not os.path.exists(self._index_path):
+            return
+        try:
+            with open(self._index_path, "r", encoding="utf-8") as f:
+                stored = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"Ignoring unreadable prompt cache index {self._index_path}: {e}")
+            return
+        now = time.time()
+        for entry in stored:
+            if now - entry["created_at"] < self._ttl_seconds:
+                self._entries[entry["key"]] = (entry["created_at"], entry["uris"])
+        while len(self._entries) > self._max_entries:
+            self._entries.popitem(last=False)
+
+    def _save(self):
+        """Writes the index atomically; called with the lock held."""
+        stored = [
+            {"key": k, "created_at": created_at, "uris": uris}
+            for k, (created_at, uris) in self._entries.items()
+        ]
+        directory = os.path.dirname(self._index_path)
+        try:
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            tmp_path = f"{self._index_path}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(stored, f)
+            os.replace(tmp_path, self._index_path)
+        except OSError as e:
+            print(f"Error saving prompt cache index {self._index_path}: {e}")
+
+    def get(self, key: str) -> Optional[list[str]]:
+        """Returns the cached uris for key, or None on a miss or expired entry."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            created_at, uris = entry
+            if time.time() - created_at >= self._ttl_seconds:
+                del self._entries[key]
+                self._save()
+                return None
+            self._entries.move_to_end(key)
+            return list(uris)
+
+    def put(self, key: str, uris: list[str]):
+        """Records the uris produced for key."""
+        with self._lock:
+            self._entries[key] = (time.time(), list(uris))
+            self._entries.move_to_end(key)
+            while len(self._entries) > self._max_entries:
+                self._entries.popitem(last=False)
+            self._save()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
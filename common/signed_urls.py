@@ -0,0 +1,152 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+""" Signed URL cache for GCS objects """
+import datetime
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Optional
+
+
+def split_gcs_uri(gcs_uri: str) -> tuple[str, str]:
+    """Splits a gs://bucket/path uri into (bucket, blob) names.
+
+    Raises ValueError for anything else.
+    """
+    bucket_name, _, blob_name = gcs_uri.removeprefix("gs://").partition("/")
+    if not gcs_uri.startswith("gs://") or not bucket_name or not blob_name:
+        raise ValueError(f"not a gs://bucket/blob uri: {gcs_uri!r}")
+    return bucket_name, blob_name
+
+
+class SignedUrlCache:
+    """Process-wide cache of V4 signed URLs keyed by (bucket, blob, method).
+
+    A signed URL is reused until `safety_margin` before it expires, so a URL
+    handed to the browser is always valid for at least that long. Entries are
+    evicted least-recently-used once `max_entries` is reached. Misses from
+    `get_many` are signed concurrently, so a gallery of N images costs one
+    IAM signBlob round-trip of latency instead of N.
+    """
+
+    def __init__(
+        self,
+        client_factory: Callable,
+        service_account_email: str,
+        expiration: datetime.timedelta = datetime.timedelta(minutes=60),
+        safety_margin: datetime.timedelta = datetime.timedelta(minutes=5),
+        max_entries: int = 1024,
+        max_workers: int = 8,
+    ):
+        if safety_margin >= expiration:
+            raise ValueError("safety_margin must be shorter than expiration")
+        self._client_factory = client_factory
+        self._service_account_email = service_account_email
+        self._expiration = expiration
+        self._reuse_for = (expiration - safety_margin).total_seconds()
+        self._max_entries = max_entries
+        self._max_workers = max_workers
+        self._entries: OrderedDict[tuple[str, str, str], tuple[str, float]] = (
+            OrderedDict()
+        )
+        self._lock = threading.Lock()
+
+    def _lookup(self, key: tuple[str, str, str], now: float) -> Optional[str]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            url, reuse_until = entry
+            if now >= reuse_until:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return url
+
+    def _store(self, key: tuple[str, str, str], url: str, signed_at: float):
+        with self._lock:
+            self._entries[key] = (url, signed_at + self._reuse_for)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self._max_entries:
+                self._entries.popitem(last=False)
+
+    def _sign(self, client, key: tuple[str, str, str]) -> Optional[str]:
+        bucket_name, blob_name, method = key
+        signed_at = time.monotonic()
+        try:
+            blob = client.bucket(bucket_name).blob(blob_name)
+            url = blob.generate_signed_url(
+                version="v4",
+                expiration=self._expiration,
+                method=method,
+                service_account_email=self._service_account_email,
+                access_token=None,  # Use IAM to sign
+            )
+        except Exception as e:
+            print(f"Error signing gs://{bucket_name}/{blob_name}: {e}")
+            return None
+        self._store(key, url, signed_at)
+        return url
+
+    def get(self, gcs_uri: str, method: str = "GET") -> Optional[str]:
+        """Returns a signed URL for a single gs:// uri, or None on failure."""
+        return self.get_many([gcs_uri], method=method)[0]
+
+    def get_many(self, gcs_uris: list[str], method: str = "GET") -> list[Optional[str]]:
+        """Returns signed URLs for gs:// uris, in order; None where signing failed.
+
+        A uri that is not a gs://bucket/blob uri (e.g. one that is already a
+        URL) is returned unchanged. The storage client is only created when at
+        least one uri misses the cache.
+        """
+        now = time.monotonic()
+        keys: list[Optional[tuple[str, str, str]]] = []
+        urls: list[Optional[str]] = []
+        for uri in gcs_uris:
+            try:
+                key = (*split_gcs_uri(uri), method)
+            except (AttributeError, ValueError):
+                keys.append(None)
+                urls.append(uri)
+                continue
+            keys.append(key)
+            urls.append(self._lookup(key, now))
+        misses = list(dict.fromkeys(k for k, u in zip(keys, urls) if k is not None and u is None))
+        if not misses:
+            return urls
+
+        client = self._client_factory()
+        if len(misses) == 1:
+            signed = {misses[0]: self._sign(client, misses[0])}
+        else:
+            workers = min(self._max_workers, len(misses))
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                signed = dict(
+                    zip(misses, executor.map(lambda k: self._sign(client, k), misses))
+                )
+        return [signed[key] if url is None and key is not None else url for key, url in zip(keys, urls)]
+
+    def invalidate(self, gcs_uri: str, method: str = "GET"):
+        """Drops a cached URL, e.g. after the underlying object is replaced."""
+        try:
+            key = (*split_gcs_uri(gcs_uri), method)
+        except ValueError:
+            return
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
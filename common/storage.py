@@ -0,0 +1,106 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+""" Process-wide GCS client registry """
+import os
+import socket
+import threading
+from typing import Any, Callable
+
+import google.auth
+from google.auth.transport.requests import AuthorizedSession
+from google.cloud import storage
+from google.oauth2 import service_account
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection
+
+from config.default import Config
+
+cfg = Config()
+
+_STORAGE_SCOPES = ["https://www.googleapis.com/auth/devstorage.full_control"]
+
+_registry: dict[str, Any] = {}
+_registry_lock = threading.Lock()
+_sessions_created = 0
+
+
+class _KeepAliveAdapter(HTTPAdapter):
+    """HTTPAdapter that enables TCP keep-alive on pooled connections."""
+
+    def init_poolmanager(self, *args, **kwargs):
+        if cfg.STORAGE_TCP_KEEPALIVE:
+            kwargs["socket_options"] = HTTPConnection.default_socket_options + [
+                (socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1),
+            ]
+        super().init_poolmanager(*args, **kwargs)
+
+
+def _load_credentials():
+    """Service account key when running locally, default credentials otherwise."""
+    if os.path.exists("credentials.json"):
+        credentials = service_account.Credentials.from_service_account_file(
+            "credentials.json", scopes=_STORAGE_SCOPES
+        )
+        return credentials, credentials.project_id
+    return google.auth.default(scopes=_STORAGE_SCOPES)
+
+
+def _new_session(credentials) -> AuthorizedSession:
+    """Authorized HTTP session with a connection pool sized for concurrent use."""
+    global _sessions_created
+    session = AuthorizedSession(credentials)
+    adapter = _KeepAliveAdapter(
+        pool_connections=cfg.STORAGE_POOL_CONNECTIONS,
+        pool_maxsize=cfg.STORAGE_MAX_CONNECTIONS,
+    )
+    session.mount("https://", adapter)
+    _sessions_created += 1
+    return session
+
+
+def _create_storage_client() -> storage.Client:
+    try:
+        credentials, project = _load_credentials()
+        return storage.Client(
+            project=cfg.PROJECT_ID or project,
+            credentials=credentials,
+            _http=_new_session(credentials),
+        )
+    except Exception as e:
+        print(f"Error creating pooled storage client: {e}")
+        # Fallback to default credentials and the library's own session
+        return storage.Client()
+
+
+def _get_or_create(name: str, factory: Callable[[], Any]) -> Any:
+    """Returns the registered client for name, creating it on first use."""
+    client = _registry.get(name)
+    if client is not None:
+        return client
+    with _registry_lock:
+        client = _registry.get(name)
+        if client is None:
+            client = factory()
+            _registry[name] = client
+    return client
+
+
+def get_storage_client() -> storage.Client:
+    """Get the shared, authenticated storage client for local and Cloud Run environments"""
+    return _get_or_create("storage", _create_storage_client)
+
+
+def sessions_created() -> int:
+    """Number of pooled HTTP sessions created by this process."""
+    return _sessions_created
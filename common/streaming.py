@@ -0,0 +1,90 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+""" Helpers for streaming results into Mesop event handlers """
+import queue
+import threading
+from typing import Any, Iterable, Iterator, NamedTuple, Optional
+
+_DONE = object()
+
+
+class _Failure:
+    def __init__(self, error: BaseException):
+        self.error = error
+
+
+class StreamEvent(NamedTuple):
+    """A batch from one of the streams of a BackgroundStreams.
+
+    `done` is set on the stream's last event, and `error` if it failed.
+    """
+
+    name: str
+    items: list
+    done: bool = False
+    error: Optional[BaseException] = None
+
+
+class BackgroundStreams:
+    """Consumes several iterables on daemon threads and interleaves their items.
+
+    Streams can be added while iterating, e.g. a second request started once
+    the first stream has produced something. Iteration yields a StreamEvent
+    per stream with the items that arrived since its previous event, and
+    ends when every added stream is done.
+    """
+
+    def __init__(self):
+        self._items: queue.Queue = queue.Queue()
+        self._active = 0
+
+    def add(self, name: str, iterable: Iterable[Any]):
+        self._active += 1
+
+        def _pump():
+            try:
+                for item in iterable:
+                    self._items.put((name, item))
+            except Exception as e:  # reported on the consumer side
+                self._items.put((name, _Failure(e)))
+            finally:
+                self._items.put((name, _DONE))
+
+        threading.Thread(target=_pump, name=name, daemon=True).start()
+
+    def __iter__(self) -> Iterator[StreamEvent]:
+        while self._active:
+            received = [self._items.get()]
+            while True:
+                try:
+                    received.append(self._items.get_nowait())
+                except queue.Empty:
+                    break
+            # Coalesce per stream, keeping the order streams first appeared in
+            batches: dict[str, list] = {}
+            endings: dict[str, Optional[BaseException]] = {}
+            for name, item in received:
+                batch = batches.setdefault(name, [])
+                if isinstance(item, _Failure):
+                    endings[name] = item.error
+                elif item is _DONE:
+                    endings.setdefault(name, None)
+                else:
+                    batch.append(item)
+            for name, batch in batches.items():
+                done = name in endings
+                if done:
+                    self._active -= 1
+                if batch or done:
+                    yield StreamEvent(name, batch, done, endings.get(name))
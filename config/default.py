@@ -42,6 +42,290 @@ class GeminiModelConfig:
         return f"ModelConfig({', '.join(params)})"
 
 
+# Select options for each image modifier, in display order within each
+# control. Options are plain strings when the label and value are the same,
+# or (label, value) pairs otherwise.
+IMAGE_MODIFIER_OPTIONS: dict[str, dict] = {
+    "aspect_ratio": {
+        "label": "Aspect Ratio",
+        "width": "160px",
+        "options": [
+            "1:1", "3:4", "4:3", "16:9", "9:16",
+        ],
+    },
+    "content_type": {
+        "label": "Content Type",
+        "width": "160px",
+        "options": [
+            "None", "Abstract", "Aerial", "Architecture", "Art", "Commercial",
+            "Conceptual", "Concert", "Documentary", "Editorial", "Fashion", "Fine Art",
+            "Food Photography", "Illustration", "Landscape", "Macro", "Minimalist",
+            "Modern", "Night Photography", "Painting", "Photo", "Portrait",
+            "Product Photography", "Sketch", "Sports", "Still Life",
+            "Street Photography", "Surreal", "Travel", "Underwater", "Vintage",
+            "Wedding", "Wildlife",
+        ],
+    },
+    "color_tone": {
+        "label": "Color & Tone",
+        "width": "160px",
+        "options": [
+            "None", "Cinematic", "4K HDR", "Analogous colors", "Black and white",
+            "Bleach bypass", "Blue tone", "Color grading", "Color splash",
+            "Complementary colors", "Cool tone", "Cross processed", "Cyan tone",
+            "Desaturated", "Duotone", "Earth tones", "Film noir", "Golden", "Gradient",
+            "Green tone", "High contrast", "Infrared", "Jewel tones", "Kodachrome",
+            "Low contrast", "Magenta tone", "Monochromatic", "Muted color",
+            "Muted orange warm tones", "Neon", "Ombre", "Orange tone", "Pastel color",
+            "Pink tone", "Polaroid", "Purple tone", "Red tone", "Saturated", "Sepia",
+            "Split complementary", "Technicolor", "Tetradic colors", "Toned image",
+            "Triadic colors", "Vibrant", "Vintage", "Warm tone", "Yellow tone",
+        ],
+    },
+    "lighting": {
+        "label": "Lighting",
+        "width": None,
+        "options": [
+            "None", "Accent lighting", "Ambient light", "Backlighting",
+            "Background light", "Beauty lighting", "Blue hour", "Bottom lighting",
+            "Broad lighting", "Butterfly lighting", "Candlelight", "Chiaroscuro",
+            "Cinematic lighting", "Cloudy", "Cold lighting", "Concert lighting",
+            "Contre-jour", "Dawn", "Diffused light", "Directional light",
+            "Dramatic light", "Dusk", "Fill light", "Firelight", "Flash photography",
+            "Floodlight", "Fluorescent", "Front lighting", "God rays", "Golden hour",
+            "Hair light", "Hard light", "Harsh light", "High key lighting",
+            "High Contrast", "Incandescent", "Key light", "LED lighting",
+            "Long-time exposure", "Loop lighting", "Low key lighting", "Low lighting",
+            "Magic hour", "Moonlight", "Moody lighting", "Multiexposure",
+            "Natural light", "Neon lighting", "Overcast", "Rembrandt lighting",
+            "Rim lighting", "Ring light", "Short lighting", "Side lighting",
+            "Silhouette", "Soft light", "Softbox", "Split lighting", "Spotlight",
+            "Stage lighting", "Stormy lighting", "Strobe light", "Studio light",
+            "Sunbeam", "Sunny", "Surreal lighting", "Top lighting", "Twilight",
+            "Umbrella lighting", "Underwater lighting", "Volumetric lighting",
+            "Warm lighting",
+        ],
+    },
+    "composition": {
+        "label": "Composition",
+        "width": None,
+        "options": [
+            "None", "Shallow depth of field", "Abstract composition", "Action shot",
+            "Aerial", "Asymmetrical", "Backlit", "Background focus", "Bird's eye view",
+            "Bokeh", "Busy composition", "Candid", "Centered composition",
+            "Circular composition", "Closeup", "Collage", "Depth of field",
+            "Diagonal composition", "Diptych", "Double exposure", "Dutch angle",
+            "Dynamic composition", "Environmental portrait", "Extreme closeup",
+            "Extreme wide shot", "Eye level", "Fish eye", "Foreground focus",
+            "Frame within frame", "From below", "Full body shot", "Geometric",
+            "Golden ratio", "Group composition", "Half body shot", "Head and shoulders",
+            "High angle", "Isolated subject", "Knolling", "Landscape photography",
+            "Layered composition", "Leading lines", "Long shot", "Low angle",
+            "Macro photography", "Medium shot", "Minimalist composition", "Montage",
+            "Negative space", "Off-center", "Organic shapes", "Over the shoulder",
+            "Panoramic", "Photographed through window", "Point of view", "Posed",
+            "Profile shot", "Reflection", "Rule of thirds", "Shot from above",
+            "Shot from below", "Silhouette", "Still life", "Straight angle",
+            "Surface detail", "Symmetrical", "Taken from far away",
+            "Three-quarter view", "Tilt-shift", "Triptych", "Wide angle",
+            "Worm's eye view",
+        ],
+    },
+    "art_style": {
+        "label": "Art Style",
+        "width": "160px",
+        "options": [
+            "None", "Realistic", "Photorealistic", "Hyperrealistic", "Studio Ghibli",
+            "Anime", "Manga", "Disney", "Pixar", "Impressionist painting", "Van Gogh",
+            "Monet", "Picasso", "Surreal", "Salvador Dali", "Abstract", "Minimalist",
+            "Fantasy", "Pop Art", "Andy Warhol", "Watercolor", "Oil Painting",
+            "Acrylic", "Digital art", "Concept Art", "3D Render", "Pixel Art",
+            "Vector Art", "Technical pencil drawing", "Charcoal drawing",
+            "Color pencil drawing", "Pastel painting", "Sketch", "Pencil Drawing",
+            "Charcoal", "Ink Drawing", "Pastel", "Art Nouveau", "Art Deco (poster)",
+            "Renaissance painting", "Baroque", "Gothic", "Cyberpunk", "Steampunk",
+            "Retro", "Vintage", "Grunge",
+        ],
+    },
+    "mood_atmosphere": {
+        "label": "Mood/Atmosphere",
+        "width": "160px",
+        "options": [
+            "None", "Futuristic", "Calm", "Peaceful", "Serene", "Tranquil", "Energetic",
+            "Dynamic", "Vibrant", "Lively", "Mysterious", "Enigmatic", "Dark", "Moody",
+            "Romantic", "Dreamy", "Whimsical", "Dramatic", "Intense", "Epic", "Heroic",
+            "Melancholic", "Nostalgic", "Joyful", "Cheerful", "Uplifting", "Ominous",
+            "Foreboding", "Ethereal", "Magical", "Mystical", "Cozy", "Warm", "Cold",
+            "Lonely", "Crowded", "Bustling", "Quiet", "Loud", "Chaotic", "Orderly",
+            "Ancient", "Timeless",
+        ],
+    },
+    "texture": {
+        "label": "Texture",
+        "width": "160px",
+        "options": [
+            "None", "Smooth", "Rough", "Glossy", "Matte", "Metallic", "Shiny",
+            "Reflective", "Realistic Human skin texture", "Soft skin", "Detailed skin",
+            "Pore detail", "Skin imperfections", "Natural complexion", "Healthy skin",
+            "Youthful skin", "Mature skin", "Fabric", "Cotton", "Silk", "Velvet",
+            "Leather", "Wood", "Oak", "Pine", "Bamboo", "Stone", "Marble", "Granite",
+            "Concrete", "Brick", "Glass", "Crystal", "Plastic", "Rubber", "Paper",
+            "Cardboard", "Sand", "Gravel", "Fur", "Feathers", "Scales", "Bark", "Moss",
+            "Rust", "Weathered", "Cracked", "Worn", "Polished", "Brushed", "Hammered",
+            "Embossed", "Textured",
+        ],
+    },
+    "lens_type": {
+        "label": "Lens Type",
+        "width": "160px",
+        "options": [
+            "None",
+            "Fisheye",
+            ("Ultra-Wide", "Ultra-Wide)"),
+            ("Wide Angle)", "Wide Angle"),
+            "Cinematic Prime",
+            "Standard",
+            ("Macro Standard", "Macro"),
+            ("Telephoto (85mm)", "Telephoto"),
+            ("Macro", "Macro 105mm"),
+            "Anamorphic",
+        ],
+    },
+    "subject_age": {
+        "label": "Subject Age",
+        "width": "160px",
+        "options": [
+            "None", "Child", "Elderly", "Middle-aged", "Senior", "Teen", "Young Adult",
+        ],
+    },
+    "subject_gender": {
+        "label": "Facial Expression",
+        "width": "160px",
+        "options": [
+            "None", "Angry", "Calm", "Cheerful", "Confident", "Contemplative",
+            "Curious", "Determined", "Disappointed", "Excited", "Focused", "Happy",
+            "Joyful", "Laughing", "Melancholic", "Peaceful", "Playful", "Relaxed",
+            "Sad", "Serious", "Smiling", "Surprised", "Thoughtful", "Worried",
+        ],
+    },
+    "subject_clothing": {
+        "label": "Subject Clothing",
+        "width": "160px",
+        "options": [
+            "None", "Bohemian", "Business", "Casual", "Elegant", "Evening wear",
+            "Formal", "Minimalist", "Modern", "Professional", "Sporty", "Streetwear",
+            "Summer clothes", "Traditional", "Vintage", "Winter clothes",
+        ],
+    },
+    "subject_hair": {
+        "label": "Subject Hair",
+        "width": "160px",
+        "options": [
+            "None", "Bald", "Black", "Blonde", "Braided", "Brunette", "Colorful",
+            "Curly", "Gray", "Long", "Medium", "Messy", "Natural", "Ponytail", "Red",
+            "Short", "Straight", "Styled", "Wavy",
+        ],
+    },
+    "environment_setting": {
+        "label": "Environment",
+        "width": "160px",
+        "options": [
+            "None", "Beach", "Cafe", "City", "Desert", "Forest", "Gallery", "Home",
+            "Indoor", "Mountain", "Museum", "Natural setting", "Office", "Outdoor",
+            "Park", "Restaurant", "Rural", "Street", "Studio", "Urban",
+        ],
+    },
+    "time_of_day": {
+        "label": "Time of Day",
+        "width": "160px",
+        "options": [
+            "None", "Afternoon", "Blue hour", "Dawn", "Evening", "Golden hour",
+            "Midnight", "Morning", "Night", "Noon", "Sunrise", "Sunset", "Twilight",
+        ],
+    },
+    "weather_condition": {
+        "label": "Weather",
+        "width": "160px",
+        "options": [
+            "None", "Clear sky", "Cloudy", "Cold", "Dry", "Foggy", "Humid", "Misty",
+            "Overcast", "Partly cloudy", "Rainy", "Snowy", "Stormy", "Sunny", "Warm",
+            "Windy",
+        ],
+    },
+    "season": {
+        "label": "Season",
+        "width": "160px",
+        "options": [
+            "None", "Autumn", "Early spring", "Fall", "Holiday season", "Late summer",
+            "Mid-winter", "Spring", "Summer", "Winter",
+        ],
+    },
+    "camera_angle": {
+        "label": "Camera Angle",
+        "width": "160px",
+        "options": [
+            "None", "Eye-Level", "Low-Angle", "High-Angle", "Bird's-Eye View",
+            "Dutch Angle",
+        ],
+    },
+    "aperture": {
+        "label": "Aperture",
+        "width": "160px",
+        "options": [
+            "None", "f/1.2", "f/1.4", "f/1.8", "f/2", "f/2.8", "f/4", "f/5.6", "f/8",
+            "f/11", "f/16", "f/22",
+        ],
+    },
+    "film_type": {
+        "label": "Film Type",
+        "width": "160px",
+        "options": [
+            "None", "black and white", "polaroid", "Film noir", "duotone",
+            "Grainy film", "Sepia tone",
+        ],
+    },
+    "focus_technique": {
+        "label": "Focus Technique",
+        "width": "160px",
+        "options": [
+            "None",
+            ("-Soft focus (Dreamy)", "Soft focus"),
+            ("-Deep focus (Everything sharp)", "Deep focus"),
+            ("-Zone focusing (street photography)", "Zone focusing"),
+            ("-Shallow focus (bokeh)", "Shallow focus"),
+            ("-Selective focus (Isolate a specific detail)", "Selective focus"),
+            ("-Split diopter (Multi focus with bokeh)", "Split diopter"),
+            ("-Follow focus (moving subject)", "Follow focus"),
+            ("-Motion blur (Dynamic movement)", "Motion blur"),
+        ],
+    },
+    "focal_length": {
+        "label": "Focal Length",
+        "width": "160px",
+        "options": [
+            "None",
+            ("-10mm (Ultra wide-angle, Landscapes, Architecture, Long exposure.)", "10mm"),
+            ("-24mm (Wide-angle, Environmental portraits, Street, Travel.)", "24mm"),
+            ("-35mm (Street, Documentary, Environmental portraits.)", "35mm"),
+            ("-50mm (Standard, Classic portraits, Everyday photography, Natural perspective.)", "50mm"),
+            ("-60mm (Macro, Still life, Controlled lighting, Product photography.)", "60mm"),
+            ("-85mm (Portraits, Bokeh, Shallow depth of field, Classic headshots.)", "85mm"),
+            ("-105mm (Macro, Portraits, Short telephoto, Precise focusing.)", "105mm"),
+            ("-200mm (Portraits, Sports, Compression effect, Telephoto.)", "200mm"),
+            ("-400mm (Sports, Wildlife, Action, Super telephoto, Fast shutter.)", "400mm"),
+        ],
+    },
+}
+
+# Modifier values the UI starts with; every other modifier starts at "None"
+IMAGE_MODIFIER_DEFAULTS: dict[str, str] = {
+    "content_type": "Photo",
+    "color_tone": "Cinematic",
+    "composition": "Wide angle",
+    "aspect_ratio": "16:9",
+}
+
+
 @dataclass
 class Config:
     """All configuration variables for this solution should be managed here."""
@@ -58,11 +342,52 @@ class Config:
     MODEL_IMAGEN4 = "imagen-4.0-generate-001"
     MODEL_IMAGEN4_FAST = "imagen-4.0-fast-generate-001"
     MODEL_IMAGEN4_ULTRA = "imagen-4.0-ultra-generate-001"
+    # Cache of deterministic (seeded, unwatermarked) generation results, kept
+    # across runs; point it at a persistent volume when running in a container
+    PROMPT_CACHE_INDEX = os.environ.get(
+        "PROMPT_CACHE_INDEX",
+        os.path.expanduser("~/.cache/imagen-studio/prompt_results.json"),
+    )
+    PROMPT_CACHE_SIZE = int(os.environ.get("PROMPT_CACHE_SIZE", 2048))
+    PROMPT_CACHE_TTL_HOURS = float(os.environ.get("PROMPT_CACHE_TTL_HOURS", 24 * 7))
+    # Parallel fan-out for models that return one image per request
+    IMAGEN_FAN_OUT_MAX_WORKERS = int(os.environ.get("IMAGEN_FAN_OUT_MAX_WORKERS", 16))
+    IMAGEN_DEFAULT_CONCURRENCY = int(os.environ.get("IMAGEN_DEFAULT_CONCURRENCY", 8))
+    IMAGEN_MODEL_CONCURRENCY = {
+        MODEL_IMAGEN4_ULTRA: int(os.environ.get("IMAGEN_ULTRA_CONCURRENCY", 4)),
+    }
+    IMAGEN_RETRY_ATTEMPTS = int(os.environ.get("IMAGEN_RETRY_ATTEMPTS", 5))
+    IMAGEN_RETRY_BASE_DELAY = float(os.environ.get("IMAGEN_RETRY_BASE_DELAY", 2.0))
+    IMAGEN_RETRY_MAX_DELAY = float(os.environ.get("IMAGEN_RETRY_MAX_DELAY", 30.0))
+    # Headless batch generation (batch.py)
+    BATCH_WORKERS = int(os.environ.get("BATCH_WORKERS", 8))
+    BATCH_RETRY_ATTEMPTS = int(os.environ.get("BATCH_RETRY_ATTEMPTS", 3))
+    IMAGEN_DEFAULT_REQUESTS_PER_MINUTE = float(
+        os.environ.get("IMAGEN_DEFAULT_REQUESTS_PER_MINUTE", 60)
+    )
+    IMAGEN_REQUESTS_PER_MINUTE = {
+        MODEL_IMAGEN4_ULTRA: float(os.environ.get("IMAGEN_ULTRA_REQUESTS_PER_MINUTE", 20)),
+    }
     TEMPERATURE = 0.8
     TOP_P = 0.97
     TOP_K = 40
     MAX_OUTPUT_TOKENS = 8192
     IMAGEN_PROMPTS_JSON = "prompts/imagen_prompts.json"
+    PROMPT_LIBRARY_RELOAD_SECONDS = float(os.environ.get("PROMPT_LIBRARY_RELOAD_SECONDS", 5))
+    # Construct model handles at startup rather than on the first request
+    WARM_UP_MODELS = os.environ.get("WARM_UP_MODELS", "true").lower() == "true"
+    # Signed URLs for displaying generated images
+    SERVICE_ACCOUNT_EMAIL = os.environ.get(
+        "SERVICE_ACCOUNT_EMAIL", f"sa-imagen-studio@{PROJECT_ID}.iam.gserviceaccount.com"
+    )
+    SIGNED_URL_EXPIRATION_MINUTES = int(os.environ.get("SIGNED_URL_EXPIRATION_MINUTES", 60))
+    SIGNED_URL_SAFETY_MARGIN_MINUTES = int(os.environ.get("SIGNED_URL_SAFETY_MARGIN_MINUTES", 5))
+    SIGNED_URL_CACHE_SIZE = int(os.environ.get("SIGNED_URL_CACHE_SIZE", 1024))
+    SIGNED_URL_MAX_WORKERS = int(os.environ.get("SIGNED_URL_MAX_WORKERS", 8))
+    # Shared GCS client connection pool
+    STORAGE_POOL_CONNECTIONS = int(os.environ.get("STORAGE_POOL_CONNECTIONS", 10))
+    STORAGE_MAX_CONNECTIONS = int(os.environ.get("STORAGE_MAX_CONNECTIONS", 32))
+    STORAGE_TCP_KEEPALIVE = os.environ.get("STORAGE_TCP_KEEPALIVE", "true").lower() == "true"
     image_modifiers: list[str] = field(
         default_factory=lambda: [
             "aspect_ratio",
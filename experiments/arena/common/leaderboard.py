@@ -0,0 +1,194 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""In-memory leaderboard for arena studies.
+
+A study's ratings are loaded once and then kept current two ways: by the
+rating engine after each batch of votes this process commits, and by a
+listener on the study's ratings document for votes committed by other
+processes. Every update rebuilds a small sorted view, so reading the
+leaderboard is a lookup.
+
+Confidence intervals come from a background job that bootstraps the vote
+log: it resamples the votes with replacement, keeping their order, replays
+every resample as sequential ELO in one vectorised pass and takes the
+percentiles of each model's rating.
+"""
+
+import threading
+from dataclasses import dataclass, field
+from typing import Optional
+
+import numpy as np
+
+from common.ratings import RatingStore, Vote, sequential_elo, votes_to_arrays
+from utils.logger import LogLevel, log
+
+# Bootstrap replicates replayed together, bounding the job's memory use
+_REPLICATES_PER_PASS = 50
+
+
+@dataclass(frozen=True)
+class LeaderboardRow:
+    rank: int
+    model: str
+    rating: float
+    # 95% bootstrap interval, once the background job has computed it
+    lower: Optional[float] = None
+    upper: Optional[float] = None
+
+
+@dataclass
+class _StudyBoard:
+    ratings: dict[str, float] = field(default_factory=dict)
+    vote_count: int = 0
+    intervals: dict[str, tuple[float, float]] = field(default_factory=dict)
+    # vote_count the intervals were computed for
+    intervals_vote_count: int = -1
+    rows: tuple[LeaderboardRow, ...] = ()
+    watch: object = None
+
+
+def bootstrap_intervals(
+    votes: list[Vote],
+    k_factor: float,
+    rounds: int = 200,
+    confidence: float = 0.95,
+    seed: Optional[int] = None,
+) -> dict[str, tuple[float, float]]:
+    """Percentile bootstrap intervals of each model's sequential ELO rating."""
+    models, first, second, scores = votes_to_arrays(votes)
+    if not models:
+        return {}
+    rng = np.random.default_rng(seed)
+    samples = []
+    for done in range(0, rounds, _REPLICATES_PER_PASS):
+        replicates = min(_REPLICATES_PER_PASS, rounds - done)
+        indices = np.sort(rng.integers(0, len(scores), (replicates, len(scores))), axis=1)
+        samples.append(
+            sequential_elo(first[indices], second[indices], scores[indices], len(models), k_factor)
+        )
+    tail = (1 - confidence) / 2 * 100
+    lower, upper = np.percentile(np.concatenate(samples), [tail, 100 - tail], axis=0)
+    return {
+        model: (round(float(low), 2), round(float(high), 2))
+        for model, low, high in zip(models, lower, upper)
+    }
+
+
+class Leaderboard:
+    """Sorted ratings per study, maintained in memory.
+
+    `rows` never reads the store; `load` does, once per study, and should be
+    called from an event handler rather than while rendering.
+    """
+
+    def __init__(
+        self,
+        store: RatingStore,
+        k_factor: float,
+        bootstrap_rounds: int = 200,
+        interval_seconds: float = 300,
+    ):
+        self._store = store
+        self._k_factor = k_factor
+        self._bootstrap_rounds = bootstrap_rounds
+        self._interval_seconds = interval_seconds
+        self._boards: dict[str, _StudyBoard] = {}
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._worker: Optional[threading.Thread] = None
+
+    def load(self, study: str):
+        """Loads the study's ratings and starts following them, if not done yet."""
+        if study in self._boards:
+            return
+        board = _StudyBoard(ratings=self._store.get_ratings(study))
+        board.rows = self._sorted_rows(board)
+        with self._lock:
+            if study in self._boards:
+                return
+            self._boards[study] = board
+        board.watch = self._store.watch_ratings(
+            study, lambda ratings, vote_count: self.update(study, ratings, vote_count)
+        )
+        self._ensure_worker()
+        self._wake.set()
+
+    def rows(self, study: str) -> tuple[LeaderboardRow, ...]:
+        """The study's leaderboard, best first; empty if the study isn't loaded."""
+        board = self._boards.get(study)
+        return board.rows if board else ()
+
+    def update(self, study: str, ratings: dict[str, float], vote_count: int):
+        """Applies a study's ratings as of vote_count; older updates are ignored.
+
+        Empty ratings with a vote_count of 0 reset the study.
+        """
+        with self._lock:
+            board = self._boards.get(study)
+            if board is None:
+                return
+            reset = vote_count == 0 and not ratings
+            if not reset and vote_count < board.vote_count:
+                return
+            board.ratings = dict(ratings)
+            board.vote_count = vote_count
+            if reset:
+                board.intervals = {}
+                board.intervals_vote_count = -1
+            board.rows = self._sorted_rows(board)
+
+    def on_votes_committed(self, study: str, votes: list[Vote], ratings: dict[str, float]):
+        """RatingEngine on_commit hook."""
+        sequences = [vote.sequence for vote in votes if vote.sequence is not None]
+        if sequences:
+            self.update(study, ratings, max(sequences))
+
+    def _sorted_rows(self, board: _StudyBoard) -> tuple[LeaderboardRow, ...]:
+        ordered = sorted(board.ratings.items(), key=lambda item: (-item[1], item[0]))
+        return tuple(
+            LeaderboardRow(rank, model, rating, *board.intervals.get(model, (None, None)))
+            for rank, (model, rating) in enumerate(ordered, start=1)
+        )
+
+    def _ensure_worker(self):
+        with self._lock:
+            if self._worker is None or not self._worker.is_alive():
+                self._worker = threading.Thread(
+                    target=self._run, name="leaderboard-intervals", daemon=True
+                )
+                self._worker.start()
+
+    def _run(self):
+        while True:
+            self._wake.wait(self._interval_seconds)
+            self._wake.clear()
+            for study in list(self._boards):
+                try:
+                    self._refresh_intervals(study)
+                except Exception as e:
+                    log(f"Failed to compute confidence intervals for study '{study}': {e}", LogLevel.ERROR)
+
+    def _refresh_intervals(self, study: str):
+        board = self._boards[study]
+        vote_count = board.vote_count
+        if vote_count == board.intervals_vote_count:
+            return
+        votes = self._store.list_votes(study)
+        intervals = bootstrap_intervals(votes, self._k_factor, rounds=self._bootstrap_rounds)
+        with self._lock:
+            board.intervals = intervals
+            board.intervals_vote_count = vote_count
+            board.rows = self._sorted_rows(board)
+        log(f"Confidence intervals for study '{study}' updated from {len(votes)} votes.")
@@ -0,0 +1,137 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Prefetched arena matchups.
+
+Each session keeps its next few matchups generating in the background, so a
+vote is followed by a pair that is usually ready already. The cost is
+bounded: each session prefetches at most `depth` matchups, generation runs
+on a shared pool of workers, and only the most recently active sessions keep
+a buffer; idle ones are dropped and their pending work cancelled.
+"""
+
+import collections
+import concurrent.futures
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Callable, Hashable
+
+from utils.logger import LogLevel, log
+
+
+@dataclass
+class Matchup:
+    """A prompt and the images two models produced for it, in model order."""
+
+    prompt: str
+    model1: str
+    model2: str
+    images: list[str] = field(default_factory=list)
+
+
+class MatchupPrefetcher:
+    """Keeps `depth` matchups from `make_matchup` in flight for one session."""
+
+    def __init__(
+        self,
+        make_matchup: Callable[[], Matchup],
+        depth: int,
+        executor: concurrent.futures.Executor,
+    ):
+        self._make_matchup = make_matchup
+        self._depth = max(depth, 1)
+        self._executor = executor
+        self._pending: collections.deque[concurrent.futures.Future] = collections.deque()
+        self._lock = threading.Lock()
+
+    def next(self) -> Matchup:
+        """The oldest prefetched matchup, waiting for it if it isn't ready.
+
+        Taking one starts the next prefetch. Matchups that failed or are
+        missing an image are skipped; if all of them are, one is generated
+        directly.
+        """
+        for _ in range(self._depth):
+            with self._lock:
+                self._fill()
+                future = self._pending.popleft()
+                self._fill()
+            try:
+                matchup = future.result()
+            except Exception as e:
+                log(f"Prefetching a matchup failed: {e}", LogLevel.ERROR)
+                continue
+            if len(matchup.images) == 2:
+                return matchup
+            log(f"Skipping prefetched matchup with {len(matchup.images)} images", LogLevel.WARNING)
+        return self._make_matchup()
+
+    def close(self):
+        """Cancels the prefetches that have not started."""
+        with self._lock:
+            for future in self._pending:
+                future.cancel()
+            self._pending.clear()
+
+    def _fill(self):
+        while len(self._pending) < self._depth:
+            self._pending.append(self._executor.submit(self._make_matchup))
+
+
+class PrefetcherRegistry:
+    """Per-session MatchupPrefetchers, bounded in number and idle time.
+
+    A session's prefetcher is replaced when its `signature` (the settings its
+    matchups were made with, e.g. study and models) changes.
+    """
+
+    def __init__(self, depth: int, workers: int, max_sessions: int, idle_seconds: float):
+        self._depth = depth
+        self._max_sessions = max_sessions
+        self._idle_seconds = idle_seconds
+        self._executor = concurrent.futures.ThreadPoolExecutor(
+            max_workers=workers, thread_name_prefix="matchup-prefetch"
+        )
+        # session id -> (signature, last used, prefetcher)
+        self._sessions: collections.OrderedDict[str, tuple[Hashable, float, MatchupPrefetcher]] = (
+            collections.OrderedDict()
+        )
+        self._lock = threading.Lock()
+
+    def get(
+        self, session_id: str, signature: Hashable, make_matchup: Callable[[], Matchup]
+    ) -> MatchupPrefetcher:
+        now = time.monotonic()
+        with self._lock:
+            entry = self._sessions.pop(session_id, None)
+            if entry is not None and entry[0] != signature:
+                entry[2].close()
+                entry = None
+            prefetcher = entry[2] if entry else MatchupPrefetcher(make_matchup, self._depth, self._executor)
+            self._sessions[session_id] = (signature, now, prefetcher)
+            self._evict(now)
+            return prefetcher
+
+    def next_matchup(
+        self, session_id: str, signature: Hashable, make_matchup: Callable[[], Matchup]
+    ) -> Matchup:
+        return self.get(session_id, signature, make_matchup).next()
+
+    def _evict(self, now: float):
+        while self._sessions:
+            session_id, (_, last_used, prefetcher) = next(iter(self._sessions.items()))
+            if len(self._sessions) <= self._max_sessions and now - last_used < self._idle_seconds:
+                break
+            del self._sessions[session_id]
+            prefetcher.close()
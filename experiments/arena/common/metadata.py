@@ -12,6 +12,7 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import atexit
 import datetime
 import json
 import os
@@ -24,7 +25,16 @@ from config.default import Default
 from config.firebase_config import FirebaseClient
 from config.spanner_config import ArenaStudyTracker, ArenaModelEvaluation
 from models.set_up import ModelSetup
+from common.leaderboard import Leaderboard
+from common.ratings import (
+    FirestoreRatingStore,
+    RatingEngine,
+    RatingsMirror,
+    Vote,
+    recompute_ratings,
+)
 from common.storage import check_gcs_blob_exists
+from common.vote_spool import VoteSpool
 from alive_progress import alive_bar
 
 from utils.logger import LogLevel, log
@@ -35,6 +45,53 @@ client, model_id = ModelSetup.init()
 MODEL_ID = model_id
 config = Default()
 db = FirebaseClient(database_id=config.IMAGE_FIREBASE_DB).get_client()
+rating_store = FirestoreRatingStore(db, config.IMAGE_RATINGS_COLLECTION_NAME)
+
+
+def _mirror_ratings_to_spanner(study: str, ratings: dict[str, float]):
+    """Upserts a study's ratings to Spanner."""
+    study_tracker = ArenaStudyTracker(
+        project_id=config.PROJECT_ID,
+        spanner_instance_id=config.SPANNER_INSTANCE_ID,
+        spanner_database_id=config.SPANNER_DATABASE_ID,
+    )
+    study_tracker.upsert_study_runs(
+        study_runs=[
+            ArenaModelEvaluation(model_name=model, rating=rating, study=study)
+            for model, rating in ratings.items()
+        ]
+    )
+    log(f"ELO ratings of {len(ratings)} models updated in Spanner for study '{study}'.", LogLevel.ON)
+
+
+# Spanner is a copy of the Firestore ratings, updated apart from the votes so
+# an outage there never holds votes back
+spanner_mirror = RatingsMirror(_mirror_ratings_to_spanner)
+
+
+leaderboard = Leaderboard(
+    rating_store,
+    k_factor=config.ELO_K_FACTOR,
+    bootstrap_rounds=config.LEADERBOARD_BOOTSTRAP_ROUNDS,
+    interval_seconds=config.LEADERBOARD_INTERVAL_SECONDS,
+)
+
+
+def _on_votes_committed(study: str, votes: list[Vote], ratings: dict[str, float]):
+    """Updates the leaderboard and queues the ratings for Spanner."""
+    leaderboard.on_votes_committed(study, votes, ratings)
+    spanner_mirror.update(study, ratings)
+
+
+rating_engine = RatingEngine(
+    rating_store,
+    k_factor=config.ELO_K_FACTOR,
+    max_batch=config.ELO_BATCH_MAX_VOTES,
+    max_delay=config.ELO_BATCH_MAX_DELAY_SECONDS,
+    spool=VoteSpool(config.VOTE_SPOOL_DIR),
+    on_commit=_on_votes_committed,
+)
+atexit.register(rating_engine.close, timeout=config.VOTE_DRAIN_TIMEOUT_SECONDS)
 
 
 def add_image_metadata(gcsuri: str, prompt: str, model: str, study: Optional[str] = "live", collection_name: Optional[str] = None):
@@ -151,17 +208,7 @@ def load_metadata_from_json(
 def get_elo_ratings(study: str):
     """ Retrieve ELO ratings for models from Firestore """
     # Fetch current ELO ratings from Firestore
-    doc_ref = (
-        db.collection(config.IMAGE_RATINGS_COLLECTION_NAME)
-        .where(filter=firestore.FieldFilter("study", "==", study))
-        .where(filter=firestore.FieldFilter("type", "==", "elo_rating"))
-        .get()
-    )
-    updated_ratings = {}
-    if doc_ref:
-        for doc in doc_ref:
-            ratings = doc.to_dict().get("ratings", {})
-            updated_ratings.update(ratings)
+    updated_ratings = rating_store.get_ratings(study)
     # Convert to DataFrame
     df = pd.DataFrame(list(updated_ratings.items()), columns=['Model', 'ELO Rating'])
     df = df.sort_values(by='ELO Rating', ascending=False)  # Sort by rating
@@ -170,110 +217,37 @@ def get_elo_ratings(study: str):
 
 
 def update_elo_ratings(model1: str, model2: str, winner: str, images: list[str], prompt: str, study: str):
-    """Update ELO ratings for models"""
+    """Record a vote; the ELO ratings are updated in the background.
 
-    current_datetime = datetime.datetime.now()
-
-    # Fetch current ELO ratings from Firestore
-    doc_ref = (
-        db.collection(config.IMAGE_RATINGS_COLLECTION_NAME)
-        .where(filter=firestore.FieldFilter("study", "==", study))
-        .where(filter=firestore.FieldFilter("type", "==", "elo_rating"))
-        .get()
+    The vote is written to the local spool and returns straight away. The
+    rating engine then applies it in a Firestore transaction with other
+    votes and mirrors the new ratings to Spanner, retrying until it commits.
+    """
+    vote = Vote(
+        study=study,
+        model1=model1,
+        model2=model2,
+        winner=winner,
+        image1=images[0],
+        image2=images[1],
+        prompt=prompt,
     )
+    rating_engine.submit(vote)
+    print(f"Vote {vote.vote_id} queued for study '{study}'")
+    return vote.vote_id
 
-    updated_ratings = {}
-    elo_rating_doc_id = None  # Store the document ID
-    if doc_ref:
-        for doc in doc_ref:
-            elo_rating_doc_id = doc.id  # Get the document ID
-            ratings = doc.to_dict().get("ratings", {})
-            updated_ratings.update(ratings)
-
-    elo_model1 = updated_ratings.get(model1, 1000)  # Default to 1000 if not found
-    elo_model2 = updated_ratings.get(model2, 1000)
-
-    # Calculate expected scores
-    expected_model1 = 1 / (1 + 10 ** ((elo_model2 - elo_model1) / 400))
-    expected_model2 = 1 / (1 + 10 ** ((elo_model1 - elo_model2) / 400))
-
-    # Update ELO ratings based on the winner
-    k_factor = config.ELO_K_FACTOR
-    if winner == model1:
-        elo_model1 = elo_model1 + k_factor * (1 - expected_model1)
-        elo_model2 = elo_model2 + k_factor * (0 - expected_model2)
-    elif winner == model2:
-        elo_model1 = elo_model1 + k_factor * (0 - expected_model1)
-        elo_model2 = elo_model2 + k_factor * (1 - expected_model2)
-
-    updated_ratings[model1] = round(elo_model1, 2)
-    updated_ratings[model2] = round(elo_model2, 2)
-
-    print(f"Ratings: {updated_ratings}")
-
-    # Store updated ELO ratings in Firestore
-    if elo_rating_doc_id:  # Check if the document ID was found
-        doc_ref = db.collection(config.IMAGE_RATINGS_COLLECTION_NAME).document(elo_rating_doc_id)
-        doc_ref.update(
-            {
-                "ratings": updated_ratings,
-                "timestamp": current_datetime,
-            }
-        )
-        print(f"ELO ratings updated in Firestore with document ID: {doc_ref.id}")
-    else:
-        # Document doesn't exist, create it
-        doc_ref = db.collection(config.IMAGE_RATINGS_COLLECTION_NAME).document()
-        doc_ref.set(
-            {
-                "study": study,
-                "type": "elo_rating",
-                "ratings": updated_ratings,
-                "timestamp": current_datetime,
-            }
-        )
-
-        print(f"ELO ratings created in Firestore with document ID: {doc_ref.id}")
-
-    doc_ref = db.collection(config.IMAGE_RATINGS_COLLECTION_NAME).document()
-    doc_ref.set(
-        {
-            "timestamp": current_datetime,
-            "type": "vote",
-            "model1": model1,
-            "image1": images[0],
-            "model2": model2,
-            "image2": images[1],
-            "winner": winner,
-            "prompt": prompt,
-            "study": study
-        }
-    )
 
-    print(f"Vote updated in Firestore with document ID: {doc_ref.id}")
+def recompute_elo_ratings(study: str, method: str = "elo") -> dict[str, float]:
+    """Recompute a study's ratings from its vote log.
 
-    # Update the latest ELO ratings in Spanner
-    study_tracker = ArenaStudyTracker(
-        project_id=config.PROJECT_ID,
-        spanner_instance_id=config.SPANNER_INSTANCE_ID,
-        spanner_database_id=config.SPANNER_DATABASE_ID,
-    )
-    if not study_tracker:
-        log("Failed to initialize Spanner study tracker.", LogLevel.ERROR)
-        raise RuntimeError("Spanner study tracker initialization failed.")
-    elo_ratings_by_model = []
-    for model, elo in updated_ratings.items():
-        elo_study_entry = ArenaModelEvaluation(model_name=model, 
-                             rating=elo, 
-                             study=study)
-        elo_ratings_by_model.append(elo_study_entry)
-    
-    try:
-        study_tracker.upsert_study_runs(study_runs=elo_ratings_by_model)
-        log(f"ELO ratings updated in Spanner for study '{study}'.", LogLevel.ON)
-    except Exception as e:
-        log(f"Failed to update ELO ratings in Spanner: {e}", LogLevel.ERROR)
-        raise RuntimeError(f"Failed to update ELO ratings in Spanner: {e}")
+    method is "elo" to replay the votes in the order they were applied, which
+    reproduces the live ratings, or "bradley_terry" for an order-independent
+    fit on the same scale.
+    """
+    votes = rating_store.list_votes(study)
+    ratings = recompute_ratings(votes, method=method, k_factor=config.ELO_K_FACTOR)
+    log(f"Recomputed {method} ratings for study '{study}' from {len(votes)} votes.")
+    return ratings
 
 
 def get_latest_votes(study: str, limit: int = 10):
@@ -0,0 +1,614 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""ELO rating engine for arena studies.
+
+Votes are applied by a single aggregator thread per process. It groups the
+votes that arrive together and commits each group in one transaction that
+reads the study's ratings, applies the votes in order, writes the ratings and
+appends the votes to the vote log with their sequence number. Concurrent
+votes therefore never overwrite each other, a vote is applied at most once
+(its ID is its document ID), and the ratings document is written once per
+batch rather than once per vote.
+
+The vote log can be replayed offline with `sequential_elo`, which reproduces
+the live ratings, or fitted with `bradley_terry`.
+"""
+
+import abc
+import concurrent.futures
+import datetime
+import queue
+import threading
+import time
+import uuid
+from dataclasses import dataclass, field
+from typing import Callable, Iterable, Optional
+
+import numpy as np
+from google.cloud import firestore
+
+from utils.logger import LogLevel, log
+
+INITIAL_RATING = 1000.0
+
+# Queued by RatingEngine.close to stop the worker once the queue is drained
+_STOP = object()
+
+
+@dataclass
+class Vote:
+    """One arena vote: which of two models' images the user preferred."""
+
+    study: str
+    model1: str
+    model2: str
+    winner: str
+    image1: str = ""
+    image2: str = ""
+    prompt: str = ""
+    vote_id: str = field(default_factory=lambda: uuid.uuid4().hex)
+    timestamp: datetime.datetime = field(default_factory=datetime.datetime.now)
+    # Position in the study's rating order, assigned when the vote is applied
+    sequence: Optional[int] = None
+
+    @property
+    def score1(self) -> Optional[float]:
+        """model1's result: 1 for a win, 0 for a loss, None if neither won."""
+        if self.winner == self.model1:
+            return 1.0
+        if self.winner == self.model2:
+            return 0.0
+        return None
+
+    def to_document(self) -> dict:
+        return {
+            "timestamp": self.timestamp,
+            "type": "vote",
+            "model1": self.model1,
+            "image1": self.image1,
+            "model2": self.model2,
+            "image2": self.image2,
+            "winner": self.winner,
+            "prompt": self.prompt,
+            "study": self.study,
+            "vote_id": self.vote_id,
+            "sequence": self.sequence,
+        }
+
+    @classmethod
+    def from_document(cls, data: dict, vote_id: str) -> "Vote":
+        return cls(
+            study=data.get("study"),
+            model1=data.get("model1"),
+            model2=data.get("model2"),
+            winner=data.get("winner"),
+            image1=data.get("image1", ""),
+            image2=data.get("image2", ""),
+            prompt=data.get("prompt", ""),
+            vote_id=data.get("vote_id") or vote_id,
+            timestamp=data.get("timestamp"),
+            sequence=data.get("sequence"),
+        )
+
+
+def elo_update(rating1: float, rating2: float, score1: float, k_factor: float) -> tuple[float, float]:
+    """New ratings of two models after a game where model1 scored score1."""
+    expected1 = 1 / (1 + 10 ** ((rating2 - rating1) / 400))
+    rating1 = rating1 + k_factor * (score1 - expected1)
+    rating2 = rating2 + k_factor * ((1 - score1) - (1 - expected1))
+    return round(rating1, 2), round(rating2, 2)
+
+
+def apply_votes(ratings: dict[str, float], votes: Iterable[Vote], k_factor: float) -> dict[str, float]:
+    """Applies votes in order to a copy of ratings; models start at INITIAL_RATING."""
+    ratings = dict(ratings)
+    for vote in votes:
+        score1 = vote.score1
+        rating1 = ratings.get(vote.model1, INITIAL_RATING)
+        rating2 = ratings.get(vote.model2, INITIAL_RATING)
+        if score1 is not None:
+            rating1, rating2 = elo_update(rating1, rating2, score1, k_factor)
+        ratings[vote.model1] = rating1
+        ratings[vote.model2] = rating2
+    return ratings
+
+
+def _log_order(vote: Vote):
+    # Votes from before the sequence number existed come first, by time
+    return (vote.sequence is not None, vote.sequence or 0, str(vote.timestamp))
+
+
+class RatingStore(abc.ABC):
+    """Persistence for a study's ratings and vote log."""
+
+    @abc.abstractmethod
+    def commit_votes(self, study: str, votes: list[Vote], k_factor: float) -> dict[str, float]:
+        """Atomically applies the votes not yet in the log and returns the study's ratings."""
+
+    @abc.abstractmethod
+    def get_ratings(self, study: str) -> dict[str, float]:
+        ...
+
+    @abc.abstractmethod
+    def list_votes(self, study: str) -> list[Vote]:
+        """The study's vote log in the order the votes were applied."""
+
+    def watch_ratings(self, study: str, callback: Callable[[dict[str, float], int], None]):
+        """Calls callback(ratings, vote_count) whenever the study's ratings change.
+
+        Returns a handle with `unsubscribe()`, or None if the store cannot
+        push changes.
+        """
+        return None
+
+
+class FirestoreRatingStore(RatingStore):
+    """Ratings and votes as documents in the arena ratings collection.
+
+    Each study has one ratings document, `elo_rating_<study>`; votes are
+    documents keyed by vote ID. Ratings documents created before the fixed ID
+    was introduced are migrated into it by the first commit and retyped so
+    queries no longer find them.
+    """
+
+    def __init__(self, db, collection_name: str):
+        self._db = db
+        self._collection_name = collection_name
+
+    def _collection(self):
+        return self._db.collection(self._collection_name)
+
+    def _ratings_ref(self, study: str):
+        return self._collection().document(f"elo_rating_{study}")
+
+    def _legacy_ratings_query(self, study: str):
+        return (
+            self._collection()
+            .where(filter=firestore.FieldFilter("study", "==", study))
+            .where(filter=firestore.FieldFilter("type", "==", "elo_rating"))
+        )
+
+    def commit_votes(self, study: str, votes: list[Vote], k_factor: float) -> dict[str, float]:
+        ratings_ref = self._ratings_ref(study)
+        vote_refs = [self._collection().document(vote.vote_id) for vote in votes]
+
+        @firestore.transactional
+        def apply(transaction) -> dict[str, float]:
+            ratings_doc = ratings_ref.get(transaction=transaction)
+            existing = {
+                doc.id for doc in transaction.get_all(vote_refs) if doc.exists
+            }
+            legacy_docs = []
+            if ratings_doc.exists:
+                data = ratings_doc.to_dict()
+                ratings = data.get("ratings", {})
+                sequence = data.get("vote_count", 0)
+            else:
+                ratings, sequence = {}, 0
+                legacy_docs = [
+                    doc
+                    for doc in transaction.get(self._legacy_ratings_query(study))
+                    if doc.id != ratings_ref.id
+                ]
+                for doc in legacy_docs:
+                    ratings.update(doc.to_dict().get("ratings", {}))
+
+            new_votes = [vote for vote in votes if vote.vote_id not in existing]
+            for vote in new_votes:
+                sequence += 1
+                vote.sequence = sequence
+                ratings = apply_votes(ratings, [vote], k_factor)
+                transaction.set(self._collection().document(vote.vote_id), vote.to_document())
+            if not new_votes:
+                return ratings
+
+            transaction.set(
+                ratings_ref,
+                {
+                    "study": study,
+                    "type": "elo_rating",
+                    "ratings": ratings,
+                    "vote_count": sequence,
+                    "timestamp": datetime.datetime.now(),
+                },
+            )
+            for doc in legacy_docs:
+                transaction.update(doc.reference, {"type": "elo_rating_migrated"})
+            return ratings
+
+        return apply(self._db.transaction())
+
+    def get_ratings(self, study: str) -> dict[str, float]:
+        doc = self._ratings_ref(study).get()
+        if doc.exists:
+            return doc.to_dict().get("ratings", {})
+        ratings = {}
+        for legacy_doc in self._legacy_ratings_query(study).stream():
+            ratings.update(legacy_doc.to_dict().get("ratings", {}))
+        return ratings
+
+    def list_votes(self, study: str) -> list[Vote]:
+        query = (
+            self._collection()
+            .where(filter=firestore.FieldFilter("study", "==", study))
+            .where(filter=firestore.FieldFilter("type", "==", "vote"))
+        )
+        votes = [Vote.from_document(doc.to_dict(), doc.id) for doc in query.stream()]
+        return sorted(votes, key=_log_order)
+
+    def watch_ratings(self, study: str, callback: Callable[[dict[str, float], int], None]):
+        seen = False
+
+        def on_snapshot(docs, changes, read_time):
+            nonlocal seen
+            doc = docs[0] if docs else None
+            if doc is not None and doc.exists:
+                seen = True
+                data = doc.to_dict()
+                callback(data.get("ratings", {}), data.get("vote_count", 0))
+            elif seen:
+                # Deleted, i.e. the study's ratings were reset. A study whose
+                # ratings were never migrated has no document to begin with.
+                callback({}, 0)
+
+        return self._ratings_ref(study).on_snapshot(on_snapshot)
+
+
+class InMemoryRatingStore(RatingStore):
+    """A RatingStore in process memory, for load tests and local runs.
+
+    `commit_latency` simulates the round trip of a transaction commit.
+    """
+
+    def __init__(self, commit_latency: float = 0.0):
+        self._commit_latency = commit_latency
+        self._ratings: dict[str, dict[str, float]] = {}
+        self._votes: dict[str, dict[str, Vote]] = {}
+        self._lock = threading.Lock()
+
+    def commit_votes(self, study: str, votes: list[Vote], k_factor: float) -> dict[str, float]:
+        with self._lock:
+            if self._commit_latency:
+                time.sleep(self._commit_latency)
+            vote_log = self._votes.setdefault(study, {})
+            ratings = self._ratings.get(study, {})
+            for vote in votes:
+                if vote.vote_id in vote_log:
+                    continue
+                vote.sequence = len(vote_log) + 1
+                ratings = apply_votes(ratings, [vote], k_factor)
+                vote_log[vote.vote_id] = vote
+            self._ratings[study] = ratings
+            return dict(ratings)
+
+    def get_ratings(self, study: str) -> dict[str, float]:
+        with self._lock:
+            return dict(self._ratings.get(study, {}))
+
+    def list_votes(self, study: str) -> list[Vote]:
+        with self._lock:
+            return sorted(self._votes.get(study, {}).values(), key=_log_order)
+
+
+class RatingEngine:
+    """Applies votes through a RatingStore in batches.
+
+    `submit` queues a vote and returns a future for the study's ratings once
+    the vote is applied. A worker thread takes up to `max_batch` queued votes,
+    waiting at most `max_delay` seconds for a batch to fill, and commits each
+    study's votes in one transaction.
+
+    With a `spool` the engine is write-behind: `submit` returns as soon as the
+    vote is on local disk, failed commits are retried, and votes left in the
+    spool by an earlier process are delivered on start. A vote stays pending
+    until the store has it. `on_commit(study, votes, ratings)` runs after each
+    committed batch, e.g. to update a leaderboard; it should be quick, and its
+    failures are logged without affecting the votes. `close` drains the
+    queue.
+    """
+
+    def __init__(
+        self,
+        store: RatingStore,
+        k_factor: float,
+        max_batch: int = 200,
+        max_delay: float = 0.05,
+        spool=None,
+        on_commit: Optional[Callable[[str, list[Vote], dict[str, float]], None]] = None,
+        max_retry_delay: float = 30.0,
+    ):
+        self.store = store
+        self._k_factor = k_factor
+        self._max_batch = max_batch
+        self._max_delay = max_delay
+        self._spool = spool
+        self._on_commit = on_commit
+        self._max_retry_delay = max_retry_delay
+        self._queue: queue.Queue = queue.Queue()
+        self._worker: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self._closed = False
+        if spool is not None:
+            recovered = spool.recover()
+            for vote in recovered:
+                self._queue.put((vote, concurrent.futures.Future()))
+            if recovered:
+                self._ensure_worker()
+
+    def submit(self, vote: Vote) -> concurrent.futures.Future:
+        future = concurrent.futures.Future()
+        if self._spool is not None:
+            self._spool.append(vote)
+        if self._closed:
+            future.set_exception(RuntimeError("The rating engine is closed."))
+            return future
+        self._ensure_worker()
+        self._queue.put((vote, future))
+        return future
+
+    def record_vote(self, vote: Vote, timeout: Optional[float] = None) -> dict[str, float]:
+        """Applies a vote and waits for the study's updated ratings."""
+        return self.submit(vote).result(timeout=timeout)
+
+    def close(self, timeout: Optional[float] = None):
+        """Stops accepting votes and waits up to timeout for queued ones to commit.
+
+        Votes still uncommitted stay in the spool for the next process.
+        """
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            worker = self._worker
+        if worker is not None and worker.is_alive():
+            self._queue.put(_STOP)
+            worker.join(timeout)
+        if self._spool is not None:
+            pending = self._spool.pending_count()
+            if pending:
+                log(f"{pending} votes were not committed and remain in {self._spool.path}", LogLevel.WARNING)
+            self._spool.close()
+
+    def _ensure_worker(self):
+        with self._lock:
+            if self._closed:
+                return
+            if self._worker is None or not self._worker.is_alive():
+                self._worker = threading.Thread(
+                    target=self._run, name="rating-engine", daemon=True
+                )
+                self._worker.start()
+
+    def _next_batch(self) -> list:
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self._max_delay
+        while len(batch) < self._max_batch and batch[-1] is not _STOP:
+            remaining = deadline - time.monotonic()
+            try:
+                batch.append(
+                    self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+                )
+            except queue.Empty:
+                break
+        return batch
+
+    def _commit(self, study: str, entries: list) -> bool:
+        votes = [vote for vote, _ in entries]
+        try:
+            ratings = self.store.commit_votes(study, votes, self._k_factor)
+        except Exception as e:
+            log(f"Failed to apply {len(entries)} votes for study '{study}': {e}", LogLevel.ERROR)
+            if self._spool is None:
+                for _, future in entries:
+                    future.set_exception(e)
+            return False
+        if self._on_commit is not None:
+            try:
+                self._on_commit(study, votes, ratings)
+            except Exception as e:
+                log(f"on_commit failed for study '{study}': {e}", LogLevel.ERROR)
+        if self._spool is not None:
+            self._spool.ack([vote.vote_id for vote in votes])
+        for _, future in entries:
+            future.set_result(ratings)
+        return True
+
+    def _run(self):
+        stopping = False
+        retry_delay = 0.0
+        while True:
+            if stopping and self._queue.empty():
+                return
+            batch = self._next_batch()
+            if _STOP in batch:
+                stopping = True
+                batch = [entry for entry in batch if entry is not _STOP]
+            by_study: dict[str, list] = {}
+            for vote, future in batch:
+                by_study.setdefault(vote.study, []).append((vote, future))
+            failed = []
+            for study, entries in by_study.items():
+                if not self._commit(study, entries):
+                    failed.extend(entries)
+            if not failed or self._spool is None:
+                retry_delay = 0.0
+                continue
+            if stopping:
+                # Left in the spool for the next process
+                return
+            retry_delay = min(max(retry_delay * 2, 0.5), self._max_retry_delay)
+            time.sleep(retry_delay)
+            for entry in failed:
+                self._queue.put(entry)
+
+
+class RatingsMirror:
+    """Copies each study's latest ratings elsewhere with `push(study, ratings)`.
+
+    `update` records the ratings and returns; a worker thread pushes them and
+    retries failures with backoff. Ratings that arrive for a study while its
+    push is waiting or being retried replace the older ones, so an outage of
+    the mirror holds one entry per study and costs one push per retry. The
+    mirror is best effort: ratings not pushed when the process exits are
+    pushed with the study's next update.
+    """
+
+    def __init__(
+        self,
+        push: Callable[[str, dict[str, float]], None],
+        max_retry_delay: float = 60.0,
+    ):
+        self._push = push
+        self._max_retry_delay = max_retry_delay
+        self._pending: dict[str, dict[str, float]] = {}
+        self._condition = threading.Condition()
+        self._worker: Optional[threading.Thread] = None
+
+    def update(self, study: str, ratings: dict[str, float]):
+        with self._condition:
+            self._pending[study] = dict(ratings)
+            if self._worker is None or not self._worker.is_alive():
+                self._worker = threading.Thread(
+                    target=self._run, name="ratings-mirror", daemon=True
+                )
+                self._worker.start()
+            self._condition.notify()
+
+    def pending_count(self) -> int:
+        with self._condition:
+            return len(self._pending)
+
+    def _run(self):
+        retry_delay = 0.0
+        while True:
+            with self._condition:
+                while not self._pending:
+                    self._condition.wait()
+                study = next(iter(self._pending))
+                ratings = self._pending.pop(study)
+            try:
+                self._push(study, ratings)
+            except Exception as e:
+                retry_delay = min(max(retry_delay * 2, 0.5), self._max_retry_delay)
+                log(
+                    f"Mirroring ratings for study '{study}' failed; retrying in {retry_delay:.1f}s: {e}",
+                    LogLevel.ERROR,
+                )
+                with self._condition:
+                    # Unless newer ratings arrived meanwhile
+                    self._pending.setdefault(study, ratings)
+                time.sleep(retry_delay)
+            else:
+                retry_delay = 0.0
+
+
+def votes_to_arrays(votes: Iterable[Vote]) -> tuple[list[str], np.ndarray, np.ndarray, np.ndarray]:
+    """Model names and (model1 index, model2 index, model1 score) arrays for decided votes."""
+    models: dict[str, int] = {}
+    first, second, scores = [], [], []
+    for vote in votes:
+        score1 = vote.score1
+        if score1 is None:
+            continue
+        first.append(models.setdefault(vote.model1, len(models)))
+        second.append(models.setdefault(vote.model2, len(models)))
+        scores.append(score1)
+    return (
+        list(models),
+        np.asarray(first, dtype=np.intp),
+        np.asarray(second, dtype=np.intp),
+        np.asarray(scores, dtype=np.float64),
+    )
+
+
+def sequential_elo(
+    first: np.ndarray,
+    second: np.ndarray,
+    scores: np.ndarray,
+    n_models: int,
+    k_factor: float,
+    initial: float = INITIAL_RATING,
+) -> np.ndarray:
+    """Replays votes as sequential ELO updates.
+
+    The inputs may have leading batch dimensions, e.g. (replicates, votes) for
+    bootstrap resamples; every replicate is updated at once for each vote
+    position. Returns ratings of shape (..., n_models). Ratings are rounded as
+    the live engine rounds them, so a replay of the vote log in sequence order
+    reproduces the stored ratings.
+    """
+    batched = np.ndim(scores) > 1
+    first = np.atleast_2d(first)
+    second = np.atleast_2d(second)
+    scores = np.atleast_2d(scores)
+    replicates = np.arange(first.shape[0])
+    ratings = np.full((first.shape[0], n_models), initial, dtype=np.float64)
+    for t in range(first.shape[1]):
+        a, b, s = first[:, t], second[:, t], scores[:, t]
+        rating_a, rating_b = ratings[replicates, a], ratings[replicates, b]
+        expected_a = 1 / (1 + 10 ** ((rating_b - rating_a) / 400))
+        ratings[replicates, a] = np.round(rating_a + k_factor * (s - expected_a), 2)
+        ratings[replicates, b] = np.round(rating_b + k_factor * (expected_a - s), 2)
+    return ratings if batched else ratings[0]
+
+
+def bradley_terry(
+    first: np.ndarray,
+    second: np.ndarray,
+    scores: np.ndarray,
+    n_models: int,
+    iterations: int = 1000,
+    tolerance: float = 1e-9,
+    prior: float = 1.0,
+) -> np.ndarray:
+    """Fits Bradley-Terry strengths to the votes and returns them on the ELO scale.
+
+    Uses the MM algorithm on the pairwise win matrix. `prior` adds that many
+    drawn games to each pair that played, so a model that never won still
+    gets a finite rating. Ratings are centred on INITIAL_RATING.
+    """
+    wins = np.zeros((n_models, n_models))
+    np.add.at(wins, (first, second), scores)
+    np.add.at(wins, (second, first), 1 - scores)
+    played = (wins + wins.T) > 0
+    wins = wins + played * (prior / 2)
+    games = wins + wins.T
+    total_wins = wins.sum(axis=1)
+
+    strengths = np.ones(n_models)
+    for _ in range(iterations):
+        pair_sums = strengths[:, None] + strengths[None, :]
+        updated = total_wins / np.where(games > 0, games / pair_sums, 0).sum(axis=1).clip(min=1e-12)
+        updated = np.where(total_wins > 0, updated, strengths)
+        updated /= np.exp(np.log(updated).mean())
+        converged = np.max(np.abs(updated - strengths)) < tolerance
+        strengths = updated
+        if converged:
+            break
+    ratings = 400 * np.log10(strengths)
+    return ratings - ratings.mean() + INITIAL_RATING
+
+
+def recompute_ratings(votes: Iterable[Vote], method: str = "elo", k_factor: float = 32) -> dict[str, float]:
+    """Ratings recomputed from a vote log by "elo" (sequential) or "bradley_terry"."""
+    models, first, second, scores = votes_to_arrays(votes)
+    if not models:
+        return {}
+    if method == "elo":
+        ratings = sequential_elo(first, second, scores, len(models), k_factor)
+    elif method == "bradley_terry":
+        ratings = bradley_terry(first, second, scores, len(models))
+    else:
+        raise ValueError(f"Unknown rating method: {method}")
+    return {model: round(float(rating), 2) for model, rating in zip(models, ratings)}
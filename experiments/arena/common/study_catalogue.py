@@ -0,0 +1,247 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""In-memory catalogue of a study's pre-generated images.
+
+A study's images are loaded once from the image collection into an index of
+prompt -> model -> image URIs and kept current by Firestore snapshot
+listeners. For every pair of the study's models the catalogue also keeps the
+prompts both have images for, so a matchup is sampled in constant time and
+never lacks an image.
+"""
+
+import os
+import random
+import sys
+import threading
+from typing import Iterable, Optional, Sequence
+
+from google.cloud.firestore import FieldFilter
+
+from config.default import Default
+from config.firebase_config import FirebaseClient
+from utils.logger import LogLevel, log
+
+config = Default()
+
+# Firestore allows at most 30 values in an "in" filter
+_IN_FILTER_LIMIT = 30
+
+
+def _image_uri(gcsuri: str) -> str:
+    """The URI the arena shows for an image document's gcsuri."""
+    if "stablediffusion" not in gcsuri or gcsuri.startswith("20250328_"):
+        return os.path.splitext(gcsuri)[0]
+    return gcsuri
+
+
+class _IndexedSet:
+    """A set with O(1) add, discard and random choice."""
+
+    def __init__(self):
+        self._items: list = []
+        self._positions: dict = {}
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def add(self, item):
+        if item not in self._positions:
+            self._positions[item] = len(self._items)
+            self._items.append(item)
+
+    def discard(self, item):
+        position = self._positions.pop(item, None)
+        if position is None:
+            return
+        last = self._items.pop()
+        if position < len(self._items):
+            self._items[position] = last
+            self._positions[last] = position
+
+    def choice(self, rng: random.Random):
+        return self._items[rng.randrange(len(self._items))]
+
+
+class StudyCatalogue:
+    """Index of the images the given models have for a study's prompts.
+
+    `prompts` limits the catalogue to the study's prompt list; None accepts
+    every prompt. Call `start` to load it and keep it current, `close` to
+    stop listening.
+    """
+
+    def __init__(self, models: Sequence[str], prompts: Optional[Iterable[str]] = None):
+        self.models = [sys.intern(model) for model in dict.fromkeys(models)]
+        self._prompts = {sys.intern(prompt) for prompt in prompts} if prompts is not None else None
+        # prompt -> model -> image URIs
+        self._images: dict[str, dict[str, list[str]]] = {}
+        # document id -> (prompt, model, uri), to apply modifications and removals
+        self._docs: dict[str, tuple[str, str, str]] = {}
+        # (model, model) in sorted order -> prompts both models have images for
+        self._pair_prompts: dict[tuple[str, str], _IndexedSet] = {}
+        self._playable_pairs = _IndexedSet()
+        self._lock = threading.Lock()
+        self._watches = []
+        self._rng = random.Random()
+
+    def start(self, collection, timeout: Optional[float] = None) -> "StudyCatalogue":
+        """Loads the models' images from `collection` and listens for changes."""
+        loaded = []
+        for start in range(0, len(self.models), _IN_FILTER_LIMIT):
+            chunk = self.models[start : start + _IN_FILTER_LIMIT]
+            query = collection.where(filter=FieldFilter("model", "in", chunk))
+            first_snapshot = threading.Event()
+
+            def on_snapshot(docs, changes, read_time, first_snapshot=first_snapshot):
+                for change in changes:
+                    self._apply_change(change.type.name, change.document)
+                first_snapshot.set()
+
+            self._watches.append(query.on_snapshot(on_snapshot))
+            loaded.append(first_snapshot)
+        for first_snapshot in loaded:
+            if not first_snapshot.wait(timeout):
+                log("Study catalogue is still loading; matchups may be limited.", LogLevel.WARNING)
+                break
+        log(f"Study catalogue: {self.stats()}")
+        return self
+
+    def close(self):
+        for watch in self._watches:
+            watch.unsubscribe()
+        self._watches.clear()
+
+    def add_image(self, doc_id: str, prompt: str, model: str, gcsuri: str):
+        with self._lock:
+            self._add(doc_id, prompt, model, gcsuri)
+
+    def remove_image(self, doc_id: str):
+        with self._lock:
+            self._remove(doc_id)
+
+    def sample_matchup(self) -> Optional[tuple[str, str, str, str, str]]:
+        """A random (prompt, model1, model2, uri1, uri2), or None if no pair shares a prompt."""
+        with self._lock:
+            if not len(self._playable_pairs):
+                return None
+            pair = self._playable_pairs.choice(self._rng)
+            prompt = self._pair_prompts[pair].choice(self._rng)
+            model1, model2 = pair if self._rng.random() < 0.5 else pair[::-1]
+            images = self._images[prompt]
+            return (
+                prompt,
+                model1,
+                model2,
+                self._rng.choice(images[model1]),
+                self._rng.choice(images[model2]),
+            )
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "images": len(self._docs),
+                "prompts": len(self._images),
+                "playable_pairs": len(self._playable_pairs),
+                "pairs": len(self.models) * (len(self.models) - 1) // 2,
+            }
+
+    def _apply_change(self, change_type: str, document):
+        with self._lock:
+            self._remove(document.id)
+            if change_type != "REMOVED":
+                data = document.to_dict() or {}
+                self._add(document.id, data.get("prompt"), data.get("model"), data.get("gcsuri"))
+
+    def _add(self, doc_id: str, prompt: Optional[str], model: Optional[str], gcsuri: Optional[str]):
+        if not prompt or not gcsuri or model not in self.models:
+            return
+        if self._prompts is not None and prompt not in self._prompts:
+            return
+        if doc_id in self._docs:
+            self._remove(doc_id)
+        prompt, model = sys.intern(prompt), sys.intern(model)
+        uri = _image_uri(gcsuri)
+        by_model = self._images.setdefault(prompt, {})
+        uris = by_model.setdefault(model, [])
+        uris.append(uri)
+        self._docs[doc_id] = (prompt, model, uri)
+        if len(uris) == 1:
+            # The model's first image for the prompt pairs it with every model that has one
+            for other in by_model:
+                if other != model:
+                    pair = tuple(sorted((model, other)))
+                    self._pair_prompts.setdefault(pair, _IndexedSet()).add(prompt)
+                    self._playable_pairs.add(pair)
+
+    def _remove(self, doc_id: str):
+        entry = self._docs.pop(doc_id, None)
+        if entry is None:
+            return
+        prompt, model, uri = entry
+        by_model = self._images[prompt]
+        uris = by_model[model]
+        uris.remove(uri)
+        if uris:
+            return
+        del by_model[model]
+        for other in by_model:
+            pair = tuple(sorted((model, other)))
+            pair_prompts = self._pair_prompts[pair]
+            pair_prompts.discard(prompt)
+            if not len(pair_prompts):
+                self._playable_pairs.discard(pair)
+        if not by_model:
+            del self._images[prompt]
+
+
+_catalogues: dict[str, tuple[tuple, StudyCatalogue]] = {}
+# Held while a study's catalogue is built, which can take a while, so that
+# other studies are not held up; _catalogues_lock only guards the dicts
+_study_locks: dict[str, threading.Lock] = {}
+_catalogues_lock = threading.Lock()
+
+
+def get_study_catalogue(
+    study: str,
+    models: Sequence[str],
+    prompts: Optional[Iterable[str]] = None,
+    prompts_location: Optional[str] = None,
+) -> StudyCatalogue:
+    """The study's catalogue, loaded on first use and shared by all sessions.
+
+    The catalogue is rebuilt if the study's models or `prompts_location`, the
+    source of `prompts`, change; `prompts` is read only when it is built.
+    """
+    key = (tuple(models), prompts_location)
+    with _catalogues_lock:
+        entry = _catalogues.get(study)
+        if entry is not None and entry[0] == key:
+            return entry[1]
+        study_lock = _study_locks.setdefault(study, threading.Lock())
+    with study_lock:
+        with _catalogues_lock:
+            entry = _catalogues.get(study)
+        if entry is not None and entry[0] == key:
+            # Built by another session while this one waited
+            return entry[1]
+        db = FirebaseClient(database_id=config.IMAGE_FIREBASE_DB).get_client()
+        catalogue = StudyCatalogue(models, prompts).start(
+            db.collection(config.IMAGE_COLLECTION_NAME),
+            timeout=config.STUDY_CATALOGUE_LOAD_TIMEOUT_SECONDS,
+        )
+        with _catalogues_lock:
+            _catalogues[study] = (key, catalogue)
+        if entry is not None:
+            entry[1].close()
+        return catalogue
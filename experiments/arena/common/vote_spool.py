@@ -0,0 +1,173 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Durable local spool for votes that have not been persisted yet.
+
+Each process appends to its own JSON-lines file in the spool directory: a
+`vote` line (fsynced) when a vote is accepted and an `ack` line once it has
+been committed. Votes without an ack are pending. A process starting up
+recovers its own file and any file left behind by a process that is no
+longer running, so votes accepted before a crash are delivered again; the
+vote ID makes redelivery harmless.
+"""
+
+import datetime
+import glob
+import json
+import os
+import threading
+
+from common.ratings import Vote
+from utils.logger import LogLevel, log
+
+_FILE_PREFIX = "votes-"
+_FILE_SUFFIX = ".jsonl"
+
+
+def _vote_to_json(vote: Vote) -> dict:
+    data = vote.to_document()
+    data["timestamp"] = vote.timestamp.isoformat() if vote.timestamp else None
+    return data
+
+
+def _vote_from_json(data: dict) -> Vote:
+    vote = Vote.from_document(data, data["vote_id"])
+    if vote.timestamp:
+        vote.timestamp = datetime.datetime.fromisoformat(vote.timestamp)
+    return vote
+
+
+def _pid_running(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def _read_pending(path: str) -> dict[str, Vote]:
+    pending: dict[str, Vote] = {}
+    with open(path, encoding="utf-8") as spool_file:
+        for line in spool_file:
+            try:
+                entry = json.loads(line)
+            except json.JSONDecodeError:
+                # A torn last line from a crash mid-write; its vote was never accepted
+                continue
+            if "vote" in entry:
+                vote = _vote_from_json(entry["vote"])
+                pending[vote.vote_id] = vote
+            for vote_id in entry.get("ack", []):
+                pending.pop(vote_id, None)
+    return pending
+
+
+class VoteSpool:
+    """This process's spool file in `directory`."""
+
+    def __init__(self, directory: str):
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.path = os.path.join(directory, f"{_FILE_PREFIX}{os.getpid()}{_FILE_SUFFIX}")
+        self._pending: dict[str, Vote] = {}
+        self._lock = threading.Lock()
+        self._file = None
+
+    def recover(self) -> list[Vote]:
+        """Loads the pending votes of this process and of dead ones, oldest first.
+
+        The recovered votes are written to this process's file before any
+        other process's file is deleted, so they stay pending here until
+        acked and a crash during recovery loses nothing.
+        """
+        with self._lock:
+            claimed_paths = []
+            for path in sorted(glob.glob(os.path.join(self.directory, f"{_FILE_PREFIX}*{_FILE_SUFFIX}*"))):
+                if path.endswith(".tmp"):
+                    continue
+                if path != self.path:
+                    # votes-<pid>.jsonl, or a file <pid> claimed: votes-<pid>.jsonl.<orphan's name>
+                    owner = os.path.basename(path)[len(_FILE_PREFIX) :].split(".", 1)[0]
+                    if not owner.isdigit() or (int(owner) != os.getpid() and _pid_running(int(owner))):
+                        continue
+                    if not path.startswith(f"{self.path}."):
+                        # Claim the orphan; the rename fails if another process got it first
+                        claimed = f"{self.path}.{os.path.basename(path)[len(_FILE_PREFIX) :]}"
+                        try:
+                            os.rename(path, claimed)
+                        except FileNotFoundError:
+                            continue
+                        path = claimed
+                    claimed_paths.append(path)
+                elif not os.path.exists(path):
+                    continue
+                recovered = _read_pending(path)
+                if recovered:
+                    log(f"Recovered {len(recovered)} unsent votes from {path}", LogLevel.WARNING)
+                self._pending.update(recovered)
+            self._rewrite()
+            for path in claimed_paths:
+                os.remove(path)
+            return sorted(self._pending.values(), key=lambda vote: str(vote.timestamp))
+
+    def append(self, vote: Vote):
+        """Records a vote durably; returns once it is on disk."""
+        with self._lock:
+            self._pending[vote.vote_id] = vote
+            self._write({"vote": _vote_to_json(vote)}, sync=True)
+
+    def ack(self, vote_ids: list[str]):
+        """Marks votes as persisted, emptying the file once nothing is pending."""
+        with self._lock:
+            for vote_id in vote_ids:
+                self._pending.pop(vote_id, None)
+            if self._pending:
+                # A lost ack only means a harmless redelivery, so no fsync
+                self._write({"ack": list(vote_ids)}, sync=False)
+            else:
+                self._rewrite()
+
+    def pending_count(self) -> int:
+        with self._lock:
+            return len(self._pending)
+
+    def close(self):
+        with self._lock:
+            if self._file:
+                self._file.close()
+                self._file = None
+            if not self._pending and os.path.exists(self.path):
+                os.remove(self.path)
+
+    def _write(self, entry: dict, sync: bool):
+        if self._file is None:
+            self._file = open(self.path, "a", encoding="utf-8")
+        self._file.write(json.dumps(entry) + "\n")
+        self._file.flush()
+        if sync:
+            os.fsync(self._file.fileno())
+
+    def _rewrite(self):
+        """Replaces the file with just the pending votes."""
+        if self._file:
+            self._file.close()
+            self._file = None
+        temp_path = f"{self.path}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as temp_file:
+            for vote in self._pending.values():
+                temp_file.write(json.dumps({"vote": _vote_to_json(vote)}) + "\n")
+            temp_file.flush()
+            os.fsync(temp_file.fileno())
+        os.replace(temp_path, self.path)
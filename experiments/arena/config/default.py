@@ -46,6 +46,23 @@ class Default:
     DEFAULT_PROMPTS: str = os.environ.get("DEFAULT_PROMPTS", "prompts/imagen_prompts.json")
     DEFAULT_STUDY_NAME: str = os.environ.get("DEFAULT_STUDY_NAME", "live")
     ELO_K_FACTOR: int = int(os.environ.get("ELO_K_FACTOR", 32))
+    # Votes arriving within this window are applied in one transaction
+    ELO_BATCH_MAX_VOTES: int = int(os.environ.get("ELO_BATCH_MAX_VOTES", 200))
+    ELO_BATCH_MAX_DELAY_SECONDS: float = float(os.environ.get("ELO_BATCH_MAX_DELAY_SECONDS", 0.05))
+    # Leaderboard confidence intervals: bootstrap resamples, and how often they are recomputed
+    LEADERBOARD_BOOTSTRAP_ROUNDS: int = int(os.environ.get("LEADERBOARD_BOOTSTRAP_ROUNDS", 200))
+    LEADERBOARD_INTERVAL_SECONDS: float = float(os.environ.get("LEADERBOARD_INTERVAL_SECONDS", 300))
+    # Votes wait here until committed; each process spools to its own file.
+    # Only durable on a persistent volume used by a single host: /tmp on Cloud
+    # Run is in memory and lost with the instance. See the README.
+    VOTE_SPOOL_DIR: str = os.environ.get("VOTE_SPOOL_DIR", "/tmp/arena_vote_spool")
+    VOTE_DRAIN_TIMEOUT_SECONDS: float = float(os.environ.get("VOTE_DRAIN_TIMEOUT_SECONDS", 8))
+    # Matchups generated ahead per session, and the bounds on that work
+    ARENA_PREFETCH_DEPTH: int = int(os.environ.get("ARENA_PREFETCH_DEPTH", 2))
+    ARENA_PREFETCH_WORKERS: int = int(os.environ.get("ARENA_PREFETCH_WORKERS", 8))
+    ARENA_PREFETCH_MAX_SESSIONS: int = int(os.environ.get("ARENA_PREFETCH_MAX_SESSIONS", 50))
+    ARENA_PREFETCH_IDLE_SECONDS: float = float(os.environ.get("ARENA_PREFETCH_IDLE_SECONDS", 300))
+    STUDY_CATALOGUE_LOAD_TIMEOUT_SECONDS: float = float(os.environ.get("STUDY_CATALOGUE_LOAD_TIMEOUT_SECONDS", 60))
 
     # image models
     MODEL_IMAGEN2: str = "imagegeneration@006"
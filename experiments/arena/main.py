@@ -17,7 +17,7 @@ import mesop as me
 from state.state import AppState
 from components.page_scaffold import page_scaffold
 from pages.arena import arena_page_content
-from pages.leaderboard import leaderboard_page_content
+from pages.leaderboard import leaderboard_page_content, on_load_leaderboard
 from pages.history import history_page_content
 from pages.settings import settings_page_content
 
@@ -48,10 +48,16 @@ def home_page():
         arena_page_content(state)
 
 
+def on_load_leaderboard_page(e: me.LoadEvent):
+    """Leaderboard load event"""
+    on_load(e)
+    on_load_leaderboard(me.state(AppState).study)
+
+
 @me.page(
     path="/leaderboard",
     title="Arena - Leaderboard",
-    on_load=on_load,
+    on_load=on_load_leaderboard_page,
     security_policy=me.SecurityPolicy(dangerously_disable_trusted_types=True),
 )
 def leaderboard_page():
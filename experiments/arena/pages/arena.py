@@ -16,11 +16,14 @@ from dataclasses import field
 import random
 import logging
 import time
-from concurrent.futures import ThreadPoolExecutor, as_completed
+import uuid
+from concurrent.futures import ThreadPoolExecutor
 
 import mesop as me
 
+from common.matchups import Matchup, PrefetcherRegistry
 from common.metadata import update_elo_ratings
+from common.study_catalogue import get_study_catalogue
 from config.default import Default
 from prompts.utils import PromptManager
 from state.state import AppState
@@ -32,15 +35,20 @@ from models.gemini_model import (
     generate_content,
     generate_images,
 )
-from models.generate import images_from_flux, images_from_imagen, images_from_stable_diffusion, study_fetch
+from models.generate import images_from_flux, images_from_imagen, images_from_stable_diffusion
 
 
 # Initialize configuration
 client, model_id = ModelSetup.init()
 MODEL_ID = model_id
 config = Default()
-prompt_manager = PromptManager()
 logging.basicConfig(level=logging.DEBUG)
+matchup_prefetchers = PrefetcherRegistry(
+    depth=config.ARENA_PREFETCH_DEPTH,
+    workers=config.ARENA_PREFETCH_WORKERS,
+    max_sessions=config.ARENA_PREFETCH_MAX_SESSIONS,
+    idle_seconds=config.ARENA_PREFETCH_IDLE_SECONDS,
+)
 
 
 IMAGEN_MODELS = [config.MODEL_IMAGEN2, config.MODEL_IMAGEN3_FAST, config.MODEL_IMAGEN3, config.MODEL_IMAGEN32,]
@@ -65,141 +73,102 @@ class PageState:
     chosen_model: str = ""
     study: str = "live"
     study_models: list[str] = field(default_factory=list)
+    study_prompts_location: str = config.DEFAULT_PROMPTS
+    # Key of this session's matchup prefetch buffer
+    session_id: str = ""
     # pylint: disable=invalid-field-call
 
 
-def arena_images(input: str, study: str):
-    """Create images for arena comparison"""
-    state = me.state(PageState)
-    if input == "":  # handle condition where someone hits "random" but doesn't modify
-        if state.arena_prompt != "":
-            input = state.arena_prompt
-    state.arena_output.clear()
-
-    logging.info("BATTLE: %s vs. %s", state.arena_model1, state.arena_model2)
-
-    prompt = input
+def _submit_model_images(executor: ThreadPoolExecutor, model: str, prompt: str, aspect_ratio: str):
+    """Starts generating images with a live model; None if it can't be used."""
+    if model in IMAGEN_MODELS:
+        return executor.submit(images_from_imagen, model, prompt, aspect_ratio)
+    if model.startswith(config.MODEL_GEMINI2):
+        return executor.submit(generate_images, prompt)
+    if model.startswith(config.MODEL_FLUX1):
+        if config.MODEL_FLUX1_ENDPOINT_ID:
+            return executor.submit(images_from_flux, model, prompt, aspect_ratio)
+        logging.error("no endpoint defined for %s", model)
+    elif model.startswith(config.MODEL_STABLE_DIFFUSION):
+        if config.MODEL_STABLE_DIFFUSION_ENDPOINT_ID:
+            return executor.submit(images_from_stable_diffusion, model, prompt, aspect_ratio)
+        logging.error("no endpoint defined for %s", model)
+    return None
+
+
+def arena_images(model1: str, model2: str, prompt: str, aspect_ratio: str) -> list[str]:
+    """Create images for arena comparison with live models, model1's first.
+
+    Runs outside the request (matchups are prefetched), so it must not read
+    page state.
+    """
+    logging.info("BATTLE: %s vs. %s", model1, model2)
     logging.info("prompt: %s", prompt)
-    if state.image_negative_prompt_input:
-        logging.info("negative prompt: %s", state.image_negative_prompt_input)
-    
+
     with ThreadPoolExecutor() as executor:  # Create a thread pool
-        futures = []
-        if study == "live":
-            # model 1
-            if state.arena_model1 in IMAGEN_MODELS:
-                logging.info("model 1: %s", state.arena_model1)
-                futures.append(
-                    executor.submit(
-                        images_from_imagen,
-                        state.arena_model1,
-                        prompt,
-                        state.image_aspect_ratio,
-                    )
-                )
-            elif state.arena_model1.startswith(config.MODEL_GEMINI2):
-                logging.info("model 1: %s", state.arena_model1)
-                futures.append(
-                    executor.submit(
-                        generate_images,
-                        prompt,
-                    )
-                )
-            elif state.arena_model1.startswith(config.MODEL_FLUX1):
-                if config.MODEL_FLUX1_ENDPOINT_ID:
-                    logging.info("model 1: %s", state.arena_model1)
-                    futures.append(
-                        executor.submit(
-                            images_from_flux,
-                            state.arena_model1,
-                            prompt,
-                            state.image_aspect_ratio,
-                        )
-                    )
-                else:
-                    logging.error("no endpoint defined for %s", state.arena_model1)
-            elif state.arena_model1.startswith(config.MODEL_STABLE_DIFFUSION):
-                if config.MODEL_STABLE_DIFFUSION_ENDPOINT_ID:
-                    logging.info("model 1: %s", state.arena_model1)
-                    futures.append(
-                        executor.submit(
-                            images_from_stable_diffusion,
-                            state.arena_model1,
-                            prompt,
-                            state.image_aspect_ratio,
-                        )
-                    )
-                else:
-                    logging.error("no endpoint defined for %s", state.arena_model1)
-
-            # model 2
-            if state.arena_model2 in IMAGEN_MODELS:
-                logging.info("model 2: %s", state.arena_model2)
-                futures.append(
-                    executor.submit(
-                        images_from_imagen,
-                        state.arena_model2,
-                        prompt,
-                        state.image_aspect_ratio,
-                    )
-                )
-            elif state.arena_model2.startswith(config.MODEL_GEMINI2):
-                logging.info("model 2: %s", state.arena_model2)
-                futures.append(
-                    executor.submit(
-                        generate_images,
-                        prompt,
-                    )
-                )
-            elif state.arena_model2.startswith(config.MODEL_FLUX1):
-                if config.MODEL_FLUX1_ENDPOINT_ID:
-                    logging.info("model 2: %s", state.arena_model2)
-                    futures.append(
-                        executor.submit(
-                            images_from_flux,
-                            state.arena_model2,
-                            prompt,
-                            state.image_aspect_ratio,
-                        )
-                    )
-                else:
-                    logging.error("no endpoint defined for %s", state.arena_model2)
-            elif state.arena_model2.startswith(config.MODEL_STABLE_DIFFUSION):
-                if config.MODEL_STABLE_DIFFUSION_ENDPOINT_ID:
-                    logging.info("model 2: %s", state.arena_model2)
-                    futures.append(
-                        executor.submit(
-                            images_from_stable_diffusion,
-                            state.arena_model2,
-                            prompt,
-                            state.image_aspect_ratio,
-                        )
-                    )
-                else:
-                    logging.error("no endpoint defined for %s", state.arena_model2)
-        # Fetch images from study
-        else:
-            futures.extend([
-                executor.submit(
-                    study_fetch,
-                    state.arena_model1,
-                    prompt
-                ),
-                executor.submit(
-                    study_fetch,
-                    state.arena_model2,
-                    prompt
-                )
-            ])
-        
-        for future in as_completed(futures):  # Wait for tasks to complete
+        futures = [
+            _submit_model_images(executor, model, prompt, aspect_ratio)
+            for model in (model1, model2)
+        ]
+
+        images = []
+        for model, future in zip((model1, model2), futures):  # Keep the model order
+            if future is None:
+                continue
             try:
-                result = future.result()  # Get the result of each task
-                state.arena_output.extend(
-                    result
-                )  # Assuming images_from_imagen returns a list
+                images.extend(future.result())
             except Exception as e:
-                logging.error(f"Error during image generation: {e}")
+                logging.error(f"Error during image generation with {model}: {e}")
+        return images
+
+
+def study_matchup(study: str, models: tuple[str, ...], prompts: PromptManager) -> Matchup:
+    """A matchup from the study's pre-generated images.
+
+    Only prompts with images for both models are offered; an empty matchup
+    means no two of the study's models share a prompt.
+    """
+    catalogue = get_study_catalogue(
+        study,
+        models,
+        prompts.prompts.get("prompts", []),
+        prompts_location=prompts.prompts_location,
+    )
+    picked = catalogue.sample_matchup()
+    if picked is None:
+        logging.error("No prompt in study %s has images for two of %s", study, models)
+        return Matchup(prompt="", model1="", model2="")
+    prompt, model1, model2, image1, image2 = picked
+    logging.info("BATTLE: %s vs. %s", model1, model2)
+    return Matchup(prompt, model1, model2, [image1, image2])
+
+
+def _next_matchup(state: PageState) -> Matchup:
+    """The session's next prefetched matchup for its current study and models."""
+    if not state.session_id:
+        state.session_id = uuid.uuid4().hex
+    study = state.study
+    models = tuple(state.study_models)
+    aspect_ratio = state.image_aspect_ratio
+    prompts = PromptManager.for_location(state.study_prompts_location)
+
+    def make_matchup() -> Matchup:
+        if study != "live":
+            return study_matchup(study, models, prompts)
+        prompt = prompts.random_prompt()
+        model1, model2 = random.sample(models, 2)
+        return Matchup(prompt, model1, model2, arena_images(model1, model2, prompt, aspect_ratio))
+
+    signature = (study, models, aspect_ratio, prompts.prompts_location)
+    return matchup_prefetchers.next_matchup(state.session_id, signature, make_matchup)
+
+
+def _show_matchup(state: PageState, matchup: Matchup):
+    state.arena_prompt = matchup.prompt
+    state.arena_model1, state.arena_model2 = matchup.model1, matchup.model2
+    state.arena_output = list(matchup.images)
+    logging.info("%s vs. %s", state.arena_model1, state.arena_model2)
+
 
 def on_click_reload_arena(e: me.ClickEvent):  # pylint: disable=unused-argument
     """Reload arena handler"""
@@ -207,18 +176,14 @@ def on_click_reload_arena(e: me.ClickEvent):  # pylint: disable=unused-argument
     if state.study == "live":
         state.study_models = load_default_models()
 
-    state.arena_prompt = prompt_manager.random_prompt()
-
     state.arena_output.clear()
 
     state.is_loading = True
     yield
     print(f"Use {state.study_models}")
 
-    # get random images
-    state.arena_model1, state.arena_model2 = random.sample(state.study_models, 2)
-    logging.info("%s vs. %s", state.arena_model1, state.arena_model2)
-    arena_images(state.arena_prompt, state.study)
+    # next pair from the prefetch buffer
+    _show_matchup(state, _next_matchup(state))
 
     state.is_loading = False
     yield
@@ -231,18 +196,13 @@ def on_click_arena_vote(e: me.ClickEvent):
     logging.info("user preferred %s: %s", e.key, model_name)
     state.chosen_model = model_name
     yield
-    # update the elo ratings
+    # queue the vote; ratings are updated in the background
     update_elo_ratings(state.arena_model1, state.arena_model2, model_name, state.arena_output, state.arena_prompt, state.study)
     yield
     time.sleep(int(Default.SHOW_RESULTS_PAUSE_TIME))
-    yield
-    # clear the output and reload
-    state.arena_output.clear()
+    # show the next pair, usually prefetched already
     state.chosen_model = ""
-    state.arena_prompt = prompt_manager.random_prompt()
-    state.arena_model1, state.arena_model2 = random.sample(state.study_models, 2)
-    yield
-    arena_images(state.arena_prompt, state.study)
+    _show_matchup(state, _next_matchup(state))
     yield
 
 
@@ -268,8 +228,8 @@ def arena_page_content(app_state: me.state):
     """Arena Mesop Page"""
 
     page_state = me.state(PageState)
-    prompt_manager.prompts_location = app_state.study_prompts_location
     page_state.study = app_state.study
+    page_state.study_prompts_location = app_state.study_prompts_location
     if page_state.study == "live":
         app_state.study_models = load_default_models()
     page_state.study_models = app_state.study_models
@@ -279,9 +239,7 @@ def arena_page_content(app_state: me.state):
     if not app_state.welcome_message:
         app_state.welcome_message = generate_welcome()
     if not page_state.arena_prompt:
-        page_state.arena_prompt = prompt_manager.random_prompt()
-        page_state.arena_model1, page_state.arena_model2 = random.sample(app_state.study_models, 2)
-        arena_images(page_state.arena_prompt, app_state.study)
+        _show_matchup(page_state, _next_matchup(page_state))
 
     with me.box(
         style=me.Style(
@@ -18,7 +18,18 @@ from components.page_scaffold import (
     page_scaffold,
     page_frame,
 )
-from common.metadata import get_elo_ratings
+from common.metadata import leaderboard
+
+
+def on_load_leaderboard(study: str):
+    """Loads the study's leaderboard once, so rendering only reads memory."""
+    leaderboard.load(study)
+
+
+def _interval(row) -> str:
+    if row.lower is None:
+        return "-"
+    return f"{row.lower:.0f} - {row.upper:.0f}"
 
 
 def leaderboard_page_content(app_state: me.state):
@@ -27,18 +38,37 @@ def leaderboard_page_content(app_state: me.state):
         with page_frame():  # pylint: disable=not-context-manager
             header("Leaderboard", "leaderboard")
 
-            df = get_elo_ratings(app_state.study)
+            rows = leaderboard.rows(app_state.study)
 
             with me.box(
                 style=me.Style(align_items="center", display="flex", justify_content="space-evenly")
             ):
                 with me.box(style=me.Style(padding=me.Padding.all(10), width=500)):
-                    me.table(
-                        df,
-                        #on_click=on_click,
-                        header=me.TableHeader(sticky=True),
-                        columns={
-                            "NA": me.TableColumn(sticky=True),
-                            "Index": me.TableColumn(sticky=True),
-                        },
-                    )
+                    if not rows:
+                        me.text("No ratings yet for this study.")
+                    with me.box(style=_TABLE_STYLE):
+                        for heading in ("Rank", "Model", "ELO Rating", "95% CI"):
+                            me.text(heading, style=_HEADER_STYLE)
+                        for row in rows:
+                            me.text(str(row.rank), style=_CELL_STYLE)
+                            me.text(row.model, style=_CELL_STYLE)
+                            me.text(f"{row.rating:.2f}", style=_CELL_STYLE)
+                            me.text(_interval(row), style=_CELL_STYLE)
+
+
+_TABLE_STYLE = me.Style(
+    display="grid",
+    grid_template_columns="auto 1fr auto auto",
+    column_gap=24,
+)
+
+_HEADER_STYLE = me.Style(
+    font_weight="bold",
+    padding=me.Padding.symmetric(vertical=8),
+    border=me.Border(bottom=me.BorderSide(width=1, style="solid", color=me.theme_var("outline-variant"))),
+)
+
+_CELL_STYLE = me.Style(
+    padding=me.Padding.symmetric(vertical=8),
+    border=me.Border(bottom=me.BorderSide(width=1, style="solid", color=me.theme_var("outline-variant"))),
+)
@@ -15,6 +15,7 @@
 from __future__ import annotations
 import json
 import random
+import threading
 
 from google.api_core import exceptions as gapic_exceptions
 
@@ -24,28 +25,44 @@ from config.default import Default
 config = Default()
 
 class PromptManager:
-    """Singleton class to manage and provide image generation prompts"""
+    """Manages and provides the image generation prompts from one location.
+
+    `PromptManager()` is the singleton for the default prompts and
+    `for_location` returns the manager for a study's prompts. A manager's
+    location never changes, so it can be shared between sessions and threads.
+    """
     _instance = None
+    _by_location: dict[str, PromptManager] = {}
+    _by_location_lock = threading.Lock()
 
     _prompts_location: str = config.DEFAULT_PROMPTS
-    
+
     @property
     def prompts_location(self) -> str:
         return self._prompts_location
 
-    @prompts_location.setter
-    def prompts_location(self, new_location: str):
-        if self._prompts_location == new_location:
-            return
-        self._prompts_location = new_location
-        self._instance._load_prompts()
-
     def __new__(cls):
         if cls._instance is None:
             cls._instance = super(PromptManager, cls).__new__(cls)
             cls._instance._load_prompts()
         return cls._instance
 
+    @classmethod
+    def for_location(cls, location: str) -> PromptManager:
+        """The manager for the prompts at `location`, loaded on first use."""
+        if location == config.DEFAULT_PROMPTS:
+            return cls()
+        with cls._by_location_lock:
+            manager = cls._by_location.get(location)
+        if manager is not None:
+            return manager
+        # Loaded outside the lock so a slow download holds up no other location
+        manager = super(PromptManager, cls).__new__(cls)
+        manager._prompts_location = location
+        manager._load_prompts()
+        with cls._by_location_lock:
+            return cls._by_location.setdefault(location, manager)
+
     def _load_prompts(self):
         """Loads prompts from the GCS blob into memory. Falls back to default prompt list."""
         self.prompts = {"prompts": []} #initialize to empty list to avoid errors.
@@ -60,7 +77,7 @@ class PromptManager:
 
         except gapic_exceptions.NotFound:
             print("Error: Requested blob not found, loading the default prompt list.")
-            self.prompts_location = config.DEFAULT_PROMPTS
+            self.prompts = PromptManager().prompts
 
         except gapic_exceptions.Unauthorized:
             print("Error: Unauthorized to access requested blob.")
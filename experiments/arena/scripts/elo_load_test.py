@@ -0,0 +1,175 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Load test for the arena rating engine.
+
+Simulates concurrent voters against the rating engine and checks that every
+vote was applied exactly once and that replaying the vote log reproduces the
+final ratings, i.e. that no concurrent update was lost.
+
+By default it runs against an in-memory store with a simulated commit
+latency. With --firestore it uses the Firestore store, e.g. against the
+emulator (set FIRESTORE_EMULATOR_HOST). With --spool_dir voters do not wait
+for their votes to commit, as in the app, and --fail_rate makes that share
+of commits fail to exercise retries:
+
+    python -m scripts.elo_load_test --voters=300 --votes_per_voter=5
+    python -m scripts.elo_load_test --spool_dir=/tmp/spool --fail_rate=0.2
+    FIRESTORE_EMULATOR_HOST=localhost:8080 python -m scripts.elo_load_test --firestore
+"""
+import argparse
+import concurrent.futures
+import random
+import statistics
+import sys
+import time
+import uuid
+
+import numpy as np
+
+from common.ratings import (
+    InMemoryRatingStore,
+    RatingEngine,
+    Vote,
+    sequential_elo,
+    votes_to_arrays,
+)
+from common.vote_spool import VoteSpool
+from utils.logger import LogLevel, log
+
+
+class FlakyRatingStore(InMemoryRatingStore):
+    """An in-memory store whose commits fail at random."""
+
+    def __init__(self, commit_latency: float, fail_rate: float, seed: int):
+        super().__init__(commit_latency=commit_latency)
+        self._fail_rate = fail_rate
+        self._rng = random.Random(seed)
+
+    def commit_votes(self, study, votes, k_factor):
+        if self._rng.random() < self._fail_rate:
+            raise RuntimeError("simulated commit failure")
+        return super().commit_votes(study, votes, k_factor)
+
+
+def _store(firestore: bool, commit_latency: float, fail_rate: float, seed: int):
+    if not firestore:
+        if fail_rate:
+            return FlakyRatingStore(commit_latency, fail_rate, seed)
+        return InMemoryRatingStore(commit_latency=commit_latency)
+    from common.ratings import FirestoreRatingStore
+    from config.default import Default
+    from config.firebase_config import FirebaseClient
+
+    config = Default()
+    db = FirebaseClient(database_id=config.IMAGE_FIREBASE_DB).get_client()
+    return FirestoreRatingStore(db, config.IMAGE_RATINGS_COLLECTION_NAME)
+
+
+def main(
+    voters: int = 300,
+    votes_per_voter: int = 5,
+    models: int = 8,
+    k_factor: float = 32,
+    commit_latency: float = 0.02,
+    max_batch: int = 200,
+    max_delay: float = 0.05,
+    firestore: bool = False,
+    study: str = "",
+    seed: int = 0,
+    spool_dir: str = "",
+    fail_rate: float = 0.0,
+):
+    """Runs `voters` concurrent voters, each casting `votes_per_voter` votes."""
+    study = study or f"load_test_{uuid.uuid4().hex[:8]}"
+    store = _store(firestore, commit_latency, fail_rate, seed)
+    engine = RatingEngine(
+        store,
+        k_factor=k_factor,
+        max_batch=max_batch,
+        max_delay=max_delay,
+        spool=VoteSpool(spool_dir) if spool_dir else None,
+        max_retry_delay=1.0,
+    )
+    model_names = [f"model_{i}" for i in range(models)]
+    # Hidden strengths, so the recovered ordering can be sanity-checked too
+    strengths = {name: i for i, name in enumerate(model_names)}
+
+    def voter(voter_id: int) -> list[float]:
+        rng = random.Random(seed * 100003 + voter_id)
+        latencies = []
+        for _ in range(votes_per_voter):
+            model1, model2 = rng.sample(model_names, 2)
+            p_model1 = 1 / (1 + 10 ** ((strengths[model2] - strengths[model1]) / 4))
+            winner = model1 if rng.random() < p_model1 else model2
+            vote = Vote(study=study, model1=model1, model2=model2, winner=winner, prompt="load test")
+            started = time.perf_counter()
+            if spool_dir:
+                engine.submit(vote)
+            else:
+                engine.record_vote(vote)
+            latencies.append(time.perf_counter() - started)
+        return latencies
+
+    started = time.perf_counter()
+    with concurrent.futures.ThreadPoolExecutor(max_workers=voters) as executor:
+        latencies = [
+            latency for result in executor.map(voter, range(voters)) for latency in result
+        ]
+    elapsed = time.perf_counter() - started
+    if spool_dir:
+        engine.close()
+        log(f"Write-behind drained {voters * votes_per_voter} votes in {time.perf_counter() - started:.2f}s")
+
+    total = voters * votes_per_voter
+    vote_log = store.list_votes(study)
+    ratings = store.get_ratings(study)
+    names, first, second, scores = votes_to_arrays(vote_log)
+    replayed = dict(zip(names, sequential_elo(first, second, scores, len(names), k_factor)))
+    max_drift = max(abs(replayed[name] - ratings[name]) for name in names)
+    sequences = sorted(vote.sequence for vote in vote_log)
+
+    log(f"{total} votes from {voters} voters in {elapsed:.2f}s ({total / elapsed:.0f} votes/s)")
+    log(
+        f"Vote latency p50 {statistics.median(latencies) * 1000:.0f} ms, "
+        f"p95 {np.percentile(latencies, 95) * 1000:.0f} ms"
+    )
+    log(f"Final ratings: {dict(sorted(ratings.items(), key=lambda item: -item[1]))}")
+    ok = True
+    if len(vote_log) != total or sequences != list(range(1, total + 1)):
+        log(f"Vote log has {len(vote_log)} votes, expected {total} with sequence 1..{total}", LogLevel.ERROR)
+        ok = False
+    if max_drift > 0.05:
+        log(f"Replaying the vote log differs from the stored ratings by {max_drift:.2f}", LogLevel.ERROR)
+        ok = False
+    if ok:
+        log("Every vote was applied exactly once and the vote log replays to the stored ratings.")
+    return ok
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Load test for the arena rating engine.")
+    parser.add_argument("--voters", type=int, default=300)
+    parser.add_argument("--votes_per_voter", type=int, default=5)
+    parser.add_argument("--models", type=int, default=8)
+    parser.add_argument("--k_factor", type=float, default=32)
+    parser.add_argument("--commit_latency", type=float, default=0.02, help="simulated seconds per in-memory commit")
+    parser.add_argument("--max_batch", type=int, default=200)
+    parser.add_argument("--max_delay", type=float, default=0.05)
+    parser.add_argument("--firestore", action="store_true", help="use the Firestore store instead of the in-memory one")
+    parser.add_argument("--study", default="", help="defaults to a new load_test_* study")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--spool_dir", default="", help="spool votes here and do not wait for them to commit")
+    parser.add_argument("--fail_rate", type=float, default=0.0, help="share of in-memory commits that fail")
+    if not main(**vars(parser.parse_args())):
+        sys.exit(1)
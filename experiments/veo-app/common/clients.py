@@ -0,0 +1,114 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Process-wide registry of Google Cloud and GenAI clients.
+
+Clients are created lazily on first use, keyed by (service, project,
+location), and shared by every request thread: the GenAI (httpx) and
+PredictionService (gRPC) clients are safe to share, and the storage client's
+HTTP session is given a connection pool sized for concurrent uploads.
+`client_creations()` reports how many clients of each service have been
+built, which should stay at one per key however many requests are served.
+"""
+
+import threading
+from collections import Counter
+from typing import Any, Callable, Optional
+
+import requests
+from google import genai
+from google.cloud import aiplatform, storage
+
+from config.default import Default
+
+cfg = Default()
+
+_clients: dict[tuple, Any] = {}
+_buckets: dict[tuple, storage.Bucket] = {}
+_creations: Counter = Counter()
+_lock = threading.Lock()
+
+
+def _get_or_create(key: tuple, factory: Callable[[], Any]) -> Any:
+    client = _clients.get(key)
+    if client is not None:
+        return client
+    with _lock:
+        client = _clients.get(key)
+        if client is None:
+            print(f"Creating {key[0]} client for {key[1:]}")
+            client = factory()
+            _clients[key] = client
+            _creations[key[0]] += 1
+        return client
+
+
+def get_genai_client(project: Optional[str] = None, location: Optional[str] = None) -> genai.Client:
+    """The shared Vertex AI GenAI client for a project and location."""
+    project = project or cfg.PROJECT_ID
+    location = location or cfg.LOCATION
+    if not project or not location:
+        raise ValueError("Project ID and Location must be set for the GenAI client.")
+    return _get_or_create(
+        ("genai", project, location),
+        lambda: genai.Client(vertexai=cfg.INIT_VERTEX, project=project, location=location),
+    )
+
+
+def get_prediction_client(location: Optional[str] = None) -> aiplatform.gapic.PredictionServiceClient:
+    """The shared regional Vertex AI PredictionService client."""
+    location = location or cfg.LOCATION
+    return _get_or_create(
+        ("prediction", None, location),
+        lambda: aiplatform.gapic.PredictionServiceClient(
+            client_options={"api_endpoint": f"{location}-aiplatform.googleapis.com"}
+        ),
+    )
+
+
+def _create_storage_client(project: Optional[str]) -> storage.Client:
+    client = storage.Client(project=project)
+    adapter = requests.adapters.HTTPAdapter(
+        pool_connections=cfg.STORAGE_MAX_CONNECTIONS,
+        pool_maxsize=cfg.STORAGE_MAX_CONNECTIONS,
+    )
+    # Connections are reused across threads instead of the default pool of 10
+    client._http.mount("https://", adapter)  # pylint: disable=protected-access
+    return client
+
+
+def get_storage_client(project: Optional[str] = None) -> storage.Client:
+    """The shared Cloud Storage client for a project."""
+    project = project or cfg.PROJECT_ID
+    return _get_or_create(("storage", project, None), lambda: _create_storage_client(project))
+
+
+def get_bucket(bucket_name: str, project: Optional[str] = None) -> storage.Bucket:
+    """A bucket handle on the shared storage client.
+
+    Uses `client.bucket`, which makes no API call, rather than `get_bucket`,
+    which fetches the bucket's metadata first.
+    """
+    project = project or cfg.PROJECT_ID
+    key = (project, bucket_name)
+    bucket = _buckets.get(key)
+    if bucket is None:
+        bucket = get_storage_client(project).bucket(bucket_name)
+        _buckets[key] = bucket
+    return bucket
+
+
+def client_creations() -> dict[str, int]:
+    """Number of clients created per service since the process started."""
+    with _lock:
+        return dict(_creations)
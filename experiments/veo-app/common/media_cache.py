@@ -0,0 +1,147 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""In-process read-through cache for library reads.
+
+Entries expire after a TTL and the least recently used ones are evicted once
+the cache's estimated size passes its byte budget. Writes made by this
+process invalidate affected entries straight away; writes from other
+instances are picked up when entries expire.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import asdict, dataclass
+from typing import Any, Callable, Hashable, Optional
+
+
+@dataclass
+class CacheStats:
+    """Counters for a TTLCache since it was created."""
+
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+    entries: int = 0
+    size_bytes: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def to_dict(self) -> dict:
+        return {**asdict(self), "hit_rate": self.hit_rate}
+
+
+class TTLCache:
+    """A thread-safe LRU cache with a TTL and a byte budget.
+
+    `size_of(value)` estimates an entry's memory use; values larger than the
+    whole budget are not cached. `invalidate` and `clear` bump a generation
+    counter, so a value that `get_or_load` loaded before one of them is not
+    cached.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        ttl_seconds: float,
+        max_bytes: int,
+        size_of: Callable[[Any], int],
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.name = name
+        self._ttl = ttl_seconds
+        self._max_bytes = max_bytes
+        self._size_of = size_of
+        self._clock = clock
+        # key -> (expires_at, size, value)
+        self._entries: OrderedDict[Hashable, tuple[float, int, Any]] = OrderedDict()
+        self._size = 0
+        self._stats = CacheStats()
+        self._generation = 0
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """The cached value, or None on a miss or if it has expired."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > self._clock():
+                self._entries.move_to_end(key)
+                self._stats.hits += 1
+                return entry[2]
+            if entry is not None:
+                self._remove(key)
+            self._stats.misses += 1
+            return None
+
+    def put(self, key: Hashable, value: Any):
+        self._put(key, value)
+
+    def _put(self, key: Hashable, value: Any, generation: Optional[int] = None):
+        if self._ttl <= 0:
+            return
+        size = self._size_of(value)
+        if size > self._max_bytes:
+            return
+        with self._lock:
+            if generation is not None and generation != self._generation:
+                # Invalidated while loading; the value may predate the write
+                return
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (self._clock() + self._ttl, size, value)
+            self._size += size
+            while self._size > self._max_bytes:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self._stats.evictions += 1
+
+    def get_or_load(self, key: Hashable, load: Callable[[], Any]) -> Any:
+        """Read-through: the cached value, or load() cached if it isn't None."""
+        with self._lock:
+            generation = self._generation
+        value = self.get(key)
+        if value is None:
+            value = load()
+            if value is not None:
+                self._put(key, value, generation)
+        return value
+
+    def invalidate(self, key: Hashable):
+        with self._lock:
+            self._generation += 1
+            if key in self._entries:
+                self._remove(key)
+
+    def clear(self):
+        with self._lock:
+            self._generation += 1
+            self._entries.clear()
+            self._size = 0
+
+    def stats(self) -> CacheStats:
+        with self._lock:
+            return CacheStats(
+                hits=self._stats.hits,
+                misses=self._stats.misses,
+                evictions=self._stats.evictions,
+                entries=len(self._entries),
+                size_bytes=self._size,
+            )
+
+    def _remove(self, key: Hashable):
+        _, size, _ = self._entries.pop(key)
+        self._size -= size
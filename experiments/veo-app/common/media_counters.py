@@ -0,0 +1,177 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Sharded media counters for the library.
+
+Each counter is a document in the counters collection with a `shards`
+subcollection; writes increment one random shard so concurrent writers rarely
+contend on the same document, and reads sum a fixed number of shards. A
+counter only answers reads once `rebuild` has seeded it from the media
+collection, so counts stay correct for documents written before counters
+existed.
+"""
+
+import datetime
+import random
+import threading
+import time
+from typing import Callable, Iterable, Optional
+
+from google.cloud import firestore
+
+# Library type filter values that have their own counters
+COUNTED_CATEGORIES = ("videos", "images", "music")
+
+
+def counter_ids(media_category: Optional[str], user_email: Optional[str]) -> list[str]:
+    """IDs of every counter a media item with these fields contributes to."""
+    ids = ["all"]
+    if media_category:
+        ids.append(f"type:{media_category}")
+    if user_email:
+        user = user_email.replace("/", "%2F")  # "/" is not allowed in document IDs
+        ids.append(f"user:{user}")
+        if media_category:
+            ids.append(f"user:{user}:type:{media_category}")
+    return ids
+
+
+def _filter_counter_ids(type_filters: Optional[list[str]], user_email: Optional[str]) -> Optional[list[str]]:
+    """Counters whose sum is the count for a library filter, or None if not countable."""
+    if not type_filters or "all" in type_filters:
+        return [counter_ids(None, user_email)[-1]]
+    categories = set(type_filters)
+    if not categories.issubset(COUNTED_CATEGORIES):
+        return None
+    return [counter_ids(category, user_email)[-1] for category in sorted(categories)]
+
+
+class MediaCounters:
+    """Per-type and per-user media counts with an in-process TTL cache."""
+
+    def __init__(
+        self,
+        db,
+        collection_name: str,
+        num_shards: int = 10,
+        cache_ttl_seconds: float = 60.0,
+    ):
+        self._db = db
+        self._collection_name = collection_name
+        self._num_shards = num_shards
+        self._cache_ttl_seconds = cache_ttl_seconds
+        # cache key -> (expires_at, count)
+        self._cache: dict[tuple, tuple[float, int]] = {}
+        self._lock = threading.Lock()
+
+    def _counter_ref(self, counter_id: str):
+        return self._db.collection(self._collection_name).document(counter_id)
+
+    def add_increments(self, batch, media_category: Optional[str], user_email: Optional[str], amount: int = 1):
+        """Adds shard increments for one new media item to a write batch.
+
+        Committing them in the same batch as the media document keeps the
+        counters in step with the collection.
+        """
+        shard_id = str(random.randrange(self._num_shards))
+        for counter_id in counter_ids(media_category, user_email):
+            shard_ref = self._counter_ref(counter_id).collection("shards").document(shard_id)
+            batch.set(shard_ref, {"count": firestore.Increment(amount)}, merge=True)
+
+    def invalidate(self):
+        """Drops cached counts, e.g. after this process added media."""
+        with self._lock:
+            self._cache.clear()
+
+    def _read_counter(self, counter_id: str) -> Optional[int]:
+        """Sum of a seeded counter's shards, or None if it has not been seeded."""
+        counter_ref = self._counter_ref(counter_id)
+        refs = [counter_ref] + [
+            counter_ref.collection("shards").document(str(i))
+            for i in range(self._num_shards)
+        ]
+        total = 0
+        seeded = False
+        for snapshot in self._db.get_all(refs):
+            if not snapshot.exists:
+                continue
+            data = snapshot.to_dict() or {}
+            if snapshot.reference.path == counter_ref.path:
+                seeded = bool(data.get("seeded_at"))
+            else:
+                total += int(data.get("count", 0))
+        return total if seeded else None
+
+    def count(
+        self,
+        type_filters: Optional[list[str]],
+        error_filter: str,
+        user_email: Optional[str],
+        fallback: Callable[[], int],
+    ) -> int:
+        """Count for a library filter.
+
+        Served from the cache, then from counters when the filter has them,
+        and otherwise from `fallback` (an aggregation query).
+        """
+        key = (tuple(sorted(type_filters or ["all"])), error_filter, user_email)
+        now = time.monotonic()
+        with self._lock:
+            cached = self._cache.get(key)
+        if cached and cached[0] > now:
+            return cached[1]
+
+        value = None
+        ids = _filter_counter_ids(type_filters, user_email) if error_filter == "all" else None
+        if ids:
+            try:
+                counts = [self._read_counter(counter_id) for counter_id in ids]
+                if all(c is not None for c in counts):
+                    value = sum(counts)
+            except Exception as e:
+                print(f"Error reading media counters: {e}")
+        if value is None:
+            value = fallback()
+
+        with self._lock:
+            self._cache[key] = (now + self._cache_ttl_seconds, value)
+        return value
+
+    def rebuild(self, items: Iterable[tuple[Optional[str], Optional[str]]]) -> int:
+        """Resets and seeds every counter from (media_category, user_email) pairs.
+
+        Run once after deploying counters (and any time they are suspected to
+        have drifted) while writes are quiet. Returns the number of counters written.
+        """
+        totals: dict[str, int] = {}
+        for media_category, user_email in items:
+            for counter_id in counter_ids(media_category, user_email):
+                totals[counter_id] = totals.get(counter_id, 0) + 1
+        for category in COUNTED_CATEGORIES:
+            totals.setdefault(f"type:{category}", 0)
+        totals.setdefault("all", 0)
+
+        seeded_at = datetime.datetime.now(datetime.timezone.utc)
+        for counter_id, total in totals.items():
+            counter_ref = self._counter_ref(counter_id)
+            batch = self._db.batch()
+            batch.set(counter_ref, {"seeded_at": seeded_at})
+            for i in range(self._num_shards):
+                batch.set(
+                    counter_ref.collection("shards").document(str(i)),
+                    {"count": total if i == 0 else 0},
+                )
+            batch.commit()
+        self.invalidate()
+        print(f"Seeded {len(totals)} media counters.")
+        return len(totals)
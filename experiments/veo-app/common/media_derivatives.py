@@ -0,0 +1,144 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Small WebP previews of library media for grids and choosers.
+
+Images get a downscaled thumbnail, videos a poster of their first frame and
+audio a waveform image. Previews are stored next to the originals under
+`thumbnails/`, so a grid tile loads a few kilobytes instead of the original.
+"""
+
+import io
+import os
+import tempfile
+import wave
+from typing import Optional
+
+import mediapy
+import numpy as np
+from PIL import Image, ImageDraw
+
+from common.storage import GCSUpload, download_from_gcs, store_many_to_gcs
+from config.default import Default
+
+cfg = Default()
+
+THUMBNAIL_FOLDER = "thumbnails"
+THUMBNAIL_MIME_TYPE = "image/webp"
+
+
+def _to_webp(image: Image.Image, size: int) -> bytes:
+    image = image.copy()
+    image.thumbnail((size, size))
+    if image.mode not in ("RGB", "RGBA"):
+        image = image.convert("RGBA" if "A" in image.getbands() else "RGB")
+    output = io.BytesIO()
+    image.save(output, format="WEBP", quality=cfg.THUMBNAIL_WEBP_QUALITY)
+    return output.getvalue()
+
+
+def image_thumbnail(image_bytes: bytes, size: Optional[int] = None) -> bytes:
+    """A WebP thumbnail no larger than size x size."""
+    with Image.open(io.BytesIO(image_bytes)) as image:
+        return _to_webp(image, size or cfg.THUMBNAIL_SIZE)
+
+
+def video_poster(video_bytes: bytes, size: Optional[int] = None) -> bytes:
+    """A WebP thumbnail of the video's first frame."""
+    # mediapy reads through ffmpeg, which needs a file
+    with tempfile.NamedTemporaryFile(suffix=".mp4") as video_file:
+        video_file.write(video_bytes)
+        video_file.flush()
+        with mediapy.VideoReader(video_file.name) as reader:
+            first_frame = next(iter(reader))
+    return _to_webp(Image.fromarray(first_frame), size or cfg.THUMBNAIL_SIZE)
+
+
+def waveform_image(wav_bytes: bytes, size: Optional[int] = None) -> bytes:
+    """A WebP image of the audio's waveform, size pixels wide."""
+    width = size or cfg.THUMBNAIL_SIZE
+    height = width // 2
+    with wave.open(io.BytesIO(wav_bytes)) as wav:
+        sample_width = wav.getsampwidth()
+        channels = wav.getnchannels()
+        frames = wav.readframes(wav.getnframes())
+    dtype = {1: np.uint8, 2: np.int16, 4: np.int32}[sample_width]
+    samples = np.frombuffer(frames, dtype=dtype).astype(np.float32)
+    if sample_width == 1:
+        samples -= 128
+    samples = np.abs(samples.reshape(-1, channels)).max(axis=1)
+
+    # Peak amplitude per pixel column
+    columns = np.array_split(samples, width) if len(samples) >= width else [samples]
+    peaks = np.array([column.max() if len(column) else 0.0 for column in columns])
+    if peaks.max() > 0:
+        peaks = peaks / peaks.max()
+
+    image = Image.new("RGB", (width, height), (32, 33, 36))
+    draw = ImageDraw.Draw(image)
+    middle = height / 2
+    for x, peak in enumerate(peaks):
+        half = max(1.0, peak * (middle - 2))
+        draw.line([(x, middle - half), (x, middle + half)], fill=(138, 180, 248))
+    return _to_webp(image, width)
+
+
+def _preview_bytes(mime_type: str, contents: bytes) -> bytes:
+    if mime_type.startswith("video/"):
+        return video_poster(contents)
+    if mime_type.startswith("audio/"):
+        return waveform_image(contents)
+    return image_thumbnail(contents)
+
+
+def _thumbnail_location(source_uri: str) -> tuple[str, str, str]:
+    """(bucket, folder, file name) of the preview for a gs:// source URI."""
+    bucket_name, _, path = source_uri.removeprefix("gs://").partition("/")
+    directory, file_name = os.path.split(path)
+    folder = f"{THUMBNAIL_FOLDER}/{directory}" if directory else THUMBNAIL_FOLDER
+    return bucket_name, folder, f"{os.path.splitext(file_name)[0]}.webp"
+
+
+def create_thumbnails(mime_type: Optional[str], source_uris: list[str]) -> list[str]:
+    """Creates previews for media and returns their URIs, aligned with source_uris.
+
+    A source that cannot be previewed (unsupported format, no ffmpeg for
+    video) gets an empty string, and grids fall back to the original.
+    """
+    if not mime_type or not mime_type.startswith(("image/", "video/", "audio/")):
+        return []
+    thumbnail_uris = [""] * len(source_uris)
+    uploads: dict[str, list[tuple[int, GCSUpload]]] = {}
+    for i, source_uri in enumerate(source_uris):
+        if not source_uri or not source_uri.startswith("gs://"):
+            continue
+        try:
+            preview = _preview_bytes(mime_type, download_from_gcs(source_uri))
+        except Exception as e:
+            print(f"Could not create a preview of {source_uri}: {e}")
+            continue
+        bucket_name, folder, file_name = _thumbnail_location(source_uri)
+        uploads.setdefault(bucket_name, []).append(
+            (i, GCSUpload(folder, file_name, THUMBNAIL_MIME_TYPE, preview))
+        )
+    for bucket_name, bucket_uploads in uploads.items():
+        try:
+            results = store_many_to_gcs(
+                [upload for _, upload in bucket_uploads], bucket_name=bucket_name
+            )
+        except Exception as e:
+            print(f"Could not upload previews to {bucket_name}: {e}")
+            continue
+        for (i, _), result in zip(bucket_uploads, results):
+            thumbnail_uris[i] = result.uri
+    return thumbnail_uris
@@ -13,7 +13,9 @@
 # limitations under the License.
 """metadata implementation"""
 
+import concurrent.futures
 import datetime
+import itertools
 
 # from models.model_setup import ModelSetup
 from dataclasses import dataclass, field
@@ -22,6 +24,9 @@ from typing import Dict, List, Optional
 import pandas as pd
 from google.cloud import firestore
 
+from common.media_cache import TTLCache
+from common.media_counters import MediaCounters
+from common.media_derivatives import create_thumbnails
 from config.default import Default
 from config.firebase_config import FirebaseClient
 
@@ -30,6 +35,45 @@ from config.firebase_config import FirebaseClient
 # MODEL_ID = model_id
 config = Default()
 db = FirebaseClient(database_id=config.GENMEDIA_FIREBASE_DB).get_client()
+media_counters = MediaCounters(
+    db,
+    config.GENMEDIA_COUNTERS_COLLECTION_NAME,
+    num_shards=config.MEDIA_COUNTER_SHARDS,
+    cache_ttl_seconds=config.MEDIA_COUNT_CACHE_SECONDS,
+)
+
+def _approx_size(value) -> int:
+    """Rough memory use of a cached MediaItem or MediaPage, in bytes."""
+    if isinstance(value, MediaPage):
+        return 64 + sum(_approx_size(item) for item in value.items)
+    return len(repr(value)) + len(repr(getattr(value, "raw_data", None)))
+
+
+# Read-through caches for deep links and library pages. Pages are keyed by
+# their filters and cursor; any media write from this process clears them.
+media_item_cache = TTLCache(
+    "media_items",
+    ttl_seconds=config.MEDIA_CACHE_TTL_SECONDS,
+    max_bytes=config.MEDIA_CACHE_MAX_BYTES,
+    size_of=_approx_size,
+)
+media_page_cache = TTLCache(
+    "media_pages",
+    ttl_seconds=config.MEDIA_CACHE_TTL_SECONDS,
+    max_bytes=config.MEDIA_CACHE_MAX_BYTES,
+    size_of=_approx_size,
+)
+# Previews are made after the document is written, off the request thread
+_thumbnail_executor = concurrent.futures.ThreadPoolExecutor(
+    max_workers=config.THUMBNAIL_WORKERS, thread_name_prefix="thumbnails"
+)
+
+# Library type filter value -> mime type prefix
+MEDIA_CATEGORY_MIME_PREFIXES = {
+    "videos": "video/",
+    "images": "image/",
+    "music": "audio/",
+}
 
 
 @dataclass
@@ -53,6 +97,7 @@ class MediaItem:
     gcsuri: Optional[str] = None  # For single file media (video, audio) -> gs://bucket/path
     gcs_uris: List[str] = field(default_factory=list)  # For multi-file media (e.g., multiple images) -> list of gs://bucket/path
     source_images_gcs: List[str] = field(default_factory=list) # For multi-file input media (e.g., recontext) -> list of gs://bucket/path
+    thumbnail_uris: List[str] = field(default_factory=list) # WebP previews aligned with media_source_uris(); "" where none could be made
 
     # Video specific (some may also apply to Image/Audio)
     aspect: Optional[str] = None  # e.g., "16:9", "1:1" (also for Image)
@@ -122,10 +167,10 @@ def add_media_item_to_firestore(item: MediaItem):
         # For consistency, Firestore often expects UTC.
         firestore_data["timestamp"] = firestore_data["timestamp"].replace(tzinfo=datetime.timezone.utc)
 
+    firestore_data.update(media_index_fields(firestore_data))
 
     try:
-        doc_ref = db.collection(config.GENMEDIA_COLLECTION_NAME).document()
-        doc_ref.set(firestore_data)
+        doc_ref = _write_media_document(firestore_data)
         item.id = doc_ref.id # Set the ID back to the item
         print(f"MediaItem data stored in Firestore with document ID: {doc_ref.id}")
         print(f"Stored data: {firestore_data}")
@@ -134,6 +179,65 @@ def add_media_item_to_firestore(item: MediaItem):
         # Optionally re-raise or handle more gracefully
         raise
 
+def _write_media_document(firestore_data: dict):
+    """Writes a new media document and its counter increments in one batch.
+
+    Previews of the media are created in the background and added to the
+    document as `thumbnail_uris` when they are ready.
+    """
+    doc_ref = db.collection(config.GENMEDIA_COLLECTION_NAME).document()
+    batch = db.batch()
+    batch.set(doc_ref, firestore_data)
+    media_counters.add_increments(
+        batch, firestore_data.get("media_category"), firestore_data.get("user_email")
+    )
+    batch.commit()
+    media_counters.invalidate()
+    media_page_cache.clear()
+    if not firestore_data.get("thumbnail_uris") and media_source_uris(firestore_data):
+        _thumbnail_executor.submit(_add_thumbnails, doc_ref, firestore_data)
+    return doc_ref
+
+
+def media_source_uris(raw_item_data: dict) -> List[str]:
+    """The GCS URIs of a media document's output files, in display order."""
+    if raw_item_data.get("gcs_uris"):
+        return list(raw_item_data["gcs_uris"])
+    if raw_item_data.get("gcsuri"):
+        return [raw_item_data["gcsuri"]]
+    return []
+
+
+def _add_thumbnails(doc_ref, raw_item_data: dict) -> List[str]:
+    try:
+        thumbnail_uris = create_thumbnails(
+            raw_item_data.get("mime_type"), media_source_uris(raw_item_data)
+        )
+        if any(thumbnail_uris):
+            doc_ref.update({"thumbnail_uris": thumbnail_uris})
+            media_item_cache.invalidate(doc_ref.id)
+            media_page_cache.clear()
+        return thumbnail_uris
+    except Exception as e:
+        print(f"Error creating thumbnails for {doc_ref.id}: {e}")
+        return []
+
+
+def thumbnail_url(item: MediaItem, index: int = 0) -> str:
+    """The https URL to show for a media item's file in a grid.
+
+    The preview if one exists, otherwise the original file.
+    """
+    source_uris = media_source_uris({"gcs_uris": item.gcs_uris, "gcsuri": item.gcsuri})
+    if index >= len(source_uris):
+        return ""
+    uri = (
+        item.thumbnail_uris[index]
+        if index < len(item.thumbnail_uris) and item.thumbnail_uris[index]
+        else source_uris[index]
+    )
+    return uri.replace("gs://", "https://storage.mtls.cloud.google.com/")
+
 def field_names(dataclass_instance):
     """Helper to get field names of a dataclass instance."""
     return [f.name for f in dataclass_instance.__dataclass_fields__.values()]
@@ -141,7 +245,28 @@ def field_names(dataclass_instance):
 def get_media_item_by_id(
     item_id: str,
 ) -> Optional[MediaItem]:  # Assuming MediaItem class is defined/imported
-    """Retrieve a specific media item by its Firestore document ID."""
+    """Retrieve a specific media item by its Firestore document ID.
+
+    Reads through `media_item_cache`; missing items are not cached.
+    """
+    return media_item_cache.get_or_load(item_id, lambda: _load_media_item_by_id(item_id))
+
+
+def media_cache_stats() -> dict:
+    """Hit/miss counters and sizes of the library caches."""
+    return {
+        cache.name: cache.stats().to_dict()
+        for cache in (media_item_cache, media_page_cache)
+    }
+
+
+def _filter_key(
+    type_filters: Optional[List[str]], error_filter: str, filter_by_user_email: Optional[str]
+) -> tuple:
+    return (tuple(sorted(type_filters or [])), error_filter, filter_by_user_email)
+
+
+def _load_media_item_by_id(item_id: str) -> Optional[MediaItem]:
     try:
         print(f"Trying to retrieve {item_id}")
         doc_ref = db.collection(config.GENMEDIA_COLLECTION_NAME).document(item_id)
@@ -191,6 +316,7 @@ def get_media_item_by_id(
                 if raw_item_data.get("gcsuri") is not None
                 else None,
                 gcs_uris=raw_item_data.get("gcs_uris", []),
+                thumbnail_uris=raw_item_data.get("thumbnail_uris", []),
                 prompt=str(raw_item_data.get("original_prompt"))
                 if raw_item_data.get("original_prompt") is not None
                 else str(raw_item_data.get("prompt")),
@@ -263,9 +389,9 @@ def add_media_item(user_email: str, **kwargs):
 
     # Merge kwargs into firestore_data
     firestore_data.update(kwargs)
+    firestore_data.update(media_index_fields(firestore_data))
 
-    doc_ref = db.collection(config.GENMEDIA_COLLECTION_NAME).document()
-    doc_ref.set(firestore_data)
+    doc_ref = _write_media_document(firestore_data)
 
     print(f"Media data stored in Firestore with document ID: {doc_ref.id}")
 
@@ -290,11 +416,7 @@ def get_latest_videos(limit: int = 10):
 
 def get_total_media_count():
     """get count of all media in firestore"""
-    media_ref = db.collection(config.GENMEDIA_COLLECTION_NAME).order_by(
-        "timestamp", direction=firestore.Query.DESCENDING
-    )
-    count = len([doc.to_dict() for doc in media_ref.stream()])
-    return count
+    return count_media()
 
 def add_vto_metadata(
     person_image_gcs: str,
@@ -306,196 +428,429 @@ def add_vto_metadata(
 
     current_datetime = datetime.datetime.now()
 
-    doc_ref = db.collection(config.GENMEDIA_COLLECTION_NAME).document()
-    doc_ref.set(
-        {
-            "person_image_gcs": person_image_gcs,
-            "product_image_gcs": product_image_gcs,
-            "gcs_uris": result_image_gcs,
-            "mime_type": "image/png",
-            "user_email": user_email,
-            "timestamp": current_datetime,
-            "model": config.VTO_MODEL_ID,
-        }
-    )
+    firestore_data = {
+        "person_image_gcs": person_image_gcs,
+        "product_image_gcs": product_image_gcs,
+        "gcs_uris": result_image_gcs,
+        "mime_type": "image/png",
+        "user_email": user_email,
+        "timestamp": current_datetime,
+        "model": config.VTO_MODEL_ID,
+    }
+    firestore_data.update(media_index_fields(firestore_data))
+
+    doc_ref = _write_media_document(firestore_data)
 
     print(f"VTO data stored in Firestore with document ID: {doc_ref.id}")
 
+def _media_category(mime_type: Optional[str]) -> Optional[str]:
+    """The library type filter value ("videos", "images", "music") for a mime type."""
+    for category, prefix in MEDIA_CATEGORY_MIME_PREFIXES.items():
+        if mime_type and mime_type.startswith(prefix):
+            return category
+    return None
+
+
+def media_index_fields(raw_item_data: dict) -> dict:
+    """Denormalised fields the library queries filter on.
+
+    Firestore cannot filter on a mime type prefix or on whether a field is
+    present, so every write also stores the media category and an error flag.
+    """
+    return {
+        "media_category": _media_category(raw_item_data.get("mime_type")),
+        "has_error": bool(raw_item_data.get("error_message")),
+    }
+
+
+@dataclass
+class MediaPage:
+    """One page of library results."""
+
+    items: List[MediaItem] = field(default_factory=list)
+    # Document ID to pass as `cursor` for the next page; None on the last page
+    next_cursor: Optional[str] = None
+
+def _media_item_from_snapshot(doc) -> Optional[MediaItem]:
+    """Builds a MediaItem from a library query result document."""
+    raw_item_data = doc.to_dict()
+    if raw_item_data is None:
+        print(f"Warning: doc.to_dict() returned None for doc ID: {doc.id}")
+        return None
+
+    timestamp_iso_str: Optional[str] = None
+    raw_timestamp = raw_item_data.get("timestamp")
+    if isinstance(raw_timestamp, datetime.datetime):
+        timestamp_iso_str = raw_timestamp.isoformat()
+    elif isinstance(raw_timestamp, str):
+        timestamp_iso_str = raw_timestamp  # Assuming it's already ISO format
+    elif hasattr(raw_timestamp, "isoformat"):  # For Firestore Timestamp objects
+        timestamp_iso_str = raw_timestamp.isoformat()
+
+    try:
+        gen_time = (
+            float(raw_item_data.get("generation_time"))
+            if raw_item_data.get("generation_time") is not None
+            else None
+        )
+    except (ValueError, TypeError):
+        gen_time = None
+
+    try:
+        item_duration = (
+            float(raw_item_data.get("duration"))
+            if raw_item_data.get("duration") is not None
+            else None
+        )
+    except (ValueError, TypeError):
+        item_duration = None
+
+    media_item = MediaItem(
+        id=doc.id,
+        aspect=str(raw_item_data.get("aspect"))
+        if raw_item_data.get("aspect") is not None
+        else None,
+        gcsuri=str(raw_item_data.get("gcsuri"))
+        if raw_item_data.get("gcsuri") is not None
+        else None,
+        gcs_uris=raw_item_data.get("gcs_uris", []),
+        source_images_gcs=raw_item_data.get("source_images_gcs", []),
+        thumbnail_uris=raw_item_data.get("thumbnail_uris", []),
+        prompt=str(raw_item_data.get("prompt"))
+        if raw_item_data.get("prompt") is not None
+        else None,
+        generation_time=gen_time,
+        timestamp=timestamp_iso_str,
+        reference_image=str(raw_item_data.get("reference_image"))
+        if raw_item_data.get("reference_image") is not None
+        else None,
+        last_reference_image=str(raw_item_data.get("last_reference_image"))
+        if raw_item_data.get("last_reference_image") is not None
+        else None,
+        negative_prompt=str(raw_item_data.get("negative_prompt"))
+        if raw_item_data.get("negative_prompt") is not None
+        else None,
+        enhanced_prompt_used=raw_item_data.get("enhanced_prompt"),
+        duration=item_duration,
+        error_message=str(raw_item_data.get("error_message"))
+        if raw_item_data.get("error_message") is not None
+        else None,
+        rewritten_prompt=str(raw_item_data.get("rewritten_prompt"))
+        if raw_item_data.get("rewritten_prompt") is not None
+        else None,
+        comment=str(raw_item_data.get("comment"))
+        if raw_item_data.get("comment") is not None
+        else None,
+        resolution=str(raw_item_data.get("resolution"))
+        if raw_item_data.get("resolution") is not None
+        else None,
+        media_type=str(raw_item_data.get("media_type"))
+        if raw_item_data.get("media_type") is not None
+        else None,
+        source_character_images=raw_item_data.get(
+            "source_character_images", []
+        ),
+        character_description=str(raw_item_data.get("character_description"))
+        if raw_item_data.get("character_description") is not None
+        else None,
+        imagen_prompt=str(raw_item_data.get("imagen_prompt"))
+        if raw_item_data.get("imagen_prompt") is not None
+        else None,
+        veo_prompt=str(raw_item_data.get("veo_prompt"))
+        if raw_item_data.get("veo_prompt") is not None
+        else None,
+        candidate_images=raw_item_data.get("candidate_images", []),
+        best_candidate_image=str(raw_item_data.get("best_candidate_image"))
+        if raw_item_data.get("best_candidate_image") is not None
+        else None,
+        outpainted_image=str(raw_item_data.get("outpainted_image"))
+        if raw_item_data.get("outpainted_image") is not None
+        else None,
+        raw_data=raw_item_data,
+    )
+    return media_item
+
+
+def _build_media_query(
+    type_filters: Optional[List[str]] = None,
+    error_filter: str = "all",
+    filter_by_user_email: Optional[str] = None,
+):
+    """Builds the filtered library query, or returns None if nothing can match."""
+    query = db.collection(config.GENMEDIA_COLLECTION_NAME)
+
+    if type_filters and "all" not in type_filters:
+        categories = [t for t in type_filters if t in MEDIA_CATEGORY_MIME_PREFIXES]
+        if not categories:
+            return None
+        if len(categories) == 1:
+            query = query.where(filter=firestore.FieldFilter("media_category", "==", categories[0]))
+        else:
+            query = query.where(filter=firestore.FieldFilter("media_category", "in", categories))
+
+    if error_filter == "no_errors":
+        query = query.where(filter=firestore.FieldFilter("has_error", "==", False))
+    elif error_filter == "only_errors":
+        query = query.where(filter=firestore.FieldFilter("has_error", "==", True))
+
+    if filter_by_user_email:
+        query = query.where(filter=firestore.FieldFilter("user_email", "==", filter_by_user_email))
+
+    return query
+
+
+def get_media_page(
+    page_size: int,
+    cursor: Optional[str] = None,
+    type_filters: Optional[List[str]] = None,
+    error_filter: str = "all",  # "all", "no_errors", "only_errors"
+    filter_by_user_email: Optional[str] = None,
+) -> MediaPage:
+    """Fetches one page of filtered media items, newest first.
+
+    Filters are applied by Firestore and pages are read with `start_after`
+    cursors, so a page costs page_size + 1 document reads (plus one to resolve
+    the cursor) however large the library is. The filtered queries need the
+    composite indexes in `firestore.indexes.json`.
+
+    Args:
+        page_size: The number of media items per page.
+        cursor: The `next_cursor` of the previous page, or None for the first page.
+        type_filters: A list of media types to filter by.
+        error_filter: The error filter to apply.
+        filter_by_user_email: Only return media created by this user.
+
+    Returns:
+        A MediaPage with the items and the cursor for the following page.
+    """
+    key = (
+        "cursor",
+        _filter_key(type_filters, error_filter, filter_by_user_email),
+        cursor or "",
+        page_size,
+    )
+    try:
+        page = media_page_cache.get_or_load(
+            key,
+            lambda: _query_media_page(
+                page_size, cursor, type_filters, error_filter, filter_by_user_email
+            ),
+        )
+        return MediaPage(items=list(page.items), next_cursor=page.next_cursor)
+
+    except Exception as e:
+        print(f"Error fetching media page from Firestore: {e}")
+        return MediaPage()
+
+
+def _query_media_page(
+    page_size: int,
+    cursor: Optional[str],
+    type_filters: Optional[List[str]],
+    error_filter: str,
+    filter_by_user_email: Optional[str],
+) -> MediaPage:
+    query = _build_media_query(type_filters, error_filter, filter_by_user_email)
+    if query is None:
+        return MediaPage()
+    query = query.order_by("timestamp", direction=firestore.Query.DESCENDING)
+
+    if cursor:
+        cursor_doc = (
+            db.collection(config.GENMEDIA_COLLECTION_NAME).document(cursor).get()
+        )
+        if not cursor_doc.exists:
+            print(f"Library cursor {cursor} no longer exists; starting from the top.")
+        else:
+            query = query.start_after(cursor_doc)
+
+    # One extra document tells us whether there is a next page
+    docs = list(query.limit(page_size + 1).stream())
+    items = []
+    for doc in docs[:page_size]:
+        media_item = _media_item_from_snapshot(doc)
+        if media_item:
+            items.append(media_item)
+    next_cursor = docs[page_size - 1].id if len(docs) > page_size else None
+    return MediaPage(items=items, next_cursor=next_cursor)
+
+
+def count_media(
+    type_filters: Optional[List[str]] = None,
+    error_filter: str = "all",
+    filter_by_user_email: Optional[str] = None,
+) -> int:
+    """Counts the media items matching the library filters.
+
+    Uses the sharded media counters where they cover the filter and an
+    aggregation count query otherwise; either way the result is cached briefly.
+    """
+
+    def aggregation_count() -> int:
+        query = _build_media_query(type_filters, error_filter, filter_by_user_email)
+        if query is None:
+            return 0
+        result = query.count().get()
+        return int(result[0][0].value)
+
+    try:
+        return media_counters.count(
+            type_filters, error_filter, filter_by_user_email, aggregation_count
+        )
+    except Exception as e:
+        print(f"Error counting media in Firestore: {e}")
+        return 0
+
+
+def rebuild_media_counters() -> int:
+    """Seeds the media counters from the media collection; see MediaCounters.rebuild."""
+    query = db.collection(config.GENMEDIA_COLLECTION_NAME).select(
+        ["mime_type", "user_email"]
+    )
+
+    def category_and_user(doc):
+        raw_item_data = doc.to_dict() or {}
+        return _media_category(raw_item_data.get("mime_type")), raw_item_data.get("user_email")
+
+    return media_counters.rebuild(category_and_user(doc) for doc in query.stream())
+
+
 def get_media_for_page(
     page: int,
     media_per_page: int,
     type_filters: Optional[List[str]] = None,
     error_filter: str = "all",  # "all", "no_errors", "only_errors"
     sort_by_timestamp: bool = False,
-    filter_by_user_email: Optional[str] = None,  # New parameter
+    filter_by_user_email: Optional[str] = None,
 ) -> List[MediaItem]:
-    """Fetches a paginated and filtered list of media items from Firestore.
+    """Fetches a page of filtered media items by page number.
 
-    NOTE: This implementation currently fetches a larger batch of items (up to 'fetch_limit')
-    and then performs filtering and pagination client-side (in Python). For very large datasets
-    in Firestore (e.g., many thousands of media items), this approach might become inefficient
-    in terms of data transfer and memory usage. A more scalable long-term solution would involve
-    server-side pagination and filtering directly using Firestore query cursors (`start_after`)
-    and more complex `where` clauses if feasible, potentially via dedicated API endpoints.
+    Filtering happens in Firestore, but skipping to a page still reads the
+    skipped documents; callers that walk pages in order should prefer
+    `get_media_page` with cursors.
 
     Args:
         page: The page number to fetch.
         media_per_page: The number of media items to fetch per page.
         type_filters: A list of media types to filter by.
         error_filter: The error filter to apply.
+        sort_by_timestamp: Order the results newest first.
+        filter_by_user_email: Only return media created by this user.
 
     Returns:
         A list of MediaItem objects.
     """
-    fetch_limit = 1000  # Max items to fetch for client-side filtering/pagination
-
-    try:
-        query = db.collection(config.GENMEDIA_COLLECTION_NAME)
 
+    def load() -> MediaPage:
+        query = _build_media_query(type_filters, error_filter, filter_by_user_email)
+        if query is None:
+            return MediaPage()
         if sort_by_timestamp:
             query = query.order_by("timestamp", direction=firestore.Query.DESCENDING)
+        if page > 1:
+            query = query.offset((page - 1) * media_per_page)
+
+        media_items = []
+        for doc in query.limit(media_per_page).stream():
+            media_item = _media_item_from_snapshot(doc)
+            if media_item:
+                media_items.append(media_item)
+        return MediaPage(items=media_items)
+
+    key = (
+        "offset",
+        _filter_key(type_filters, error_filter, filter_by_user_email),
+        sort_by_timestamp,
+        page,
+        media_per_page,
+    )
+    try:
+        return list(media_page_cache.get_or_load(key, load).items)
 
-        all_fetched_items: List[MediaItem] = []
-        for doc in query.limit(fetch_limit).stream():
-            raw_item_data = doc.to_dict()
-            if raw_item_data is None:
-                print(f"Warning: doc.to_dict() returned None for doc ID: {doc.id}")
-                continue
+    except Exception as e:
+        print(f"Error fetching media from Firestore: {e}")
+        return []
 
-            mime_type = raw_item_data.get("mime_type", "")
-            error_message_present = bool(raw_item_data.get("error_message"))
 
-            # Apply type filters
-            passes_type_filter = False
-            if not type_filters or "all" in type_filters:
-                passes_type_filter = True
-            else:
-                if "videos" in type_filters and mime_type.startswith("video/"):
-                    passes_type_filter = True
-                elif "images" in type_filters and mime_type.startswith("image/"):
-                    passes_type_filter = True
-                elif "music" in type_filters and mime_type.startswith("audio/"):
-                    passes_type_filter = True
-
-            if not passes_type_filter:
-                continue
-
-            # Apply error filter
-            passes_error_filter = False
-            if error_filter == "all":
-                passes_error_filter = True
-            elif error_filter == "no_errors" and not error_message_present:
-                passes_error_filter = True
-            elif error_filter == "only_errors" and error_message_present:
-                passes_error_filter = True
-
-            if not passes_error_filter:
-                continue
-
-            # Apply user email filter
-            if filter_by_user_email and raw_item_data.get("user_email") != filter_by_user_email:
-                continue
-
-            # Construct MediaItem if all filters pass
-            timestamp_iso_str: Optional[str] = None
-            raw_timestamp = raw_item_data.get("timestamp")
-            if isinstance(raw_timestamp, datetime.datetime):
-                timestamp_iso_str = raw_timestamp.isoformat()
-            elif isinstance(raw_timestamp, str):
-                timestamp_iso_str = raw_timestamp  # Assuming it's already ISO format
-            elif hasattr(raw_timestamp, "isoformat"):  # For Firestore Timestamp objects
-                timestamp_iso_str = raw_timestamp.isoformat()
-
-            # print(f"DEBUG: Fetched item with timestamp: {timestamp_iso_str}")
+def backfill_media_index_fields(batch_size: int = 400) -> int:
+    """Adds the denormalised query fields to documents written before they existed.
 
-            try:
-                gen_time = (
-                    float(raw_item_data.get("generation_time"))
-                    if raw_item_data.get("generation_time") is not None
-                    else None
-                )
-            except (ValueError, TypeError):
-                gen_time = None
-
-            try:
-                item_duration = (
-                    float(raw_item_data.get("duration"))
-                    if raw_item_data.get("duration") is not None
-                    else None
-                )
-            except (ValueError, TypeError):
-                item_duration = None
+    Safe to re-run; documents that are already up to date are not rewritten.
+    Returns the number of documents updated.
+    """
+    collection = db.collection(config.GENMEDIA_COLLECTION_NAME)
+    query = collection.select(["mime_type", "error_message", "media_category", "has_error"])
+    updated = 0
+    batch = db.batch()
+    pending = 0
+    for doc in query.stream():
+        raw_item_data = doc.to_dict() or {}
+        index_fields = media_index_fields(raw_item_data)
+        if all(
+            key in raw_item_data and raw_item_data[key] == value
+            for key, value in index_fields.items()
+        ):
+            continue
+        batch.update(doc.reference, index_fields)
+        pending += 1
+        if pending == batch_size:
+            batch.commit()
+            updated += pending
+            batch = db.batch()
+            pending = 0
+    if pending:
+        batch.commit()
+        updated += pending
+    media_page_cache.clear()
+    print(f"Backfilled library index fields on {updated} documents.")
+    return updated
+
+
+def backfill_thumbnails(batch_size: int = 400) -> int:
+    """Creates previews for media documents that don't have them yet.
+
+    Safe to re-run; documents with previews are skipped. Documents are taken
+    batch_size at a time, previewed THUMBNAIL_WORKERS at a time on a pool of
+    their own (so previews of new media are not held up) and written in one
+    batch. A document whose previews fail is logged and skipped. Returns the
+    number of documents updated.
+    """
+    query = db.collection(config.GENMEDIA_COLLECTION_NAME).select(
+        ["mime_type", "gcsuri", "gcs_uris", "thumbnail_uris"]
+    )
+    pending_docs = (
+        doc
+        for doc in query.stream()
+        if not (doc.to_dict() or {}).get("thumbnail_uris")
+        and media_source_uris(doc.to_dict() or {})
+    )
 
-            media_item = MediaItem(
-                id=doc.id,
-                aspect=str(raw_item_data.get("aspect"))
-                if raw_item_data.get("aspect") is not None
-                else None,
-                gcsuri=str(raw_item_data.get("gcsuri"))
-                if raw_item_data.get("gcsuri") is not None
-                else None,
-                gcs_uris=raw_item_data.get("gcs_uris", []),
-                source_images_gcs=raw_item_data.get("source_images_gcs", []),
-                prompt=str(raw_item_data.get("prompt"))
-                if raw_item_data.get("prompt") is not None
-                else None,
-                generation_time=gen_time,
-                timestamp=timestamp_iso_str,
-                reference_image=str(raw_item_data.get("reference_image"))
-                if raw_item_data.get("reference_image") is not None
-                else None,
-                last_reference_image=str(raw_item_data.get("last_reference_image"))
-                if raw_item_data.get("last_reference_image") is not None
-                else None,
-                negative_prompt=str(raw_item_data.get("negative_prompt"))
-                if raw_item_data.get("negative_prompt") is not None
-                else None,
-                enhanced_prompt_used=raw_item_data.get("enhanced_prompt"),
-                duration=item_duration,
-                error_message=str(raw_item_data.get("error_message"))
-                if raw_item_data.get("error_message") is not None
-                else None,
-                rewritten_prompt=str(raw_item_data.get("rewritten_prompt"))
-                if raw_item_data.get("rewritten_prompt") is not None
-                else None,
-                comment=str(raw_item_data.get("comment"))
-                if raw_item_data.get("comment") is not None
-                else None,
-                resolution=str(raw_item_data.get("resolution"))
-                if raw_item_data.get("resolution") is not None
-                else None,
-                media_type=str(raw_item_data.get("media_type"))
-                if raw_item_data.get("media_type") is not None
-                else None,
-                source_character_images=raw_item_data.get(
-                    "source_character_images", []
-                ),
-                character_description=str(raw_item_data.get("character_description"))
-                if raw_item_data.get("character_description") is not None
-                else None,
-                imagen_prompt=str(raw_item_data.get("imagen_prompt"))
-                if raw_item_data.get("imagen_prompt") is not None
-                else None,
-                veo_prompt=str(raw_item_data.get("veo_prompt"))
-                if raw_item_data.get("veo_prompt") is not None
-                else None,
-                candidate_images=raw_item_data.get("candidate_images", []),
-                best_candidate_image=str(raw_item_data.get("best_candidate_image"))
-                if raw_item_data.get("best_candidate_image") is not None
-                else None,
-                outpainted_image=str(raw_item_data.get("outpainted_image"))
-                if raw_item_data.get("outpainted_image") is not None
-                else None,
-                raw_data=raw_item_data,
+    def thumbnails_for(doc) -> list[str]:
+        raw_item_data = doc.to_dict() or {}
+        try:
+            return create_thumbnails(
+                raw_item_data.get("mime_type"), media_source_uris(raw_item_data)
             )
-            all_fetched_items.append(media_item)
-
-        # For pagination, slice the fully filtered list
-        start_slice = (page - 1) * media_per_page
-        end_slice = start_slice + media_per_page
-        return all_fetched_items[start_slice:end_slice]
-
-    except Exception as e:
-        print(f"Error fetching media from Firestore: {e}")
-        # Optionally, you could re-raise or handle more gracefully
-        return []
+        except Exception as e:
+            print(f"Could not create previews for {doc.id}: {e}")
+            return []
+
+    updated = 0
+    with concurrent.futures.ThreadPoolExecutor(
+        max_workers=config.THUMBNAIL_WORKERS, thread_name_prefix="thumbnail-backfill"
+    ) as executor:
+        while chunk := list(itertools.islice(pending_docs, batch_size)):
+            batch = db.batch()
+            pending = 0
+            for doc, thumbnail_uris in zip(chunk, executor.map(thumbnails_for, chunk)):
+                if not any(thumbnail_uris):
+                    continue
+                batch.update(doc.reference, {"thumbnail_uris": thumbnail_uris})
+                pending += 1
+            if pending:
+                batch.commit()
+                updated += pending
+    media_item_cache.clear()
+    media_page_cache.clear()
+    print(f"Backfilled thumbnails on {updated} documents.")
+    return updated
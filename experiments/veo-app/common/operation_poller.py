@@ -0,0 +1,171 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Shared poller for long-running generation operations (e.g. Veo).
+
+Operations are registered with `submit`, which returns a
+`concurrent.futures.Future` that resolves to the finished operation. All
+outstanding operations are polled from one asyncio task on a background
+thread: each operation is checked quickly at first and then less often, and
+every operation due at the same tick is fetched concurrently with the
+client's async API. Callers can block on the future, poll `future.done()`,
+or attach callbacks with `future.add_done_callback`.
+"""
+
+import asyncio
+import concurrent.futures
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Optional
+
+from config.default import Default
+
+config = Default()
+
+
+@dataclass
+class _PendingOperation:
+    operation: Any
+    client: Any
+    future: concurrent.futures.Future
+    interval: float
+    next_poll: float
+    deadline: float
+    failures: int = 0
+
+
+class OperationPoller:
+    """Polls every registered operation from a single asyncio task."""
+
+    def __init__(
+        self,
+        initial_interval: float = 5.0,
+        max_interval: float = 30.0,
+        backoff: float = 1.5,
+        timeout: float = 1200.0,
+        max_concurrent_gets: int = 16,
+        max_consecutive_failures: int = 5,
+    ):
+        self.initial_interval = initial_interval
+        self.max_interval = max_interval
+        self.backoff = backoff
+        self.timeout = timeout
+        self.max_concurrent_gets = max_concurrent_gets
+        self.max_consecutive_failures = max_consecutive_failures
+        self._pending: list[_PendingOperation] = []
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._lock = threading.Lock()
+
+    def submit(self, operation, client) -> concurrent.futures.Future:
+        """Registers an operation; the future resolves to the finished operation."""
+        future: concurrent.futures.Future = concurrent.futures.Future()
+        now = time.monotonic()
+        pending = _PendingOperation(
+            operation=operation,
+            client=client,
+            future=future,
+            interval=self.initial_interval,
+            next_poll=now + self.initial_interval,
+            deadline=now + self.timeout,
+        )
+        if getattr(operation, "done", False):
+            future.set_result(operation)
+            return future
+        loop = self._ensure_loop()
+        loop.call_soon_threadsafe(self._add, pending)
+        return future
+
+    @property
+    def pending_count(self) -> int:
+        return len(self._pending)
+
+    def _ensure_loop(self) -> asyncio.AbstractEventLoop:
+        """Starts the polling thread on first use rather than at import."""
+        with self._lock:
+            if self._loop is None:
+                loop = asyncio.new_event_loop()
+                ready = threading.Event()
+
+                def run():
+                    asyncio.set_event_loop(loop)
+                    self._wakeup = asyncio.Event()
+                    loop.call_soon(ready.set)
+                    loop.run_until_complete(self._poll_forever())
+
+                threading.Thread(target=run, name="operation-poller", daemon=True).start()
+                ready.wait()
+                self._loop = loop
+            return self._loop
+
+    def _add(self, pending: _PendingOperation):
+        self._pending.append(pending)
+        self._wakeup.set()
+
+    async def _poll_forever(self):
+        while True:
+            now = time.monotonic()
+            if self._pending:
+                sleep_for = max(0.0, min(p.next_poll for p in self._pending) - now)
+            else:
+                sleep_for = None
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=sleep_for)
+                continue  # a new operation was added; recompute the next wake-up
+            except asyncio.TimeoutError:
+                pass
+
+            now = time.monotonic()
+            due = [p for p in self._pending if p.next_poll <= now]
+            semaphore = asyncio.Semaphore(self.max_concurrent_gets)
+            await asyncio.gather(*(self._poll_one(p, semaphore) for p in due))
+            self._pending = [p for p in self._pending if not p.future.done()]
+
+    async def _poll_one(self, pending: _PendingOperation, semaphore: asyncio.Semaphore):
+        if pending.future.cancelled():
+            return
+        async with semaphore:
+            try:
+                pending.operation = await pending.client.aio.operations.get(pending.operation)
+                pending.failures = 0
+            except Exception as e:
+                pending.failures += 1
+                print(f"Error polling operation {getattr(pending.operation, 'name', '')}: {e}")
+                if pending.failures >= self.max_consecutive_failures:
+                    pending.future.set_exception(e)
+                    return
+
+        now = time.monotonic()
+        if pending.operation.done:
+            pending.future.set_result(pending.operation)
+        elif now >= pending.deadline:
+            pending.future.set_exception(
+                TimeoutError(
+                    f"Operation {pending.operation.name} did not finish within {self.timeout:.0f} seconds"
+                )
+            )
+        else:
+            print(f"Operation in progress: {pending.operation.name}")
+            pending.interval = min(pending.interval * self.backoff, self.max_interval)
+            pending.next_poll = now + pending.interval
+
+
+operation_poller = OperationPoller(
+    initial_interval=config.VEO_POLL_INITIAL_SECONDS,
+    max_interval=config.VEO_POLL_MAX_SECONDS,
+    backoff=config.VEO_POLL_BACKOFF,
+    timeout=config.VEO_POLL_TIMEOUT_SECONDS,
+    max_concurrent_gets=config.VEO_POLL_MAX_CONCURRENT_GETS,
+)
@@ -12,15 +12,24 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
-import base64
+import concurrent.futures
+import hashlib
+import mimetypes
+import os
+import threading
+import time
+from collections import OrderedDict
 from dataclasses import asdict, dataclass, field
 from datetime import datetime
 from functools import lru_cache
 
 from google.cloud import aiplatform
 from google.cloud import storage
+from tenacity import Retrying, stop_after_attempt, wait_exponential
 import vertexai
 
+from common.clients import get_bucket, get_storage_client
+from common.upload_streams import ChunkStream, UploadSource, decode_base64_chunks, iter_chunks
 from config.default import Default
 from config.firebase_config import FirebaseClient
 
@@ -59,37 +68,241 @@ def get_or_create_session(session_id: str, user_email: str) -> Session:
         return session
 
 
+# Resumable upload chunks must be a multiple of 256 KiB
+_CHUNK_ALIGNMENT = 256 * 1024
+
+_upload_executor = concurrent.futures.ThreadPoolExecutor(
+    max_workers=cfg.GCS_UPLOAD_WORKERS, thread_name_prefix="gcs-upload"
+)
+
+
+@dataclass
+class GCSUpload:
+    """One file in a batch upload; arguments as for `stream_to_gcs`."""
+
+    folder: str
+    file_name: str
+    mime_type: str
+    contents: UploadSource
+    decode: bool = False
+
+
+def _resolve_bucket_name(bucket_name: str | None) -> str:
+    actual_bucket_name = bucket_name if bucket_name else cfg.GENMEDIA_BUCKET
+    if not actual_bucket_name:
+        raise ValueError(
+            "GCS bucket name is not configured. Please set GENMEDIA_BUCKET environment variable or provide bucket_name."
+        )
+    return actual_bucket_name
+
+
+def _upload_chunk_size() -> int:
+    chunks = max(1, cfg.GCS_UPLOAD_CHUNK_SIZE // _CHUNK_ALIGNMENT)
+    return chunks * _CHUNK_ALIGNMENT
+
+
+def stream_to_gcs(
+    folder: str,
+    file_name: str,
+    mime_type: str,
+    contents: UploadSource,
+    decode: bool = False,
+    bucket_name: str | None = None,
+) -> str:
+    """Streams contents to GCS and returns the gs:// URI.
+
+    contents may be str, bytes, a memoryview, a binary file object or an
+    iterable of byte chunks; with decode, it is base64 text that is decoded as
+    it is read. Payloads up to GCS_RESUMABLE_THRESHOLD bytes are sent in one
+    request. Larger ones use a resumable upload that reads and sends
+    GCS_UPLOAD_CHUNK_SIZE bytes at a time, so the decoded payload is never
+    held in memory as a whole.
+    """
+    actual_bucket_name = _resolve_bucket_name(bucket_name)
+    destination_blob_name = f"{folder}/{file_name}"
+    blob = get_bucket(actual_bucket_name).blob(
+        destination_blob_name, chunk_size=_upload_chunk_size()
+    )
+
+    chunks = iter_chunks(contents)
+    if decode:
+        chunks = decode_base64_chunks(chunks)
+    stream = ChunkStream(chunks)
+    head = stream.read(cfg.GCS_RESUMABLE_THRESHOLD + 1)
+    if len(head) <= cfg.GCS_RESUMABLE_THRESHOLD:
+        blob.upload_from_string(head, content_type=mime_type)
+    else:
+        # Size unknown up front: the resumable upload ends at the first short chunk
+        stream.seek(0)
+        blob.upload_from_file(stream, content_type=mime_type)
+    return f"gs://{actual_bucket_name}/{destination_blob_name}"
+
+
+@dataclass
+class UploadResult:
+    """Where an upload in a batch landed and how long it took."""
+
+    uri: str
+    seconds: float
+    attempts: int
+
+
+def _rewinder(contents: UploadSource):
+    """A callable that makes contents readable again for a retry, or None if it can't be."""
+    if isinstance(contents, (str, bytes, bytearray, memoryview)):
+        return lambda: None
+    if hasattr(contents, "seek") and hasattr(contents, "tell"):
+        try:
+            start = contents.tell()
+        except (OSError, ValueError):
+            return None
+        return lambda: contents.seek(start)
+    return None  # iterators can only be read once
+
+
+def _upload_with_retries(upload: GCSUpload, bucket_name: str | None, max_attempts: int) -> UploadResult:
+    rewind = _rewinder(upload.contents)
+    attempts = max_attempts if rewind else 1
+    started = time.perf_counter()
+    for attempt in Retrying(
+        stop=stop_after_attempt(attempts),
+        wait=wait_exponential(multiplier=1, min=1, max=10),
+        reraise=True,
+    ):
+        with attempt:
+            attempt_number = attempt.retry_state.attempt_number
+            if attempt_number > 1:
+                print(f"store_many_to_gcs: retrying {upload.folder}/{upload.file_name} (attempt {attempt_number})")
+                rewind()
+            uri = stream_to_gcs(
+                upload.folder,
+                upload.file_name,
+                upload.mime_type,
+                upload.contents,
+                decode=upload.decode,
+                bucket_name=bucket_name,
+            )
+    return UploadResult(uri=uri, seconds=time.perf_counter() - started, attempts=attempt_number)
+
+
+def store_many_to_gcs(
+    uploads: list[GCSUpload],
+    bucket_name: str | None = None,
+    max_attempts: int | None = None,
+) -> list[UploadResult]:
+    """Uploads a batch of files concurrently; results are returned in input order.
+
+    Uploads run on the shared upload pool (GCS_UPLOAD_WORKERS threads), so a
+    batch of N results takes about as long as its slowest upload. Each upload
+    is retried on its own, up to max_attempts (GCS_UPLOAD_ATTEMPTS) times, if
+    its contents can be read again. If an upload still fails, its exception is
+    raised once the uploads before it have finished.
+    """
+    _resolve_bucket_name(bucket_name)
+    max_attempts = max_attempts or cfg.GCS_UPLOAD_ATTEMPTS
+    started = time.perf_counter()
+    results = list(
+        _upload_executor.map(
+            lambda upload: _upload_with_retries(upload, bucket_name, max_attempts), uploads
+        )
+    )
+    if results:
+        print(
+            f"store_many_to_gcs: {len(results)} uploads in {time.perf_counter() - started:.2f}s "
+            f"(slowest {max(r.seconds for r in results):.2f}s)"
+        )
+    return results
+
+
 def store_to_gcs(
     folder: str,
     file_name: str,
     mime_type: str,
-    contents: str | bytes,
+    contents: UploadSource,
     decode: bool = False,
     bucket_name: str | None = None,
 ):
     """store contents to GCS"""
-    actual_bucket_name = bucket_name if bucket_name else cfg.GENMEDIA_BUCKET
-    if not actual_bucket_name:
-        raise ValueError(
-            "GCS bucket name is not configured. Please set GENMEDIA_BUCKET environment variable or provide bucket_name."
-        )
+    actual_bucket_name = _resolve_bucket_name(bucket_name)
     print(f"store_to_gcs: Target project {cfg.PROJECT_ID}, target bucket {actual_bucket_name}")
-    client = storage.Client(project=cfg.PROJECT_ID)
-    bucket = client.get_bucket(actual_bucket_name)
-    destination_blob_name = f"{folder}/{file_name}"
-    print(f"store_to_gcs: Destination {destination_blob_name}")
-    blob = bucket.blob(destination_blob_name)
-    if decode:
-        contents_bytes = base64.b64decode(contents)
-        blob.upload_from_string(contents_bytes, content_type=mime_type)
-    elif isinstance(contents, bytes):
-        blob.upload_from_string(contents, content_type=mime_type)
+    print(f"store_to_gcs: Destination {folder}/{file_name}")
+    return stream_to_gcs(
+        folder, file_name, mime_type, contents, decode=decode, bucket_name=actual_bucket_name
+    )  # Return full gsutil URI
+
+# Hits from the upload index, so repeat uploads skip Firestore as well as GCS
+_UPLOAD_INDEX_CACHE_SIZE = 4096
+_upload_index_cache: OrderedDict[str, str] = OrderedDict()
+_upload_index_lock = threading.Lock()
+
+
+def _upload_extension(file_name: str, mime_type: str) -> str:
+    extension = os.path.splitext(file_name or "")[1].lower()
+    return extension or mimetypes.guess_extension(mime_type or "") or ""
+
+
+def _remember_upload(key: str, gcs_uri: str):
+    with _upload_index_lock:
+        _upload_index_cache[key] = gcs_uri
+        _upload_index_cache.move_to_end(key)
+        while len(_upload_index_cache) > _UPLOAD_INDEX_CACHE_SIZE:
+            _upload_index_cache.popitem(last=False)
+
+
+def store_upload_to_gcs(
+    folder: str,
+    file_name: str,
+    mime_type: str,
+    contents: bytes,
+    bucket_name: str | None = None,
+) -> str:
+    """Stores a user upload once per distinct content and returns its gs:// URI.
+
+    Uploads are keyed by the SHA-256 of their bytes. A hash already in the
+    upload index (UPLOADS_COLLECTION_NAME) returns the URI it was first stored
+    at without writing to GCS; new content is stored at
+    {folder}/{sha256}{extension} and added to the index.
+    """
+    actual_bucket_name = _resolve_bucket_name(bucket_name)
+    digest = hashlib.sha256(contents).hexdigest()
+    key = f"{actual_bucket_name}:{digest}"
+
+    with _upload_index_lock:
+        gcs_uri = _upload_index_cache.get(key)
+    if gcs_uri:
+        print(f"store_upload_to_gcs: {file_name} already stored at {gcs_uri}")
+        return gcs_uri
+
+    index_ref = db.collection(cfg.UPLOADS_COLLECTION_NAME).document(key)
+    doc = index_ref.get()
+    if doc.exists:
+        gcs_uri = doc.to_dict()["gcs_uri"]
+        print(f"store_upload_to_gcs: {file_name} already stored at {gcs_uri}")
     else:
-        blob.upload_from_string(contents, content_type=mime_type)
-    return f"gs://{actual_bucket_name}/{destination_blob_name}"  # Return full gsutil URI
+        gcs_uri = stream_to_gcs(
+            folder,
+            f"{digest}{_upload_extension(file_name, mime_type)}",
+            mime_type,
+            contents,
+            bucket_name=actual_bucket_name,
+        )
+        index_ref.set(
+            {
+                "gcs_uri": gcs_uri,
+                "bucket": actual_bucket_name,
+                "sha256": digest,
+                "mime_type": mime_type,
+                "size": len(contents),
+                "original_file_name": file_name,
+                "timestamp": datetime.utcnow(),
+            }
+        )
+        print(f"store_upload_to_gcs: stored {file_name} at {gcs_uri}")
+    _remember_upload(key, gcs_uri)
+    return gcs_uri
+
 
 def download_from_gcs(gcs_uri: str) -> bytes:
     """Downloads a file from a GCS URI and returns its content as bytes."""
-    client = storage.Client(project=cfg.PROJECT_ID)
-    blob = storage.Blob.from_string(gcs_uri, client=client)
+    blob = storage.Blob.from_string(gcs_uri, client=get_storage_client())
     return blob.download_as_bytes()
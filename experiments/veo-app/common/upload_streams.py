@@ -0,0 +1,131 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Chunked readers for streaming uploads.
+
+Upload payloads arrive as str, bytes, memoryviews, file objects or iterators
+of chunks, and are often base64 text. These helpers turn any of them into a
+stream of byte chunks, decode base64 a chunk at a time, and expose the result
+as a file object for `Blob.upload_from_file`, so an upload holds a chunk of
+the payload in memory rather than a decoded copy of all of it.
+"""
+
+import binascii
+from typing import BinaryIO, Iterable, Iterator, Union
+
+UploadSource = Union[str, bytes, bytearray, memoryview, BinaryIO, Iterable[bytes]]
+
+# Source read size; a multiple of 4 so base64 chunks decode on their own
+READ_SIZE = 1024 * 1024
+
+_WHITESPACE = b" \t\r\n"
+
+
+def iter_chunks(contents: UploadSource, read_size: int = READ_SIZE) -> Iterator[bytes]:
+    """Yields the contents as byte chunks of at most read_size, without copying all of it."""
+    if isinstance(contents, str):
+        # Slicing by code point and encoding each slice gives the same bytes
+        # as encoding the whole string
+        for start in range(0, len(contents), read_size):
+            yield contents[start : start + read_size].encode("utf-8")
+    elif isinstance(contents, (bytes, bytearray, memoryview)):
+        view = memoryview(contents).cast("B")
+        for start in range(0, len(view), read_size):
+            yield bytes(view[start : start + read_size])
+    elif hasattr(contents, "read"):
+        while True:
+            chunk = contents.read(read_size)
+            if not chunk:
+                break
+            yield chunk.encode("utf-8") if isinstance(chunk, str) else chunk
+    else:
+        for chunk in contents:
+            yield chunk.encode("utf-8") if isinstance(chunk, str) else bytes(chunk)
+
+
+def decode_base64_chunks(chunks: Iterable[bytes]) -> Iterator[bytes]:
+    """Decodes a stream of base64 text chunks, yielding decoded chunks.
+
+    Raises binascii.Error on malformed input, as `base64.b64decode` does.
+    """
+    pending = b""
+    for chunk in chunks:
+        pending += chunk.translate(None, _WHITESPACE)
+        usable = len(pending) - len(pending) % 4
+        if usable:
+            yield binascii.a2b_base64(pending[:usable])
+            pending = pending[usable:]
+    if pending:
+        yield binascii.a2b_base64(pending)
+
+
+class ChunkStream:
+    """A read-only file object over an iterator of byte chunks.
+
+    Reads move forward only, except that the stream can seek back within the
+    block returned by the last read: a resumable upload does that to resend a
+    chunk the server did not confirm.
+    """
+
+    def __init__(self, chunks: Iterable[bytes]):
+        self._chunks = iter(chunks)
+        self._buffer = b""  # read from the iterator but not yet returned
+        self._position = 0
+        self._last_block = b""
+        self._last_block_start = 0
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def tell(self) -> int:
+        return self._position
+
+    def read(self, size: int = -1) -> bytes:
+        parts = [self._buffer]
+        available = len(self._buffer)
+        while size is None or size < 0 or available < size:
+            chunk = next(self._chunks, None)
+            if chunk is None:
+                break
+            parts.append(chunk)
+            available += len(chunk)
+        data = b"".join(parts)
+        if size is not None and size >= 0:
+            data, self._buffer = data[:size], data[size:]
+        else:
+            self._buffer = b""
+        self._last_block = data
+        self._last_block_start = self._position
+        self._position += len(data)
+        return data
+
+    def seek(self, offset: int, whence: int = 0) -> int:
+        if whence == 1:
+            offset += self._position
+        elif whence != 0:
+            raise OSError("ChunkStream only supports seeking from the start or current position.")
+        if offset == self._position:
+            return offset
+        if not self._last_block_start <= offset < self._position:
+            raise OSError(
+                f"Cannot seek to {offset}; only the last block "
+                f"[{self._last_block_start}, {self._position}) can be reread."
+            )
+        replay = self._last_block[offset - self._last_block_start :]
+        self._buffer = replay + self._buffer
+        self._last_block = self._last_block[: offset - self._last_block_start]
+        self._position = offset
+        return offset
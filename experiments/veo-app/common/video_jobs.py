@@ -0,0 +1,370 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Durable queue for video generation jobs.
+
+A job records the generation request, the library metadata to log when it
+finishes, the long-running operation name and the result. Jobs live in a
+`JobStore` (Firestore in the app, SQLite for tests and local runs), so a job
+outlives the browser tab that started it and the instance that ran it:
+`VideoJobQueue.resume` picks up queued and in-flight jobs after a restart, and
+pages poll `VideoJobQueue.get` for status.
+
+Status changes go through `JobStore.transition`, an atomic compare-and-set,
+so when several instances resume the same jobs only one of them starts each
+operation and logs each result. A job is never started twice: one left in
+STARTING by a crash, whose operation name was not saved, is finished from
+the output found at its `output_gcs_uri`, or failed if there is none.
+"""
+
+import abc
+import concurrent.futures
+import dataclasses
+import json
+import sqlite3
+import threading
+import time
+import uuid
+from typing import Any, Callable, Iterable, Optional
+
+from google.cloud import firestore
+
+QUEUED = "queued"
+STARTING = "starting"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+
+ACTIVE_STATUSES = (QUEUED, STARTING, RUNNING)
+FINISHED_STATUSES = (SUCCEEDED, FAILED)
+
+
+@dataclasses.dataclass
+class VideoJob:
+    """A video generation job and its current status."""
+
+    job_id: str
+    user_email: Optional[str] = None
+    request: dict = dataclasses.field(default_factory=dict)
+    # MediaItem fields to log to the library when the job finishes
+    media_item: dict = dataclasses.field(default_factory=dict)
+    status: str = QUEUED
+    operation_name: Optional[str] = None
+    # Where the operation writes its output, saved before it is started
+    output_gcs_uri: Optional[str] = None
+    result_uri: Optional[str] = None
+    resolution: Optional[str] = None
+    error_message: Optional[str] = None
+    created_at: float = 0.0
+    updated_at: float = 0.0
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+
+    @property
+    def done(self) -> bool:
+        return self.status in FINISHED_STATUSES
+
+    @property
+    def generation_time(self) -> Optional[float]:
+        if self.finished_at is None:
+            return None
+        return self.finished_at - (self.started_at or self.created_at)
+
+    def to_dict(self) -> dict:
+        return dataclasses.asdict(self)
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "VideoJob":
+        names = {f.name for f in dataclasses.fields(cls)}
+        return cls(**{k: v for k, v in data.items() if k in names})
+
+
+class JobStore(abc.ABC):
+    """Persistence for video jobs."""
+
+    @abc.abstractmethod
+    def create(self, job: VideoJob):
+        ...
+
+    @abc.abstractmethod
+    def get(self, job_id: str) -> Optional[VideoJob]:
+        ...
+
+    @abc.abstractmethod
+    def transition(self, job_id: str, from_statuses: Iterable[str], **fields) -> bool:
+        """Atomically updates a job if its status is one of from_statuses.
+
+        Returns whether the update was applied.
+        """
+
+    @abc.abstractmethod
+    def list_by_status(self, statuses: Iterable[str]) -> list[VideoJob]:
+        ...
+
+
+class FirestoreJobStore(JobStore):
+    """Jobs as documents in a Firestore collection, keyed by job ID."""
+
+    def __init__(self, db, collection_name: str):
+        self._db = db
+        self._collection_name = collection_name
+
+    def _ref(self, job_id: str):
+        return self._db.collection(self._collection_name).document(job_id)
+
+    def create(self, job: VideoJob):
+        self._ref(job.job_id).set(job.to_dict())
+
+    def get(self, job_id: str) -> Optional[VideoJob]:
+        doc = self._ref(job_id).get()
+        if not doc.exists:
+            return None
+        return VideoJob.from_dict(doc.to_dict())
+
+    def transition(self, job_id: str, from_statuses: Iterable[str], **fields) -> bool:
+        from_statuses = tuple(from_statuses)
+        ref = self._ref(job_id)
+
+        @firestore.transactional
+        def apply(transaction) -> bool:
+            doc = ref.get(transaction=transaction)
+            if not doc.exists or doc.to_dict().get("status") not in from_statuses:
+                return False
+            transaction.update(ref, {**fields, "updated_at": time.time()})
+            return True
+
+        return apply(self._db.transaction())
+
+    def list_by_status(self, statuses: Iterable[str]) -> list[VideoJob]:
+        query = self._db.collection(self._collection_name).where(
+            filter=firestore.FieldFilter("status", "in", list(statuses))
+        )
+        return [VideoJob.from_dict(doc.to_dict()) for doc in query.stream()]
+
+
+class SQLiteJobStore(JobStore):
+    """Jobs in a local SQLite table; a stand-in for Firestore in tests and local runs."""
+
+    def __init__(self, path: str = ":memory:"):
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._lock, self._conn:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS video_jobs ("
+                "job_id TEXT PRIMARY KEY, status TEXT NOT NULL, data TEXT NOT NULL)"
+            )
+
+    def create(self, job: VideoJob):
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT INTO video_jobs (job_id, status, data) VALUES (?, ?, ?)",
+                (job.job_id, job.status, json.dumps(job.to_dict())),
+            )
+
+    def get(self, job_id: str) -> Optional[VideoJob]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT data FROM video_jobs WHERE job_id = ?", (job_id,)
+            ).fetchone()
+        return VideoJob.from_dict(json.loads(row[0])) if row else None
+
+    def transition(self, job_id: str, from_statuses: Iterable[str], **fields) -> bool:
+        from_statuses = tuple(from_statuses)
+        with self._lock, self._conn:
+            row = self._conn.execute(
+                "SELECT data FROM video_jobs WHERE job_id = ?", (job_id,)
+            ).fetchone()
+            if row is None:
+                return False
+            data = json.loads(row[0])
+            if data["status"] not in from_statuses:
+                return False
+            data.update(fields, updated_at=time.time())
+            self._conn.execute(
+                "UPDATE video_jobs SET status = ?, data = ? WHERE job_id = ?",
+                (data["status"], json.dumps(data), job_id),
+            )
+            return True
+
+    def list_by_status(self, statuses: Iterable[str]) -> list[VideoJob]:
+        statuses = list(statuses)
+        placeholders = ", ".join("?" for _ in statuses)
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT data FROM video_jobs WHERE status IN ({placeholders})", statuses
+            ).fetchall()
+        return [VideoJob.from_dict(json.loads(row[0])) for row in rows]
+
+
+class VideoJobQueue:
+    """Runs video jobs from a JobStore.
+
+    `start_operation(request, output_gcs_uri)` starts the long-running
+    operation and returns it; `watch_operation(operation_or_name, request)`
+    returns a future for (result_uri, resolution). `output_uri_for(job_id)`
+    gives each job its own output location, and `find_output(output_gcs_uri,
+    request)` returns the (result_uri, resolution) written there, or None.
+    `on_finished(job)` is called once per job when it succeeds or fails, e.g.
+    to log it to the library.
+    """
+
+    def __init__(
+        self,
+        store: JobStore,
+        start_operation: Callable[[Any], Any],
+        watch_operation: Callable[[Any, Any], concurrent.futures.Future],
+        request_type: Callable[..., Any],
+        on_finished: Optional[Callable[[VideoJob], None]] = None,
+        max_workers: int = 4,
+        start_timeout: float = 300.0,
+        output_uri_for: Optional[Callable[[str], str]] = None,
+        find_output: Optional[Callable[[str, Any], Optional[tuple[str, str]]]] = None,
+    ):
+        self._store = store
+        self._start_operation = start_operation
+        self._watch_operation = watch_operation
+        self._request_type = request_type
+        self._on_finished = on_finished
+        self._start_timeout = start_timeout
+        self._output_uri_for = output_uri_for
+        self._find_output = find_output
+        self._executor = concurrent.futures.ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="video-jobs"
+        )
+
+    def enqueue(self, request, user_email: Optional[str], media_item: Optional[dict] = None) -> str:
+        """Stores a new job and starts it in the background; returns its ID."""
+        now = time.time()
+        job = VideoJob(
+            job_id=uuid.uuid4().hex,
+            user_email=user_email,
+            request=request.model_dump(),
+            media_item=media_item or {},
+            created_at=now,
+            updated_at=now,
+        )
+        self._store.create(job)
+        self._executor.submit(self._start, job.job_id)
+        return job.job_id
+
+    def get(self, job_id: str) -> Optional[VideoJob]:
+        """The job's current state, for pages to poll."""
+        return self._store.get(job_id)
+
+    def resume(self) -> int:
+        """Restarts queued jobs and resumes watching running ones; returns how many."""
+        resumed = 0
+        now = time.time()
+        for job in self._store.list_by_status(ACTIVE_STATUSES):
+            if job.status == STARTING:
+                # Interrupted between claiming the job and saving its operation
+                # name; its operation may have started, so it is not started again
+                if now - job.updated_at < self._start_timeout:
+                    continue
+                self._executor.submit(self._recover_start, job)
+            elif job.status == QUEUED:
+                self._executor.submit(self._start, job.job_id)
+            else:
+                self._watch(job)
+            resumed += 1
+        print(f"Resumed {resumed} video jobs.")
+        return resumed
+
+    def _start(self, job_id: str):
+        output_gcs_uri = self._output_uri_for(job_id) if self._output_uri_for else None
+        if not self._store.transition(
+            job_id, [QUEUED], status=STARTING, output_gcs_uri=output_gcs_uri
+        ):
+            return  # another worker claimed it
+        job = self._store.get(job_id)
+        try:
+            operation = self._start_operation(
+                self._request_type(**job.request), output_gcs_uri
+            )
+        except Exception as e:
+            print(f"Video job {job_id} failed to start: {e}")
+            self._finish(job_id, FAILED, error_message=str(e))
+            return
+        job.operation_name = operation.name
+        job.started_at = time.time()
+        if not self._store.transition(
+            job_id,
+            [STARTING],
+            status=RUNNING,
+            operation_name=job.operation_name,
+            started_at=job.started_at,
+        ):
+            print(f"Video job {job_id} was recovered by another worker while starting; not watching it.")
+            return
+        job.status = RUNNING
+        self._watch(job, operation)
+
+    def _recover_start(self, job: VideoJob):
+        """Finishes a job left in STARTING from the output its operation wrote, if any."""
+        result = None
+        if job.output_gcs_uri and self._find_output:
+            try:
+                result = self._find_output(job.output_gcs_uri, self._request_type(**job.request))
+            except Exception as e:
+                print(f"Could not look for the output of video job {job.job_id}: {e}")
+        if result:
+            result_uri, resolution = result
+            self._finish(
+                job.job_id, SUCCEEDED, [STARTING], result_uri=result_uri, resolution=resolution
+            )
+        else:
+            self._finish(
+                job.job_id,
+                FAILED,
+                [STARTING],
+                error_message="Video generation was interrupted; please try again.",
+            )
+
+    def _watch(self, job: VideoJob, operation=None):
+        future = self._watch_operation(
+            operation or job.operation_name, self._request_type(**job.request)
+        )
+
+        def on_done(done: concurrent.futures.Future):
+            try:
+                result_uri, resolution = done.result()
+            except Exception as e:
+                error_message = getattr(e, "message", None) or str(e)
+                self._executor.submit(
+                    self._finish, job.job_id, FAILED, error_message=error_message
+                )
+            else:
+                self._executor.submit(
+                    self._finish,
+                    job.job_id,
+                    SUCCEEDED,
+                    result_uri=result_uri,
+                    resolution=resolution,
+                )
+
+        future.add_done_callback(on_done)
+
+    def _finish(
+        self, job_id: str, status: str, from_statuses: Iterable[str] = ACTIVE_STATUSES, **fields
+    ):
+        if not self._store.transition(
+            job_id, from_statuses, status=status, finished_at=time.time(), **fields
+        ):
+            return  # already finished by another worker
+        job = self._store.get(job_id)
+        print(f"Video job {job_id} {status}.")
+        if self._on_finished:
+            try:
+                self._on_finished(job)
+            except Exception as e:
+                print(f"CRITICAL: Failed to record finished video job {job_id}: {e}")
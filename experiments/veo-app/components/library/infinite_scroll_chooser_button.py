@@ -17,7 +17,7 @@ from typing import Callable, Optional
 
 import mesop as me
 
-from common.metadata import MediaItem, get_media_for_page
+from common.metadata import MediaItem, get_media_page, thumbnail_url
 from components.dialog import dialog
 from components.library.events import LibrarySelectionChangeEvent
 from components.library.infinite_scroll_library import infinite_scroll_library
@@ -30,7 +30,7 @@ class State:
     active_chooser_key: str = ""
     is_loading: bool = False
     media_items: list[MediaItem] = field(default_factory=list)
-    current_page: int = 1
+    next_cursor: Optional[str] = None
     has_more_items: bool = True
 
 
@@ -49,16 +49,16 @@ def infinite_scroll_chooser_button(
         state.active_chooser_key = e.key
         state.show_dialog = True
         state.is_loading = True
-        state.current_page = 1
+        state.next_cursor = None
         state.media_items = []
         state.has_more_items = True
         yield
 
-        items = get_media_for_page(state.current_page, 20, ["images"], sort_by_timestamp=True)
-        state.media_items = items
+        media_page = get_media_page(20, type_filters=["images"])
+        state.media_items = media_page.items
+        state.next_cursor = media_page.next_cursor
+        state.has_more_items = media_page.next_cursor is not None
         state.is_loading = False
-        if not items:
-            state.has_more_items = False
         yield
 
     def handle_load_more(e: me.WebEvent):
@@ -67,14 +67,12 @@ def infinite_scroll_chooser_button(
             return
 
         state.is_loading = True
-        state.current_page += 1
         yield
 
-        new_items = get_media_for_page(state.current_page, 20, ["images"], sort_by_timestamp=True)
-        if new_items:
-            state.media_items.extend(new_items)
-        else:
-            state.has_more_items = False
+        media_page = get_media_page(20, cursor=state.next_cursor, type_filters=["images"])
+        state.media_items.extend(media_page.items)
+        state.next_cursor = media_page.next_cursor
+        state.has_more_items = media_page.next_cursor is not None
         state.is_loading = False
         yield
 
@@ -114,10 +112,14 @@ def infinite_scroll_chooser_button(
                     items_to_render = []
                     for item in state.media_items:
                         if item.gcs_uris:
-                            for uri in item.gcs_uris:
-                                items_to_render.append({"uri": uri})
+                            for i, uri in enumerate(item.gcs_uris):
+                                items_to_render.append(
+                                    {"uri": uri, "thumbnail_url": thumbnail_url(item, i)}
+                                )
                         elif item.gcsuri:
-                            items_to_render.append({"uri": item.gcsuri})
+                            items_to_render.append(
+                                {"uri": item.gcsuri, "thumbnail_url": thumbnail_url(item)}
+                            )
 
                     infinite_scroll_library(
                         key=f"infinite_scroll_{state.active_chooser_key}",
@@ -41,7 +41,7 @@ class InfiniteScrollLibrary extends LitElement {
     return html`
       <div class="container" @scroll=${this._handleScroll}>
         ${this.items.map(item => html`
-          <img src="${this._formatGcsUri(item.uri)}" @click=${() => this._handleImageClick(item.uri)}>
+          <img src="${item.thumbnail_url || this._formatGcsUri(item.uri)}" loading="lazy" @click=${() => this._handleImageClick(item.uri)}>
         `)}
         ${this.hasMoreItems ? html`<div class="loader">Loading...</div>` : ''}
       </div>
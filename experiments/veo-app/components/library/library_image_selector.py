@@ -16,7 +16,7 @@ from typing import Callable, List
 
 import mesop as me
 
-from common.metadata import MediaItem
+from common.metadata import MediaItem, thumbnail_url
 from components.library.events import LibrarySelectionChangeEvent
 
 
@@ -44,16 +44,14 @@ def library_image_selector(
         else:
             for item in media_items:
                 if item.gcs_uris:
-                    for image_uri in item.gcs_uris:
+                    for i, image_uri in enumerate(item.gcs_uris):
                         with me.box(
                             on_click=on_image_click,
                             key=image_uri,
                             style=me.Style(cursor="pointer"),
                         ):
                             me.image(
-                                src=image_uri.replace(
-                                    "gs://", "https://storage.mtls.cloud.google.com/"
-                                ),
+                                src=thumbnail_url(item, i),
                                 style=me.Style(
                                     width="100%",
                                     border_radius=8,
@@ -67,9 +65,7 @@ def library_image_selector(
                         style=me.Style(cursor="pointer"),
                     ):
                         me.image(
-                            src=item.gcsuri.replace(
-                                "gs://", "https://storage.mtls.cloud.google.com/"
-                            ),
+                            src=thumbnail_url(item),
                             style=me.Style(
                                 width="100%",
                                 border_radius=8,
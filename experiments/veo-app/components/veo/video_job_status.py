@@ -0,0 +1,113 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Event handler helpers that follow a queued video job from a page.
+
+Handlers check the job once and return, so no worker thread waits on it.
+While the job runs, the page renders `video_job_timer`, whose tick handler
+calls `refresh_video_job` until the job finishes.
+
+The page state passed in needs the usual video result fields: `is_loading`,
+`result_video`, `timing`, `error_message` and `show_error_dialog`.
+"""
+
+import time
+import typing
+
+import mesop as me
+
+from common.video_jobs import SUCCEEDED
+from config.default import Default
+from models.veo import get_video_job
+
+config = Default()
+
+# Query parameter holding the job being followed, so a reload can resume it
+VIDEO_JOB_QUERY_PARAM = "video_job"
+
+
+@me.web_component(path="./video_job_timer.js")
+def _video_job_timer_component(
+    *,
+    interval_ms: int,
+    on_tick: typing.Callable[[me.WebEvent], None],
+    key: str | None = None,
+):
+    return me.insert_web_component(
+        key=key,
+        name="video-job-timer",
+        properties={"intervalMs": interval_ms},
+        events={"tickEvent": on_tick},
+    )
+
+
+def video_job_timer(state, on_tick: typing.Callable[[me.WebEvent], None]):
+    """Ticks in the browser while the page is following a job."""
+    if state.is_loading and me.query_params.get(VIDEO_JOB_QUERY_PARAM):
+        _video_job_timer_component(
+            interval_ms=int(config.VIDEO_JOB_STATUS_POLL_SECONDS * 1000),
+            on_tick=on_tick,
+        )
+
+
+def follow_video_job(state, job_id: str, user_email: str):
+    """Show a queued video job's status, or its result once it has finished.
+
+    Only the user who queued the job may follow it; anyone else's job is
+    treated as not found. The job logs its own metadata.
+    """
+    job = get_video_job(job_id)
+    if job is not None and job.user_email != user_email:
+        job = None
+    if job is not None and not job.done:
+        if job.started_at:
+            state.timing = f"Generating... {round(time.time() - job.started_at)} seconds"
+        yield
+        return
+
+    if job is None:
+        state.error_message = "The video generation job could not be found."
+        state.show_error_dialog = True
+    elif job.status == SUCCEEDED:
+        state.result_video = job.result_uri
+        if job.generation_time is not None:
+            state.timing = f"Generation time: {round(job.generation_time)} seconds"
+    else:
+        state.error_message = job.error_message or "Video generation failed."
+        state.show_error_dialog = True
+        state.result_video = ""
+
+    if VIDEO_JOB_QUERY_PARAM in me.query_params:
+        del me.query_params[VIDEO_JOB_QUERY_PARAM]
+    state.is_loading = False
+    yield
+
+
+def refresh_video_job(state, user_email: str):
+    """On a timer tick, check the job named in the URL again."""
+    job_id = me.query_params.get(VIDEO_JOB_QUERY_PARAM)
+    if not job_id or not state.is_loading:
+        return
+    yield from follow_video_job(state, job_id, user_email)
+
+
+def resume_video_job(state, user_email: str):
+    """On page load, pick up the job named in the URL, if any."""
+    job_id = me.query_params.get(VIDEO_JOB_QUERY_PARAM)
+    if not job_id:
+        return
+    state.is_loading = True
+    state.show_error_dialog = False
+    state.result_video = ""
+    yield
+    yield from follow_video_job(state, job_id, user_email)
@@ -0,0 +1,40 @@
+/**
+ * Copyright 2025 Google LLC
+ *
+ * Licensed under the Apache License, Version 2.0 (the "License");
+ * you may not use this file except in compliance with the License.
+ * You may obtain a copy of the License at
+ *
+ *     http://www.apache.org/licenses/LICENSE-2.0
+ *
+ * Unless required by applicable law or agreed to in writing, software
+ * distributed under the License is distributed on an "AS IS" BASIS,
+ * WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+ * See the License for the specific language governing permissions and
+ * limitations under the License.
+ */
+
+// Sends a tick event every intervalMs while it is on the page, so a video
+// job's status is checked from the browser instead of a server-side loop.
+class VideoJobTimer extends HTMLElement {
+  connectedCallback() {
+    this._schedule();
+  }
+
+  disconnectedCallback() {
+    clearTimeout(this._timer);
+  }
+
+  _schedule() {
+    clearTimeout(this._timer);
+    this._timer = setTimeout(() => {
+      // Populated by Mesop with the tick handler's ID.
+      if (this.tickEvent) {
+        this.dispatchEvent(new MesopEvent(this.tickEvent, {}));
+      }
+      this._schedule();
+    }, this.intervalMs || 3000);
+  }
+}
+
+customElements.define('video-job-timer', VideoJobTimer);
@@ -70,12 +70,36 @@ class Default:
         "SESSIONS_COLLECTION_NAME",
         "sessions",
     )
+    GENMEDIA_COUNTERS_COLLECTION_NAME: str = os.environ.get(
+        "GENMEDIA_COUNTERS_COLLECTION_NAME",
+        "genmedia_counters",
+    )
+    UPLOADS_COLLECTION_NAME: str = os.environ.get(
+        "UPLOADS_COLLECTION_NAME",
+        "genmedia_uploads",
+    )
+    MEDIA_COUNTER_SHARDS: int = int(os.environ.get("MEDIA_COUNTER_SHARDS", "10"))
+    MEDIA_COUNT_CACHE_SECONDS: float = float(os.environ.get("MEDIA_COUNT_CACHE_SECONDS", "60"))
+    # Library item and page caches; set the TTL to 0 to disable them
+    MEDIA_CACHE_TTL_SECONDS: float = float(os.environ.get("MEDIA_CACHE_TTL_SECONDS", "60"))
+    MEDIA_CACHE_MAX_BYTES: int = int(os.environ.get("MEDIA_CACHE_MAX_BYTES", str(32 * 1024 * 1024)))
 
     # storage
     GENMEDIA_BUCKET: str = os.environ.get("GENMEDIA_BUCKET", f"{PROJECT_ID}-assets")
     VIDEO_BUCKET: str = os.environ.get("VIDEO_BUCKET", f"{PROJECT_ID}-assets/videos")
     IMAGE_BUCKET: str = os.environ.get("IMAGE_BUCKET", f"{PROJECT_ID}-assets/images")
     GCS_ASSETS_BUCKET: str = os.environ.get("GCS_ASSETS_BUCKET")
+    # HTTP connections kept open by the shared storage client
+    STORAGE_MAX_CONNECTIONS: int = int(os.environ.get("STORAGE_MAX_CONNECTIONS", "32"))
+    # Uploads larger than this go up as resumable uploads in chunks of GCS_UPLOAD_CHUNK_SIZE
+    GCS_RESUMABLE_THRESHOLD: int = int(os.environ.get("GCS_RESUMABLE_THRESHOLD", str(8 * 1024 * 1024)))
+    GCS_UPLOAD_CHUNK_SIZE: int = int(os.environ.get("GCS_UPLOAD_CHUNK_SIZE", str(8 * 1024 * 1024)))
+    GCS_UPLOAD_WORKERS: int = int(os.environ.get("GCS_UPLOAD_WORKERS", "8"))
+    GCS_UPLOAD_ATTEMPTS: int = int(os.environ.get("GCS_UPLOAD_ATTEMPTS", "3"))
+    # Library grid previews
+    THUMBNAIL_SIZE: int = int(os.environ.get("THUMBNAIL_SIZE", "320"))
+    THUMBNAIL_WEBP_QUALITY: int = int(os.environ.get("THUMBNAIL_WEBP_QUALITY", "80"))
+    THUMBNAIL_WORKERS: int = int(os.environ.get("THUMBNAIL_WORKERS", "4"))
 
     # Veo
     VEO_MODEL_ID: str = os.environ.get("VEO_MODEL_ID", "veo-2.0-generate-001")
@@ -87,6 +111,20 @@ class Default:
     )
     VEO_EXP_PROJECT_ID: str = os.environ.get("VEO_EXP_PROJECT_ID", PROJECT_ID)
 
+    # Long-running operation polling: fast at first, backing off to the max
+    VEO_POLL_INITIAL_SECONDS: float = float(os.environ.get("VEO_POLL_INITIAL_SECONDS", "5"))
+    VEO_POLL_MAX_SECONDS: float = float(os.environ.get("VEO_POLL_MAX_SECONDS", "30"))
+    VEO_POLL_BACKOFF: float = float(os.environ.get("VEO_POLL_BACKOFF", "1.5"))
+    VEO_POLL_TIMEOUT_SECONDS: float = float(os.environ.get("VEO_POLL_TIMEOUT_SECONDS", "1200"))
+    VEO_POLL_MAX_CONCURRENT_GETS: int = int(os.environ.get("VEO_POLL_MAX_CONCURRENT_GETS", "16"))
+
+    # Video job queue: "firestore", or "sqlite" for local runs
+    VIDEO_JOB_STORE: str = os.environ.get("VIDEO_JOB_STORE", "firestore")
+    VIDEO_JOBS_COLLECTION_NAME: str = os.environ.get("VIDEO_JOBS_COLLECTION_NAME", "video_jobs")
+    VIDEO_JOB_SQLITE_PATH: str = os.environ.get("VIDEO_JOB_SQLITE_PATH", "video_jobs.sqlite3")
+    VIDEO_JOB_WORKERS: int = int(os.environ.get("VIDEO_JOB_WORKERS", "4"))
+    VIDEO_JOB_STATUS_POLL_SECONDS: float = float(os.environ.get("VIDEO_JOB_STATUS_POLL_SECONDS", "3"))
+
     # VTO
     VTO_MODEL_ID: str = os.environ.get("VTO_MODEL_ID", "virtual-try-on-preview-08-04")
 
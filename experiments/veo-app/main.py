@@ -28,8 +28,10 @@ from pydantic import BaseModel
 
 from app_factory import app
 from components.page_scaffold import page_scaffold
+from models.veo import get_video_job_queue
 from pages.about import about_page_content
 from pages.character_consistency import character_consistency_page_content
+from pages.character_consistency import on_load as on_load_character_consistency
 from pages.config import config_page_contents
 from pages.edit_images import content as edit_images_content
 from pages.home import home_page_content
@@ -37,6 +39,7 @@ from pages.imagen import imagen_content
 from pages.library import library_content
 from pages.lyria import lyria_content
 from pages.portraits import motion_portraits_content
+from pages.portraits import on_load as on_load_motion_portraits
 from pages.recontextualize import recontextualize
 from pages.test_infinite_scroll import test_infinite_scroll_page
 from pages.test_uploader import test_uploader_page
@@ -44,6 +47,7 @@ from pages.test_vto_prompt_generator import page as test_vto_prompt_generator_pa
 from pages.test_index import page as test_index_page
 from pages.test_character_consistency import page as test_character_consistency_page
 from pages.test_gemini_image_gen import page as test_gemini_image_gen_page
+from pages.veo import on_load as on_load_veo
 from pages.veo import veo_content
 from pages.vto import vto
 from state.state import AppState
@@ -108,6 +112,7 @@ def home_page():
 @me.page(
     path="/veo",
     title="Veo - GenMedia Creative Studio",
+    on_load=on_load_veo,
 )
 def veo_page():
     """Veo Page."""
@@ -117,6 +122,7 @@ def veo_page():
 @me.page(
     path="/motion_portraits",
     title="Motion Portraits - GenMedia Creative Studio",
+    on_load=on_load_motion_portraits,
 )
 def motion_portrait_page():
     """Motion Portrait Page."""
@@ -195,6 +201,7 @@ def recontextualize_page():
 @me.page(
     path="/character_consistency",
     title="GenMedia Creative Studio - Character Consistency",
+    on_load=on_load_character_consistency,
 )
 def character_consistency_page():
     """Character Consistency Page"""
@@ -210,6 +217,15 @@ def about_page():
     about_page_content()
 
 
+@app.on_event("startup")
+def resume_video_jobs():
+    """Pick up video jobs that were queued or running when the last instance stopped."""
+    try:
+        get_video_job_queue().resume()
+    except Exception as e:
+        print(f"Error resuming video jobs: {e}")
+
+
 @app.get("/")
 def root_redirect() -> RedirectResponse:
     return RedirectResponse(url="/home")
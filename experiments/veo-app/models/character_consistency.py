@@ -27,9 +27,11 @@ from google.genai import types
 from google.genai.types import GenerateContentConfig
 from PIL import Image as PIL_Image
 
-from common.metadata import MediaItem, add_media_item_to_firestore
-from common.storage import download_from_gcs, store_to_gcs
+from common.clients import get_genai_client
+from common.metadata import MediaItem
+from common.storage import GCSUpload, download_from_gcs, store_many_to_gcs, store_to_gcs
 from config.default import Default
+from config.veo_models import VEO_MODELS
 
 from models.gemini import (
     get_facial_composite_profile,
@@ -38,6 +40,8 @@ from models.gemini import (
     select_best_image,
     generate_image_from_prompt_and_images,
 )
+from models.requests import VideoGenerationRequest
+from models.veo import enqueue_video_generation
 from .character_consistency_models import (
     BestImage,
     FacialCompositeProfile,
@@ -213,34 +217,16 @@ def generate_character_video(
         data={"outpainted_image_gcs_uri": outpainted_image_gcs_uri, "outpainted_image_bytes": outpainted_image_bytes},
     )
 
-    # Step 7: Generate Video
+    # Step 7: Queue the video
     step_start_time = time.time()
     yield WorkflowStepResult(
         step_name="generate_video",
         status="processing",
-        message="Step 7 of 7: Generating final video with Veo...",
+        message="Step 7 of 7: Queuing the final video with Veo...",
         duration_seconds=0,
         data={},
     )
-    video_bytes, veo_prompt = _generate_video_from_image(outpainted_image_bytes, scene_prompt)
-    video_gcs_uri = store_to_gcs(
-        folder="character_consistency_videos",
-        file_name=f"video_{uuid.uuid4()}.mp4",
-        mime_type="video/mp4",
-        contents=video_bytes,
-    )
-    step_duration = time.time() - step_start_time
-    yield WorkflowStepResult(
-        step_name="generate_video",
-        status="complete",
-        message="Final video generated.",
-        duration_seconds=step_duration,
-        data={"video_gcs_uri": video_gcs_uri, "veo_prompt": veo_prompt},
-    )
-
-    # Step 8: Save all metadata and artifacts to Firestore
-    total_duration = time.time() - total_start_time
-    logger.info("Step 8: Saving metadata to Firestore...")
+    # The job logs this item, with the video and its generation time, when it finishes
     new_item = MediaItem(
         user_email=user_email,
         media_type="character_consistency",
@@ -254,16 +240,28 @@ def generate_character_video(
         candidate_images=candidate_image_gcs_uris,
         best_candidate_image=best_image_gcs_uri,
         outpainted_image=outpainted_image_gcs_uri,
-        gcsuri=video_gcs_uri,
-        veo_prompt=veo_prompt,
-        generation_time=total_duration,
     )
-    add_media_item_to_firestore(new_item)
-    logger.info("Workflow complete in %.2f seconds. MediaItem ID: %s", total_duration, new_item.id)
+    video_job_id, veo_prompt = _queue_video_from_image(
+        outpainted_image_bytes, outpainted_image_gcs_uri, scene_prompt, new_item
+    )
+    step_duration = time.time() - step_start_time
+    yield WorkflowStepResult(
+        step_name="generate_video",
+        status="queued",
+        message="Final video queued.",
+        duration_seconds=step_duration,
+        data={"video_job_id": video_job_id, "veo_prompt": veo_prompt},
+    )
+    logger.info(
+        "Workflow queued video job %s after %.2f seconds.",
+        video_job_id,
+        time.time() - total_start_time,
+    )
+
 
 def _generate_imagen_candidates(reference_image_bytes_list, all_descriptions, final_prompt, negative_prompt):
     """Generates candidate images with Imagen."""
-    client = genai.Client(vertexai=True, project=cfg.PROJECT_ID, location=cfg.LOCATION)
+    client = get_genai_client(cfg.PROJECT_ID, cfg.LOCATION)
     edit_model = cfg.CHARACTER_CONSISTENCY_IMAGEN_MODEL
     reference_images_for_generation = []
     for i, image_bytes in enumerate(reference_image_bytes_list[:4]):
@@ -291,31 +289,40 @@ def _generate_imagen_candidates(reference_image_bytes_list, all_descriptions, fi
             negative_prompt=negative_prompt,
         ),
     )
-    candidate_image_gcs_uris = []
-    candidate_image_bytes_list = []
-    for i, image in enumerate(response.generated_images):
-        image_bytes = image.image.image_bytes
-        gcs_uri = store_to_gcs(
+    candidate_image_bytes_list = [image.image.image_bytes for image in response.generated_images]
+    uploads = [
+        GCSUpload(
             folder="character_consistency_candidates",
             file_name=f"candidate_{uuid.uuid4()}_{i}.png",
             mime_type="image/png",
             contents=image_bytes,
         )
-        candidate_image_gcs_uris.append(gcs_uri)
-        candidate_image_bytes_list.append(image_bytes)
+        for i, image_bytes in enumerate(candidate_image_bytes_list)
+    ]
+    candidate_image_gcs_uris = [result.uri for result in store_many_to_gcs(uploads)]
     return candidate_image_gcs_uris, candidate_image_bytes_list
 
 
-def _generate_video_from_image(
-    image_bytes: bytes, provided_prompt: str | None = None
-) -> tuple[bytes, str]:
-    """Generates a video from an image."""
-    gemini_client = genai.Client(
-        vertexai=True, project=cfg.PROJECT_ID, location=cfg.LOCATION
-    )
-    veo_client = genai.Client(
-        vertexai=True, project=cfg.PROJECT_ID, location=cfg.LOCATION
-    )
+def _veo_version_id(model_name: str) -> str:
+    """The Veo model version ID the video job queue uses for a model name."""
+    for model in VEO_MODELS:
+        if model.model_name == model_name:
+            return model.version_id
+    raise ValueError(f"Unsupported Veo model for character consistency: {model_name}")
+
+
+def _queue_video_from_image(
+    image_bytes: bytes,
+    image_gcs_uri: str,
+    provided_prompt: str | None,
+    media_item: MediaItem,
+) -> tuple[str, str]:
+    """Queues a video generation job for an image; returns (job ID, Veo prompt).
+
+    The job runs on the shared video job queue, which follows the operation
+    from the shared poller and logs `media_item` when the video is ready.
+    """
+    gemini_client = get_genai_client(cfg.PROJECT_ID, cfg.LOCATION)
 
     pil_image = PIL_Image.open(io.BytesIO(image_bytes))
     width, height = pil_image.size
@@ -339,39 +346,25 @@ def _generate_video_from_image(
     )
     video_prompt = video_prompt_response.text.strip()
 
-    input_image = genai.types.Image(image_bytes=image_bytes, mime_type="image/png")
-
-    operation = veo_client.models.generate_videos(
-        model=cfg.CHARACTER_CONSISTENCY_VEO_MODEL,
+    request = VideoGenerationRequest(
         prompt=video_prompt,
-        config=genai.types.GenerateVideosConfig(
-            duration_seconds=8,
-            aspect_ratio=aspect_ratio,
-            number_of_videos=1,
-            enhance_prompt=True,
-            person_generation="allow_adult",
-        ),
-        image=input_image,
+        duration_seconds=8,
+        aspect_ratio=aspect_ratio,
+        resolution="720p",
+        enhance_prompt=True,
+        model_version_id=_veo_version_id(cfg.CHARACTER_CONSISTENCY_VEO_MODEL),
+        person_generation="Allow (Adults only)",
+        reference_image_gcs=image_gcs_uri,
+        reference_image_mime_type="image/png",
     )
-
-    # This is a long running operation, we should not block here in a real app
-    # For this example, we will wait for it to complete
-    import time
-
-    while not operation.done:
-        time.sleep(10)
-        operation = veo_client.operations.get(operation)
-
-    if operation.error:
-        raise Exception(f"Error generating video: {operation.error}")
-
-    return operation.response.generated_videos[0].video.video_bytes, video_prompt
+    media_item.veo_prompt = video_prompt
+    return enqueue_video_generation(request, media_item), video_prompt
 
 def _outpaint_image(image_bytes: bytes, prompt: str) -> bytes:
     """
     Performs outpainting on an image to a 16:9 aspect ratio.
     """
-    client = genai.Client(vertexai=True, project=cfg.PROJECT_ID, location=cfg.LOCATION)
+    client = get_genai_client(cfg.PROJECT_ID, cfg.LOCATION)
     edit_model = cfg.CHARACTER_CONSISTENCY_IMAGEN_MODEL
 
     initial_image = PIL_Image.open(io.BytesIO(image_bytes))
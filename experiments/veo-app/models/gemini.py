@@ -29,7 +29,7 @@ from tenacity import (
 )
 
 from common.error_handling import GenerationError
-from common.storage import store_to_gcs
+from common.storage import GCSUpload, store_many_to_gcs
 from config.default import Default  # Import Default for cfg
 from config.rewriters import MAGAZINE_EDITOR_PROMPT, REWRITER_PROMPT
 from models.character_consistency_models import (
@@ -60,7 +60,7 @@ def generate_image_from_prompt_and_images(prompt: str, images: list[str]) -> lis
         ),
     )
 
-    gcs_uris = []
+    uploads = []
     if response.candidates and response.candidates[0].content and response.candidates[0].content.parts:
         print(f"generate_image_from_prompt_and_images: {len(response.candidates[0].content.parts)} parts")
         for i, part in enumerate(response.candidates[0].content.parts):
@@ -71,16 +71,17 @@ def generate_image_from_prompt_and_images(prompt: str, images: list[str]) -> lis
                 mime_type = "image/png"
                 if hasattr(part.inline_data, "mime_type") and part.inline_data.mime_type:
                     mime_type = part.inline_data.mime_type
-                gcs_uri = store_to_gcs(
-                    folder="character_consistency_candidates",
-                    file_name=f"candidate_{uuid.uuid4()}_{i}.png",
-                    mime_type=mime_type,
-                    contents=part.inline_data.data,
+                uploads.append(
+                    GCSUpload(
+                        folder="character_consistency_candidates",
+                        file_name=f"candidate_{uuid.uuid4()}_{i}.png",
+                        mime_type=mime_type,
+                        contents=part.inline_data.data,
+                    )
                 )
-                gcs_uris.append(gcs_uri)
     else:
         print("generate_image_from_prompt_and_images: no images")
-    return gcs_uris
+    return [result.uri for result in store_many_to_gcs(uploads)]
 
 
 # Initialize client and default model ID for rewriter
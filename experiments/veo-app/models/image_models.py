@@ -17,7 +17,6 @@
 # from google.cloud.aiplatform import telemetry
 # from typing import TypedDict # Remove if not used elsewhere in this file
 
-import base64
 import uuid
 
 # from models.model_setup import (
@@ -26,8 +25,6 @@ import uuid
 from typing import Optional
 
 from dotenv import load_dotenv
-from google import genai
-from google.cloud import aiplatform
 from google.genai import types
 from tenacity import (
     retry,
@@ -36,7 +33,8 @@ from tenacity import (
     wait_exponential,
 )
 
-from common.storage import store_to_gcs
+from common.clients import get_genai_client, get_prediction_client
+from common.storage import GCSUpload, store_many_to_gcs
 from config.default import Default
 
 # class ImageModel(TypedDict): # Remove this definition
@@ -65,13 +63,8 @@ class ImagenModelSetup:
             model_id = config.MODEL_ID
         if None in [project_id, location, model_id]:
             raise ValueError("All parameters must be set.")
-        print(f"initiating genai client with {project_id} in {location}")
-        client = genai.Client(
-            vertexai=config.INIT_VERTEX,
-            project=project_id,
-            location=location,
-        )
-        return client
+        # Shared across requests; created once per project and location
+        return get_genai_client(project_id, location)
 
 
 @retry(
@@ -253,8 +246,7 @@ def recontextualize_product_in_scene(
 ) -> list[str]:
     """Recontextualizes a product in a scene and returns a list of GCS URIs."""
     cfg = Default()
-    client_options = {"api_endpoint": f"{cfg.LOCATION}-aiplatform.googleapis.com"}
-    client = aiplatform.gapic.PredictionServiceClient(client_options=client_options)
+    client = get_prediction_client(cfg.LOCATION)
 
     model_endpoint = f"projects/{cfg.PROJECT_ID}/locations/{cfg.LOCATION}/publishers/google/models/{cfg.MODEL_IMAGEN_PRODUCT_RECONTEXT}"
 
@@ -272,22 +264,18 @@ def recontextualize_product_in_scene(
         endpoint=model_endpoint, instances=[instance], parameters=parameters
     )
 
-    gcs_uris = []
-    for prediction in response.predictions:
-        if prediction.get("bytesBase64Encoded"):
-            encoded_mask_string = prediction["bytesBase64Encoded"]
-            mask_bytes = base64.b64decode(encoded_mask_string)
-
-            gcs_uri = store_to_gcs(
-                folder="recontext_results",
-                file_name=f"recontext_result_{uuid.uuid4()}.png",
-                mime_type="image/png",
-                contents=mask_bytes,
-                decode=False,
-            )
-            gcs_uris.append(gcs_uri)
-
-    return gcs_uris
+    uploads = [
+        GCSUpload(
+            folder="recontext_results",
+            file_name=f"recontext_result_{uuid.uuid4()}.png",
+            mime_type="image/png",
+            contents=prediction["bytesBase64Encoded"],
+            decode=True,
+        )
+        for prediction in response.predictions
+        if prediction.get("bytesBase64Encoded")
+    ]
+    return [result.uri for result in store_many_to_gcs(uploads)]
 
 
 @retry(
@@ -21,6 +21,7 @@ from google.cloud import aiplatform # storage import removed
 # from google.cloud import storage # No longer needed here
 
 from config.default import Default
+from common.clients import get_prediction_client
 from common.storage import store_to_gcs # Import the common function
 
 # Initialize Configuration
@@ -49,11 +50,9 @@ def generate_music_with_lyria(prompt: str):
     instances = [{"prompt": prompt}] # Simplified instance creation
     parameters = {"sampleCount": 1}
 
-    api_regional_endpoint = f"{LOCATION}-aiplatform.googleapis.com"
-    client_options = {"api_endpoint": api_regional_endpoint}
     # It's good practice to handle client creation within a try/except if it can fail
     try:
-        client = aiplatform.gapic.PredictionServiceClient(client_options=client_options)
+        client = get_prediction_client(LOCATION)
     except Exception as client_err:
         print(f"Failed to create PredictionServiceClient: {client_err}")
         raise ValueError(f"Configuration error: Failed to initialize prediction client. Details: {str(client_err)}") from client_err
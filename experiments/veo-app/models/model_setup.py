@@ -14,7 +14,7 @@
 
 from typing import Optional
 from dotenv import load_dotenv
-from google import genai
+from common.clients import get_genai_client
 from config.default import Default
 
 import vertexai
@@ -75,11 +75,6 @@ class GeminiModelSetup:
         if not effective_project_id or not effective_location:
             raise ValueError("Project ID and Location must be set for Gemini client.")
 
-        print(f"Initiating Gemini client for project {effective_project_id} in {effective_location}")
-        client = genai.Client(
-            vertexai=config.INIT_VERTEX, # This assumes vertexai backend is desired.
-            project=effective_project_id,
-            location=effective_location,
-        )
-        return client
+        # Shared across callers; created once per project and location
+        return get_genai_client(effective_project_id, effective_location)
 
@@ -12,14 +12,26 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import concurrent.futures
+import dataclasses
+import datetime
 import os
-import time
+import threading
+from typing import Optional
 
 from dotenv import load_dotenv
-from google import genai
 from google.genai import types
 
+from common.clients import get_genai_client, get_storage_client
 from common.error_handling import GenerationError
+from common.metadata import MediaItem, add_media_item_to_firestore, db
+from common.operation_poller import operation_poller
+from common.video_jobs import (
+    FirestoreJobStore,
+    SQLiteJobStore,
+    VideoJob,
+    VideoJobQueue,
+)
 from config.default import Default
 from config.veo_models import get_veo_model_config
 from models.requests import VideoGenerationRequest
@@ -29,9 +41,7 @@ config = Default()
 
 load_dotenv(override=True)
 
-client = genai.Client(
-    vertexai=True, project=config.VEO_PROJECT_ID, location=config.LOCATION,
-)
+client = get_genai_client(config.VEO_PROJECT_ID, config.LOCATION)
 
 # Map for person generation options
 PERSON_GENERATION_MAP = {
@@ -40,9 +50,11 @@ PERSON_GENERATION_MAP = {
     "Don't Allow": "dont_allow",
 }
 
-def generate_video(request: VideoGenerationRequest) -> tuple[str, str]:
-    """Generate a video based on a request object using the genai SDK.
+def start_video_operation(request: VideoGenerationRequest, output_gcs_uri: Optional[str] = None):
+    """Start a Veo long-running operation for a request and return it.
+
     This function handles text-to-video, image-to-video, and interpolation.
+    The video is written under output_gcs_uri, or the video bucket if None.
     """
     model_config = get_veo_model_config(request.model_version_id)
     if not model_config:
@@ -58,7 +70,7 @@ def generate_video(request: VideoGenerationRequest) -> tuple[str, str]:
         "number_of_videos": 1,
         "duration_seconds": request.duration_seconds,
         "enhance_prompt": enhance_prompt_for_api,
-        "output_gcs_uri": f"gs://{config.VIDEO_BUCKET}",
+        "output_gcs_uri": output_gcs_uri or f"gs://{config.VIDEO_BUCKET}",
         "resolution": request.resolution,
         "person_generation": PERSON_GENERATION_MAP.get(
             request.person_generation, "allow_all"
@@ -101,42 +113,150 @@ def generate_video(request: VideoGenerationRequest) -> tuple[str, str]:
             config=gen_config,
             image=image_input,
         )
+    except Exception as e:
+        print(f"An unexpected error occurred in generate_video: {e}")
+        raise GenerationError(f"An unexpected error occurred: {e}") from e
+    return operation
 
-        print("Polling video generation operation...")
-        while not operation.done:
-            time.sleep(10)
-            operation = client.operations.get(operation)
-            print(f"Operation in progress: {operation.name}")
-
-        if operation.error:
-            error_details = str(operation.error)
-            print(f"Video generation failed with error: {error_details}")
-            raise GenerationError(f"API Error: {error_details}")
-
-        if operation.response:
-            if (
-                hasattr(operation.result, "rai_media_filtered_count")
-                and operation.result.rai_media_filtered_count > 0
-            ):
-                filter_reason = operation.result.rai_media_filtered_reasons[0]
-                raise GenerationError(f"Content Filtered: {filter_reason}")
-
-            if (
-                hasattr(operation.result, "generated_videos")
-                and operation.result.generated_videos
-            ):
-                video_uri = operation.result.generated_videos[0].video.uri
-                print(f"Successfully generated video: {video_uri}")
-                return video_uri, request.resolution
-            else:
-                raise GenerationError(
-                    "API reported success but no video URI was found in the response."
-                )
+
+def watch_video_operation(operation, request: VideoGenerationRequest) -> concurrent.futures.Future:
+    """Return a future for (video_uri, resolution) of a started Veo operation.
+
+    `operation` may be the operation object or just its name, e.g. one saved
+    before a restart. It is polled by the shared operation poller, so no
+    thread is held while the video renders.
+    """
+    if isinstance(operation, str):
+        operation = types.GenerateVideosOperation(name=operation)
+    print(f"Polling video generation operation {operation.name}...")
+    result: concurrent.futures.Future = concurrent.futures.Future()
+
+    def on_operation_done(polled: concurrent.futures.Future):
+        try:
+            result.set_result(_video_from_operation(polled.result(), request))
+        except GenerationError as ge:
+            result.set_exception(ge)
+        except Exception as e:
+            print(f"An unexpected error occurred in generate_video: {e}")
+            result.set_exception(GenerationError(f"An unexpected error occurred: {e}"))
+
+    operation_poller.submit(operation, client).add_done_callback(on_operation_done)
+    return result
+
+
+def video_job_output_uri(job_id: str) -> str:
+    """The folder a queued job's video is written to, so a restart can find it."""
+    return f"gs://{config.VIDEO_BUCKET}/jobs/{job_id}"
+
+
+def find_video_output(output_gcs_uri: str, request: VideoGenerationRequest) -> Optional[tuple[str, str]]:
+    """(video_uri, resolution) of a video already written under output_gcs_uri, or None."""
+    bucket_name, _, prefix = output_gcs_uri.removeprefix("gs://").partition("/")
+    for blob in get_storage_client().list_blobs(bucket_name, prefix=f"{prefix}/"):
+        if blob.name.endswith(".mp4"):
+            return f"gs://{bucket_name}/{blob.name}", request.resolution
+    return None
+
+
+def submit_video_generation(request: VideoGenerationRequest) -> concurrent.futures.Future:
+    """Start generating a video and return a future for (video_uri, resolution)."""
+    return watch_video_operation(start_video_operation(request), request)
+
+
+def _video_from_operation(operation, request: VideoGenerationRequest) -> tuple[str, str]:
+    """Extract (video_uri, resolution) from a finished Veo operation."""
+    if operation.error:
+        error_details = str(operation.error)
+        print(f"Video generation failed with error: {error_details}")
+        raise GenerationError(f"API Error: {error_details}")
+
+    if operation.response:
+        if (
+            hasattr(operation.result, "rai_media_filtered_count")
+            and operation.result.rai_media_filtered_count > 0
+        ):
+            filter_reason = operation.result.rai_media_filtered_reasons[0]
+            raise GenerationError(f"Content Filtered: {filter_reason}")
+
+        if (
+            hasattr(operation.result, "generated_videos")
+            and operation.result.generated_videos
+        ):
+            video_uri = operation.result.generated_videos[0].video.uri
+            print(f"Successfully generated video: {video_uri}")
+            return video_uri, request.resolution
         else:
             raise GenerationError(
-                "Unexpected API response structure or operation not done."
+                "API reported success but no video URI was found in the response."
+            )
+    else:
+        raise GenerationError(
+            "Unexpected API response structure or operation not done."
+        )
+
+
+def generate_video(request: VideoGenerationRequest) -> tuple[str, str]:
+    """Generate a video based on a request object using the genai SDK.
+    This function handles text-to-video, image-to-video, and interpolation.
+
+    Blocks until the video is ready, so it is for scripts and tests; pages
+    queue a job with `enqueue_video_generation` instead.
+    """
+    return submit_video_generation(request).result()
+
+
+_video_job_queue: Optional[VideoJobQueue] = None
+_video_job_queue_lock = threading.Lock()
+
+
+def _log_finished_video_job(job: VideoJob):
+    """Log a finished video job to the library, as the page used to after generating."""
+    media_item = MediaItem(**job.media_item)
+    media_item.gcsuri = job.result_uri
+    if job.resolution:
+        media_item.resolution = job.resolution
+    media_item.error_message = job.error_message
+    media_item.generation_time = job.generation_time
+    add_media_item_to_firestore(media_item)
+
+
+def get_video_job_queue() -> VideoJobQueue:
+    """The process-wide video job queue, created on first use."""
+    global _video_job_queue
+    with _video_job_queue_lock:
+        if _video_job_queue is None:
+            if config.VIDEO_JOB_STORE == "sqlite":
+                store = SQLiteJobStore(config.VIDEO_JOB_SQLITE_PATH)
+            else:
+                store = FirestoreJobStore(db, config.VIDEO_JOBS_COLLECTION_NAME)
+            _video_job_queue = VideoJobQueue(
+                store,
+                start_operation=start_video_operation,
+                watch_operation=watch_video_operation,
+                request_type=VideoGenerationRequest,
+                on_finished=_log_finished_video_job,
+                max_workers=config.VIDEO_JOB_WORKERS,
+                output_uri_for=video_job_output_uri,
+                find_output=find_video_output,
             )
+        return _video_job_queue
 
-    except Exception as e:
-        print(f"An unexpected error occurred in generate_video: {e}")
-        raise GenerationError(f"An unexpected error occurred: {e}") from e
\ No newline at end of file
+
+def enqueue_video_generation(request: VideoGenerationRequest, media_item: MediaItem) -> str:
+    """Queue a video generation job; the media item is logged when it finishes.
+
+    Returns the job ID for `get_video_job_queue().get`.
+    """
+    item_data = {
+        f.name: getattr(media_item, f.name)
+        for f in dataclasses.fields(media_item)
+        if f.name not in ("id", "raw_data")
+    }
+    if isinstance(item_data.get("timestamp"), datetime.datetime):
+        item_data["timestamp"] = item_data["timestamp"].isoformat()
+    return get_video_job_queue().enqueue(request, media_item.user_email, item_data)
+
+
+def get_video_job(job_id: str) -> Optional[VideoJob]:
+    """The job's current state, or None if it is not found."""
+    return get_video_job_queue().get(job_id)
@@ -12,15 +12,14 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
-import base64
 import logging
 import uuid
 
 from google import genai
 from google.api_core.exceptions import GoogleAPIError
-from google.cloud import aiplatform
 
-from common.storage import store_to_gcs
+from common.clients import get_prediction_client
+from common.storage import GCSUpload, store_many_to_gcs
 from config.default import Default
 from models.model_setup import GeminiModelSetup
 
@@ -65,8 +64,7 @@ def generate_vto_image(
     """Generates a VTO image."""
 
     try:
-        client_options = {"api_endpoint": f"{cfg.LOCATION}-aiplatform.googleapis.com"}
-        client = aiplatform.gapic.PredictionServiceClient(client_options=client_options)
+        client = get_prediction_client(cfg.LOCATION)
     except Exception as client_err:
         print(f"Failed to create PredictionServiceClient: {client_err}")
         raise ValueError(
@@ -113,25 +111,23 @@ def generate_vto_image(
                 "VTO API returned an unexpected response (no predictions)."
             )
 
-        gcs_uris = []
+        uploads = []
         unique_id = uuid.uuid4()
         for i, prediction in enumerate(response.predictions):
             if not prediction.get("bytesBase64Encoded"):
                 raise ValueError("VTO API returned a prediction with no image data.")
 
-            encoded_mask_string = prediction["bytesBase64Encoded"]
-            mask_bytes = base64.b64decode(encoded_mask_string)
-
-            gcs_uri = store_to_gcs(
-                folder="vto_results",
-                file_name=f"vto_result_{unique_id}-{i}_.png",
-                mime_type="image/png",
-                contents=mask_bytes,
-                decode=False,
+            uploads.append(
+                GCSUpload(
+                    folder="vto_results",
+                    file_name=f"vto_result_{unique_id}-{i}_.png",
+                    mime_type="image/png",
+                    contents=prediction["bytesBase64Encoded"],
+                    decode=True,
+                )
             )
-            gcs_uris.append(gcs_uri)
 
-        return gcs_uris
+        return [result.uri for result in store_many_to_gcs(uploads)]
 
     except GoogleAPIError as e:
         logging.error("VTO API Error: %s", e)
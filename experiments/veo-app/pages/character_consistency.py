@@ -15,11 +15,19 @@
 from dataclasses import field
 
 import mesop as me
+from mesop.events import LoadEvent
 
 from common.metadata import get_media_item_by_id
 from common.storage import store_to_gcs
 from components.header import header
 from components.page_scaffold import page_frame, page_scaffold
+from components.veo.video_job_status import (
+    VIDEO_JOB_QUERY_PARAM,
+    follow_video_job,
+    refresh_video_job,
+    resume_video_job,
+    video_job_timer,
+)
 from models.character_consistency import generate_character_video
 from state.character_consistency_state import CharacterConsistencyState
 from state.state import AppState
@@ -36,11 +44,17 @@ class PageState:
     candidate_image_urls: list[str] = field(default_factory=list) # pylint: disable=invalid-field-call
     best_image_url: str = ""
     outpainted_image_url: str = ""
-    final_video_url: str = ""
     status_message: str = "Ready."
     is_generating: bool = False
     total_generation_time: float = 0.0
 
+    # The final video's job, followed with components.veo.video_job_status
+    is_loading: bool = False
+    result_video: str = ""
+    timing: str = ""
+    error_message: str = ""
+    show_error_dialog: bool = False
+
     info_dialog_open: bool = False
 
 
@@ -92,13 +106,13 @@ def character_consistency_page_content():
                 me.button(
                     "Generate",
                     on_click=on_generate_click,
-                    disabled=state.is_generating,
+                    disabled=state.is_generating or state.is_loading,
                     type="flat",
                 )
                 me.button(
                     "Clear",
                     on_click=on_clear,
-                    disabled=state.is_generating,
+                    disabled=state.is_generating or state.is_loading,
                     type="stroked",
                 )
 
@@ -151,12 +165,22 @@ def character_consistency_page_content():
                         )
 
             with me.box(style=me.Style(display="flex", flex_direction="row", gap=16, justify_content="center")):
-                if state.final_video_url:
+                if state.is_loading:
+                    with me.box(style=me.Style(display="flex", flex_direction="column", gap=12, align_items="center")):
+                        me.text(state.timing or "Generating the final video...")
+                        me.progress_spinner(diameter=40)
+                        video_job_timer(state, on_video_job_tick)
+                elif state.result_video:
                     with me.box(style=me.Style(display="flex", flex_direction="column", gap=12, justify_content="center")):
                         me.text("Final Video", type="headline-5")
                         me.video(
-                            src=state.final_video_url, style=me.Style(width=600, height=338)
+                            src=state.result_video.replace("gs://", "https://storage.mtls.cloud.google.com/"),
+                            style=me.Style(width=600, height=338),
                         )
+                        if state.timing:
+                            me.text(state.timing)
+                elif state.show_error_dialog:
+                    me.text(state.error_message, style=me.Style(color=me.theme_var("error")))
 
 def on_upload(e: me.UploadEvent):
     """Handle image uploads."""
@@ -186,9 +210,12 @@ def on_generate_click(e: me.ClickEvent):
     state.candidate_image_urls = []
     state.best_image_url = ""
     state.outpainted_image_url = ""
-    state.final_video_url = ""
+    state.result_video = ""
+    state.timing = ""
+    state.show_error_dialog = False
     yield
 
+    video_job_id = None
     try:
         for step_result in generate_character_video(
             user_email=app_state.user_email,
@@ -207,17 +234,34 @@ def on_generate_click(e: me.ClickEvent):
                     state.best_image_url = step_result.data["best_image_gcs_uri"].replace("gs://", "https://storage.mtls.cloud.google.com/")
                 if "outpainted_image_gcs_uri" in step_result.data:
                     state.outpainted_image_url = step_result.data["outpainted_image_gcs_uri"].replace("gs://", "https://storage.mtls.cloud.google.com/")
-                if "video_gcs_uri" in step_result.data:
-                    state.final_video_url = step_result.data["video_gcs_uri"].replace("gs://", "https://storage.mtls.cloud.google.com/")
+                if "video_job_id" in step_result.data:
+                    video_job_id = step_result.data["video_job_id"]
             yield
 
-        state.status_message = f"Workflow complete! Total time: {state.total_generation_time:.2f} seconds"
+        state.status_message = f"Workflow complete! Total time: {state.total_generation_time:.2f} seconds; the final video is being generated."
 
     except Exception as e:
         state.status_message = f"Error: {e}"
 
     state.is_generating = False
-    yield
+    if video_job_id:
+        # Keep the job in the URL so a reload picks it back up
+        me.query_params[VIDEO_JOB_QUERY_PARAM] = video_job_id
+        state.is_loading = True
+        yield
+        yield from follow_video_job(state, video_job_id, app_state.user_email)
+    else:
+        yield
+
+
+def on_load(e: LoadEvent):  # pylint: disable=unused-argument
+    """Resume following the final video's job after the page is reloaded."""
+    yield from resume_video_job(me.state(PageState), me.state(AppState).user_email)
+
+
+def on_video_job_tick(e: me.WebEvent):  # pylint: disable=unused-argument
+    """Check the final video's job again."""
+    yield from refresh_video_job(me.state(PageState), me.state(AppState).user_email)
 
 def on_clear(e: me.ClickEvent):
     """Clear the state of the page."""
@@ -227,7 +271,9 @@ def on_clear(e: me.ClickEvent):
     state.candidate_image_urls = []
     state.best_image_url = ""
     state.outpainted_image_url = ""
-    state.final_video_url = ""
+    state.result_video = ""
+    state.timing = ""
+    state.show_error_dialog = False
     state.status_message = "Ready."
     state.is_generating = False
     state.total_generation_time = 0.0
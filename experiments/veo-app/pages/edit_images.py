@@ -27,8 +27,8 @@ from state.state import AppState
 from models import image_models
 from common import utils as helpers
 
-from common.storage import store_to_gcs
-from google.cloud import storage
+from common.clients import get_bucket
+from common.storage import store_upload_to_gcs
 from components.page_scaffold import page_frame, page_scaffold
 
 if TYPE_CHECKING:
@@ -256,10 +256,9 @@ async def on_upload(e: me.UploadEvent):
     """Upload image to GCS"""
     state = me.state(EditImagesPageState)
     contents = e.file.getvalue()
-    destination_blob_name = store_to_gcs(
+    state.upload_uri = store_upload_to_gcs(
         "uploads", e.file.name, e.file.mime_type, contents
     )
-    state.upload_uri = f"gs://{destination_blob_name}"
     state.upload_file_key += 1
 
 
@@ -288,8 +287,7 @@ async def on_click_image_edit(event: me.ClickEvent) -> AsyncGenerator[Any, Any,
     state.edit_uri = ""
     yield
 
-    storage_client = storage.Client(project=config.PROJECT_ID)
-    bucket = storage_client.bucket(config.GENMEDIA_BUCKET)
+    bucket = get_bucket(config.GENMEDIA_BUCKET)
     blob = bucket.blob(state.upload_uri.replace(f"gs://{config.GENMEDIA_BUCKET}/", ""))
     image_bytes = blob.download_as_bytes()
 
@@ -26,8 +26,10 @@ from common.metadata import (
     MediaItem,
     config,
     db,
+    count_media,
     get_media_item_by_id,
-    get_media_for_page, # This might need adjustment if we want truly accurate filtered counts server-side
+    get_media_page,
+    thumbnail_url,
 )
 from components.dialog import (
     dialog,
@@ -64,6 +66,9 @@ class PageState:
         "all"  # New state for error filter: "all", "no_errors", "only_errors"
     )
     user_filter: str = "all"  # New state for user filter: "all", "mine"
+    # Cursor that starts each page visited so far ("" for the first page)
+    page_cursors: list[str] = field(default_factory=lambda: [""])
+    next_cursor: Optional[str] = None
     initial_url_param_processed: bool = False
     url_item_not_found_message: Optional[str] = None
 
@@ -79,30 +84,24 @@ def _load_media_and_update_state(pagestate: PageState, is_filter_change: bool =
     user_email_to_filter = app_state.user_email if pagestate.user_filter == "mine" else None
 
     if is_filter_change:
-        pagestate.current_page = 1  # Reset to first page on any filter change
-
-    # Fetch all items matching current filters to correctly determine total_media for pagination
-    # This fetches up to 'fetch_limit' defined in get_media_for_page.
-    # For very large datasets, a server-side count with filters would be more performant.
-    all_matching_items = get_media_for_page(
-        page=1,  # Fetch from page 1
-        media_per_page=1000,  # Effectively fetch all matching items up to the internal limit
-        type_filters=pagestate.selected_values,
-        error_filter=pagestate.error_filter_value,
-        filter_by_user_email=user_email_to_filter,
-        sort_by_timestamp=True,
-    )
-    pagestate.total_media = len(all_matching_items)
+        # Reset to first page on any filter change; old cursors no longer apply
+        pagestate.current_page = 1
+        pagestate.page_cursors = [""]
+        pagestate.total_media = count_media(
+            type_filters=pagestate.selected_values,
+            error_filter=pagestate.error_filter_value,
+            filter_by_user_email=user_email_to_filter,
+        )
 
-    # Then fetch just the items for the current page
-    pagestate.media_items = get_media_for_page(
-        pagestate.current_page,
+    media_page = get_media_page(
         pagestate.media_per_page,
-        pagestate.selected_values,
-        pagestate.error_filter_value,
+        cursor=pagestate.page_cursors[pagestate.current_page - 1] or None,
+        type_filters=pagestate.selected_values,
+        error_filter=pagestate.error_filter_value,
         filter_by_user_email=user_email_to_filter,
-        sort_by_timestamp=True,
     )
+    pagestate.media_items = media_page.items
+    pagestate.next_cursor = media_page.next_cursor
     pagestate.key += 1  # Force re-render of the grid
 
 
@@ -278,6 +277,11 @@ def library_content(app_state: me.state):
                                 else ""
                             )
                         )
+                        # Grid tiles show the WebP preview when there is one
+                        has_preview = bool(
+                            m_item.thumbnail_uris and m_item.thumbnail_uris[0]
+                        )
+                        preview_url = thumbnail_url(m_item)
 
                         if media_type_group == "image":
                             prompt_full = m_item.rewritten_prompt or m_item.prompt or ""
@@ -463,7 +467,17 @@ def library_content(app_state: me.state):
                                         ),
                                     )
                                 else:  # Only show media preview if no error
-                                    if media_type_group == "video" and item_url:
+                                    if media_type_group == "video" and has_preview:
+                                        me.image(
+                                            src=preview_url,
+                                            style=me.Style(
+                                                width="100%",
+                                                height="150px",
+                                                border_radius=6,
+                                                object_fit="cover",
+                                            ),
+                                        )
+                                    elif media_type_group == "video" and item_url:
                                         me.video(
                                             src=item_url,
                                             style=me.Style(
@@ -475,7 +489,7 @@ def library_content(app_state: me.state):
                                         )
                                     elif media_type_group == "image" and item_url:
                                         me.image(
-                                            src=item_url,
+                                            src=preview_url,
                                             # alt_text=m_item.prompt or "Generated Image",
                                             style=me.Style(
                                                 max_width="100%",  # Ensure it doesn't overflow
@@ -486,6 +500,16 @@ def library_content(app_state: me.state):
                                             ),
                                         )
                                     elif media_type_group == "audio" and item_url:
+                                        if has_preview:
+                                            me.image(
+                                                src=preview_url,
+                                                style=me.Style(
+                                                    width="100%",
+                                                    height="75px",
+                                                    border_radius=6,
+                                                    object_fit="cover",
+                                                ),
+                                            )
                                         me.audio(
                                             src=item_url,
                                             # style=me.Style(width="100%"), # Audio player width
@@ -918,7 +942,7 @@ def library_content(app_state: me.state):
                         "Next",
                         key="1",  # Key for direction
                         on_click=handle_page_change,
-                        disabled=pagestate.current_page == total_pages
+                        disabled=not pagestate.next_cursor
                         or pagestate.is_loading,
                         type="stroked",
                     )
@@ -975,35 +999,23 @@ def handle_page_change(e: me.ClickEvent):
     direction = int(e.key)
     new_page = pagestate.current_page + direction
 
-    # No need to recalculate total_pages here if total_media is up-to-date
-    # It's calculated at the start of library_content
-
-    if (
-        1
-        <=
-        new_page
-        <=
-        (
-            (pagestate.total_media + pagestate.media_per_page - 1)
-            // pagestate.media_per_page
-            if pagestate.media_per_page > 0 and pagestate.total_media > 0
-            else 1
-        )
-    ):
-        app_state = me.state(AppState)
-        user_email_to_filter = app_state.user_email if pagestate.user_filter == "mine" else None
+    # Pages are reached through cursors, so only step to a neighbouring page
+    # whose starting cursor is known.
+    if direction == 1 and pagestate.next_cursor:
+        if len(pagestate.page_cursors) < new_page:
+            pagestate.page_cursors.append(pagestate.next_cursor)
+        else:
+            pagestate.page_cursors[new_page - 1] = pagestate.next_cursor
         pagestate.current_page = new_page
-        # Fetch only the items for the new page with current filters
-        pagestate.media_items = get_media_for_page(
-            pagestate.current_page,
-            pagestate.media_per_page,
-            pagestate.selected_values,
-            pagestate.error_filter_value,
-            filter_by_user_email=user_email_to_filter,
-            sort_by_timestamp=True,
-        )
-        pagestate.key += 1  # Refresh grid
-        pagestate.url_item_not_found_message = None
+    elif direction == -1 and new_page >= 1:
+        pagestate.current_page = new_page
+    else:
+        pagestate.is_loading = False
+        yield
+        return
+
+    _load_media_and_update_state(pagestate)
+    pagestate.url_item_not_found_message = None
 
     pagestate.is_loading = False
     yield
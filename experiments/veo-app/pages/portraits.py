@@ -13,10 +13,10 @@
 # limitations under the License.
 """Motion portraits"""
 
-import time
 from dataclasses import field
 
 import mesop as me
+from mesop.events import LoadEvent
 from google.genai import types
 from google.genai.types import GenerateContentConfig
 from tenacity import (
@@ -26,8 +26,8 @@ from tenacity import (
     wait_exponential,
 )
 
-from common.metadata import MediaItem, add_media_item_to_firestore
-from common.storage import store_to_gcs
+from common.metadata import MediaItem
+from common.storage import store_upload_to_gcs
 from components.dialog import dialog
 from components.header import header
 from components.library.events import LibrarySelectionChangeEvent
@@ -36,9 +36,16 @@ from components.page_scaffold import (
     page_frame,
     page_scaffold,
 )
+from components.veo.video_job_status import (
+    VIDEO_JOB_QUERY_PARAM,
+    follow_video_job,
+    refresh_video_job,
+    resume_video_job,
+    video_job_timer,
+)
 from config.default import ABOUT_PAGE_CONTENT, Default
 from models.model_setup import GeminiModelSetup, VeoModelSetup
-from models.veo import VideoGenerationRequest, generate_video
+from models.veo import VideoGenerationRequest, enqueue_video_generation
 from pages.styles import (
     _BOX_STYLE_CENTER_DISTRIBUTED,
     _BOX_STYLE_CENTER_DISTRIBUTED_MARGIN,
@@ -398,6 +405,7 @@ def motion_portraits_content(app_state: me.state):
                                 ),
                             )
                             me.progress_spinner(diameter=40)
+                            video_job_timer(state, on_video_job_tick)
                     elif state.result_video:
                         me.text(
                             "Motion Portrait",
@@ -541,7 +549,7 @@ def on_click_upload(e: me.UploadEvent):
     state.reference_image_file = e.file
     state.reference_image_mime_type = e.file.mime_type
     contents = e.file.getvalue()
-    destination_blob_name = store_to_gcs(
+    destination_blob_name = store_upload_to_gcs(
         "uploads", e.file.name, e.file.mime_type, contents
     )
     state.reference_image_gcs = destination_blob_name
@@ -634,10 +642,6 @@ Do not describe the frame. There should be no lip movement like speaking, but th
 
     final_prompt_for_llm += "\n\nScene direction:\n"
 
-    gcs_uri = ""
-    current_error_message = ""
-    execution_time = 0
-
     try:
         print(
             f"Generating scene direction for {state.reference_image_gcs} with prompt:\n{final_prompt_for_llm}"
@@ -653,8 +657,6 @@ Do not describe the frame. There should be no lip movement like speaking, but th
         yield
 
         print("Lights, camera, action!")
-        start_time = time.time()
-
         request = VideoGenerationRequest(
             prompt=scene_direction_for_video,
             duration_seconds=state.video_length,
@@ -666,68 +668,49 @@ Do not describe the frame. There should be no lip movement like speaking, but th
             reference_image_mime_type=state.reference_image_mime_type,
             person_generation="allow_adult",
         )
-
-        gcs_uri, _ = generate_video(request)
-
-        end_time = time.time()
-        execution_time = end_time - start_time
-        state.timing = f"Generation time: {round(execution_time)} seconds"
-
-        if gcs_uri:
-            state.result_video = gcs_uri
-            print(f"Video generated: {gcs_uri}.")
-        else:
-            current_error_message = "Video generation failed to return a GCS URI."
+        job_id = enqueue_video_generation(
+            request,
+            MediaItem(
+                prompt=state.veo_prompt_input,
+                aspect=state.aspect_ratio,
+                model=state.veo_model,
+                duration=float(state.video_length),
+                reference_image=state.reference_image_gcs,
+                enhanced_prompt_used=state.auto_enhance_prompt,
+                comment="motion portrait",
+                last_reference_image=None,
+                user_email=app_state.user_email,
+                mime_type="video/mp4",
+            ),
+        )
 
     except Exception as err:
         print(
             f"Exception during motion portrait generation: {type(err).__name__}: {err}"
         )
-        current_error_message = f"An unexpected error occurred: {err}"
-
-    if current_error_message:
-        state.error_message = current_error_message
+        state.error_message = f"An unexpected error occurred: {err}"
         state.show_error_dialog = True
         state.result_video = ""
+        state.is_loading = False
+        yield
+        return
 
-    if gcs_uri and not current_error_message:
-        try:
-            add_media_item_to_firestore(
-                MediaItem(
-                    gcsuri=gcs_uri,
-                    prompt=state.veo_prompt_input,
-                    aspect=state.aspect_ratio,
-                    model=state.veo_model,
-                    generation_time=execution_time,
-                    duration=float(state.video_length),
-                    reference_image=state.reference_image_gcs,
-                    enhanced_prompt_used=state.auto_enhance_prompt,
-                    error_message="",
-                    comment="motion portrait",
-                    last_reference_image=None,
-                    user_email=app_state.user_email,
-                    mime_type="video/mp4",
-                )
-            )
-        except Exception as meta_err:
-            print(f"CRITICAL: Failed to store metadata: {meta_err}")
-            additional_meta_error = f" (Metadata storage failed: {meta_err})"
-            state.error_message = (
-                state.error_message or "Video generated but metadata failed."
-            ) + additional_meta_error
-            state.show_error_dialog = True
-    elif not gcs_uri and not current_error_message:
-        state.error_message = (
-            state.error_message
-            or "Video generation completed without error, but no video was produced."
-        )
-        state.show_error_dialog = True
-
-    state.is_loading = False
-    yield
+    # Keep the job in the URL so a reload picks it back up
+    me.query_params[VIDEO_JOB_QUERY_PARAM] = job_id
+    yield from follow_video_job(state, job_id, app_state.user_email)
     print("Motion portrait generation process finished.")
 
 
+def on_load(e: LoadEvent):  # pylint: disable=unused-argument
+    """Resume following a video job after the page is reloaded."""
+    yield from resume_video_job(me.state(PageState), me.state(AppState).user_email)
+
+
+def on_video_job_tick(e: me.WebEvent):  # pylint: disable=unused-argument
+    """Check the video job being followed again."""
+    yield from refresh_video_job(me.state(PageState), me.state(AppState).user_email)
+
+
 @retry(
     wait=wait_exponential(multiplier=1, min=1, max=10),
     stop=stop_after_attempt(3),
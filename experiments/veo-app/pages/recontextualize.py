@@ -17,7 +17,7 @@ from dataclasses import field
 import mesop as me
 
 from common.metadata import add_media_item
-from common.storage import store_to_gcs
+from common.storage import store_upload_to_gcs
 from components.dialog import dialog
 from components.header import header
 from components.library.events import LibrarySelectionChangeEvent
@@ -187,7 +187,7 @@ def on_upload(e: me.UploadEvent):
     """Handle uploade event."""
     state = me.state(PageState)
     for file in e.files:
-        gcs_url = store_to_gcs(
+        gcs_url = store_upload_to_gcs(
             "recontext_sources", file.name, file.mime_type, file.getvalue(),
         )
         state.uploaded_image_gcs_uris.append(gcs_url)
@@ -328,14 +328,11 @@ def generate_video(e: me.ClickEvent):
         reference_image_gcs_uris=[gcs_uri],
         scene_prompt=state.video_prompt,
     ):
-        if "video_gcs_uri" in step_result.data:
-            state.final_video_url = step_result.data["video_gcs_uri"].replace(
-                "gs://", "https://storage.mtls.cloud.google.com/"
-            )
+        if "video_job_id" in step_result.data:
             break
 
     state.is_generating = False
-    state.status_message = "Generated video."
+    state.status_message = "Video queued; it will appear in the library when it finishes."
     yield
 
 
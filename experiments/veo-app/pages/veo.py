@@ -14,25 +14,31 @@
 """Veo mesop UI page."""
 
 import datetime  # Required for timestamp
-import time
 
 import mesop as me
+from mesop.events import LoadEvent
 
-from common.error_handling import GenerationError
-from common.metadata import MediaItem, add_media_item_to_firestore  # Updated import
-from common.storage import store_to_gcs
+from common.metadata import MediaItem
+from common.storage import store_upload_to_gcs
 from components.dialog import dialog, dialog_actions
 from components.header import header
 from components.library.events import LibrarySelectionChangeEvent
 from components.page_scaffold import page_frame, page_scaffold
 from components.veo.file_uploader import file_uploader
 from components.veo.generation_controls import generation_controls
+from components.veo.video_job_status import (
+    VIDEO_JOB_QUERY_PARAM,
+    follow_video_job,
+    refresh_video_job,
+    resume_video_job,
+    video_job_timer,
+)
 from components.veo.video_display import video_display
 from config.default import Default
 from config.rewriters import VIDEO_REWRITER
 from models.gemini import rewriter
 from models.model_setup import VeoModelSetup
-from models.veo import generate_video, VideoGenerationRequest
+from models.veo import VideoGenerationRequest, enqueue_video_generation
 from state.state import AppState
 from state.veo_state import PageState
 from config.default import ABOUT_PAGE_CONTENT
@@ -117,6 +123,7 @@ def veo_content(app_state: me.state):
             me.box(style=me.Style(height=50))
 
             video_display()
+            video_job_timer(state, on_video_job_tick)
 
     with dialog(is_open=state.show_error_dialog):  # pylint: disable=not-context-manager
         me.text(
@@ -193,8 +200,6 @@ def on_click_veo(e: me.ClickEvent):  # pylint: disable=unused-argument
     state.timing = ""
     yield
 
-    start_time = time.time()
-
     request = VideoGenerationRequest(
         prompt=state.veo_prompt_input,
         negative_prompt=state.negative_prompt,
@@ -235,42 +240,27 @@ def on_click_veo(e: me.ClickEvent):  # pylint: disable=unused-argument
     )
 
     try:
-        gcs_uri, resolution = generate_video(request)
-        state.result_video = gcs_uri
-        item_to_log.gcsuri = gcs_uri
-        item_to_log.resolution = resolution
-
-    except GenerationError as ge:
-        state.error_message = ge.message
-        state.show_error_dialog = True
-        state.result_video = ""
-        item_to_log.error_message = ge.message
-    except Exception as ex:  # Catch any other unexpected error during generation
-        state.error_message = (
-            f"An unexpected error occurred during video generation: {str(ex)}"
-        )
+        job_id = enqueue_video_generation(request, item_to_log)
+    except Exception as ex:
+        state.error_message = f"Failed to start video generation: {ex}"
         state.show_error_dialog = True
-        state.result_video = ""
-        item_to_log.error_message = state.error_message
-
-    finally:
-        end_time = time.time()
-        execution_time = end_time - start_time
-        state.timing = f"Generation time: {round(execution_time)} seconds"
-        item_to_log.generation_time = execution_time
-
-        try:
-            add_media_item_to_firestore(item_to_log)
-        except Exception as meta_err:
-            print(f"CRITICAL: Failed to store metadata: {meta_err}")
-            # If dialog isn't already shown for a generation error, show for metadata error
-            if not state.show_error_dialog:
-                state.error_message = f"Failed to store video metadata: {meta_err}"
-                state.show_error_dialog = True
-            # else, the generation error message takes precedence
+        state.is_loading = False
+        yield
+        return
 
-    state.is_loading = False
-    yield
+    # Keep the job in the URL so a reload picks it back up
+    me.query_params[VIDEO_JOB_QUERY_PARAM] = job_id
+    yield from follow_video_job(state, job_id, app_state.user_email)
+
+
+def on_load(e: LoadEvent):  # pylint: disable=unused-argument
+    """Resume following a video job after the page is reloaded."""
+    yield from resume_video_job(me.state(PageState), me.state(AppState).user_email)
+
+
+def on_video_job_tick(e: me.WebEvent):  # pylint: disable=unused-argument
+    """Check the video job being followed again."""
+    yield from refresh_video_job(me.state(PageState), me.state(AppState).user_email)
 
 
 def on_blur_veo_prompt(e: me.InputBlurEvent):
@@ -373,7 +363,7 @@ def on_upload_image(e: me.UploadEvent):
     state = me.state(PageState)
     try:
         # Store the uploaded file to GCS
-        gcs_path = store_to_gcs(
+        gcs_path = store_upload_to_gcs(
             "uploads", e.file.name, e.file.mime_type, e.file.getvalue()
         )
         # Update the state with the new image details
@@ -394,7 +384,7 @@ def on_upload_last_image(e: me.UploadEvent):
     state = me.state(PageState)
     try:
         # Store the uploaded file to GCS
-        gcs_path = store_to_gcs(
+        gcs_path = store_upload_to_gcs(
             "uploads", e.file.name, e.file.mime_type, e.file.getvalue()
         )
         # Update the state with the new image details
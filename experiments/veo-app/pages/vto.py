@@ -18,7 +18,7 @@ import uuid
 import mesop as me
 
 from common.metadata import add_media_item
-from common.storage import store_to_gcs
+from common.storage import store_upload_to_gcs
 from components.header import header
 from components.library.events import LibrarySelectionChangeEvent
 from components.library.library_chooser_button import library_chooser_button
@@ -54,7 +54,7 @@ def on_upload_person(e: me.UploadEvent):
     """Upload person image handler."""
     state = me.state(PageState)
     state.person_image_file = e.file
-    gcs_url = store_to_gcs(
+    gcs_url = store_upload_to_gcs(
         "vto_person_images", e.file.name, e.file.mime_type, e.file.getvalue()
     )
     state.person_image_gcs = gcs_url.replace(
@@ -85,7 +85,7 @@ def on_upload_product(e: me.UploadEvent):
     """Upload product image handler."""
     state = me.state(PageState)
     state.product_image_file = e.file
-    gcs_url = store_to_gcs(
+    gcs_url = store_upload_to_gcs(
         "vto_product_images", e.file.name, e.file.mime_type, e.file.getvalue()
     )
     state.product_image_gcs = gcs_url.replace(
@@ -0,0 +1,52 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import concurrent.futures
+import os
+import sys
+from unittest.mock import MagicMock, patch
+
+# Setup sys.path to allow imports from the parent directory.
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from common import clients
+
+
+@patch.dict(clients._clients, clear=True)
+@patch('common.clients.genai.Client')
+def test_genai_client_is_created_once_per_project_and_location(mock_client):
+    mock_client.side_effect = lambda **kwargs: MagicMock()
+    before = clients.client_creations().get("genai", 0)
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=8) as executor:
+        results = list(
+            executor.map(lambda _: clients.get_genai_client("project", "us-central1"), range(32))
+        )
+
+    assert all(result is results[0] for result in results)
+    assert clients.get_genai_client("project", "europe-west4") is not results[0]
+    assert mock_client.call_count == 2
+    assert clients.client_creations()["genai"] - before == 2
+
+
+@patch.dict(clients._buckets, clear=True)
+@patch.dict(clients._clients, clear=True)
+@patch('common.clients.storage.Client')
+def test_get_bucket_makes_no_metadata_request(mock_storage_client):
+    bucket = clients.get_bucket("my-bucket", project="project")
+
+    client = mock_storage_client.return_value
+    client.bucket.assert_called_once_with("my-bucket")
+    client.get_bucket.assert_not_called()
+    assert clients.get_bucket("my-bucket", project="project") is bucket
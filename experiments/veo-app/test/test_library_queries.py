@@ -0,0 +1,114 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import os
+import sys
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+# Setup sys.path to allow imports from the parent directory.
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from common import metadata
+from common.metadata import get_media_page, media_index_fields
+
+
+@pytest.fixture(autouse=True)
+def empty_caches():
+    metadata.media_item_cache.clear()
+    metadata.media_page_cache.clear()
+
+
+def _doc(doc_id, mime_type="image/png"):
+    doc = MagicMock()
+    doc.id = doc_id
+    doc.to_dict.return_value = {"mime_type": mime_type, "gcs_uris": [f"gs://b/{doc_id}.png"]}
+    return doc
+
+
+def test_media_index_fields():
+    assert media_index_fields({"mime_type": "video/mp4"}) == {
+        "media_category": "videos",
+        "has_error": False,
+    }
+    assert media_index_fields({"mime_type": "audio/wav", "error_message": "boom"}) == {
+        "media_category": "music",
+        "has_error": True,
+    }
+    assert media_index_fields({}) == {"media_category": None, "has_error": False}
+
+
+@patch('common.metadata.db')
+def test_get_media_page_filters_in_firestore(mock_db):
+    query = mock_db.collection.return_value
+    query.where.return_value = query
+    query.order_by.return_value = query
+    query.limit.return_value = query
+    query.stream.return_value = [_doc("a"), _doc("b"), _doc("c")]
+
+    page = get_media_page(
+        2,
+        type_filters=["images", "videos"],
+        error_filter="no_errors",
+        filter_by_user_email="user@example.com",
+    )
+
+    filters = [c.kwargs["filter"] for c in query.where.call_args_list]
+    assert [(f.field_path, f.op_string, f.value) for f in filters] == [
+        ("media_category", "in", ["images", "videos"]),
+        ("has_error", "==", False),
+        ("user_email", "==", "user@example.com"),
+    ]
+    query.limit.assert_called_once_with(3)
+    assert [item.id for item in page.items] == ["a", "b"]
+    assert page.next_cursor == "b"
+
+
+@patch('common.metadata.db')
+def test_get_media_page_resumes_after_cursor(mock_db):
+    collection = mock_db.collection.return_value
+    collection.order_by.return_value = collection
+    collection.start_after.return_value = collection
+    collection.limit.return_value = collection
+    collection.stream.return_value = [_doc("c")]
+    cursor_doc = collection.document.return_value.get.return_value
+    cursor_doc.exists = True
+
+    page = get_media_page(2, cursor="b")
+
+    collection.document.assert_called_with("b")
+    collection.start_after.assert_called_once_with(cursor_doc)
+    assert [item.id for item in page.items] == ["c"]
+    assert page.next_cursor is None
+
+
+@patch('common.metadata.db')
+def test_get_media_page_reads_through_cache_until_a_write(mock_db):
+    collection = mock_db.collection.return_value
+    collection.where.return_value = collection
+    collection.order_by.return_value = collection
+    collection.limit.return_value = collection
+    collection.stream.return_value = [_doc("a")]
+
+    first = get_media_page(20, type_filters=["images"])
+    second = get_media_page(20, type_filters=["images"])
+
+    assert [item.id for item in second.items] == [item.id for item in first.items] == ["a"]
+    assert collection.stream.call_count == 1
+
+    with patch('common.metadata._thumbnail_executor'):
+        metadata._write_media_document({"mime_type": "image/png", "media_category": "images"})
+    get_media_page(20, type_filters=["images"])
+    assert collection.stream.call_count == 2
@@ -0,0 +1,92 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import os
+import sys
+
+# Setup sys.path to allow imports from the parent directory.
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from common.media_cache import TTLCache
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def _cache(clock, max_bytes=100):
+    return TTLCache("test", ttl_seconds=10, max_bytes=max_bytes, size_of=len, clock=clock)
+
+
+def test_read_through_until_expiry():
+    clock = FakeClock()
+    cache = _cache(clock)
+    loads = []
+
+    def load():
+        loads.append(1)
+        return "value"
+
+    assert cache.get_or_load("key", load) == "value"
+    assert cache.get_or_load("key", load) == "value"
+    clock.now = 11
+    assert cache.get_or_load("key", load) == "value"
+
+    assert len(loads) == 2
+    stats = cache.stats()
+    assert (stats.hits, stats.misses) == (1, 2)
+
+
+def test_least_recently_used_entries_are_evicted_over_budget():
+    cache = _cache(FakeClock(), max_bytes=10)
+    cache.put("a", "aaaa")
+    cache.put("b", "bbbb")
+    cache.get("a")
+    cache.put("c", "cccc")
+
+    assert cache.get("b") is None
+    assert cache.get("a") == "aaaa"
+    assert cache.stats().evictions == 1
+    assert cache.stats().size_bytes == 8
+
+    cache.put("huge", "x" * 11)
+    assert cache.get("huge") is None
+
+
+def test_none_is_not_cached_and_invalidate_removes_entries():
+    cache = _cache(FakeClock())
+    assert cache.get_or_load("missing", lambda: None) is None
+    assert cache.stats().entries == 0
+
+    cache.put("key", "value")
+    cache.invalidate("key")
+    assert cache.get("key") is None
+
+
+def test_value_loaded_across_an_invalidation_is_not_cached():
+    cache = _cache(FakeClock())
+
+    def stale_load():
+        # A write lands while the read is in flight
+        cache.invalidate("key")
+        return "stale"
+
+    assert cache.get_or_load("key", stale_load) == "stale"
+    assert cache.get("key") is None
+    assert cache.get_or_load("key", lambda: "fresh") == "fresh"
+    assert cache.get("key") == "fresh"
@@ -0,0 +1,57 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import os
+import sys
+from unittest.mock import MagicMock
+
+# Setup sys.path to allow imports from the parent directory.
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from common.media_counters import MediaCounters, counter_ids
+
+
+def test_counter_ids():
+    assert counter_ids("videos", "a@example.com") == [
+        "all",
+        "type:videos",
+        "user:a@example.com",
+        "user:a@example.com:type:videos",
+    ]
+    assert counter_ids(None, None) == ["all"]
+
+
+def test_unseeded_counters_fall_back_and_are_cached():
+    db = MagicMock()
+    unseeded = MagicMock(exists=False)
+    db.get_all.return_value = [unseeded]
+    counters = MediaCounters(db, "counters", num_shards=2, cache_ttl_seconds=60)
+    fallback = MagicMock(return_value=42)
+
+    assert counters.count(["images"], "all", None, fallback) == 42
+    assert counters.count(["images"], "all", None, fallback) == 42
+    fallback.assert_called_once()
+
+    counters.invalidate()
+    assert counters.count(["images"], "all", None, fallback) == 42
+    assert fallback.call_count == 2
+
+
+def test_error_filters_use_fallback():
+    db = MagicMock()
+    counters = MediaCounters(db, "counters")
+    fallback = MagicMock(return_value=3)
+
+    assert counters.count(["videos"], "only_errors", None, fallback) == 3
+    db.get_all.assert_not_called()
@@ -0,0 +1,100 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import io
+import os
+import sys
+import wave
+from types import SimpleNamespace
+from unittest.mock import patch
+
+import numpy as np
+from PIL import Image
+
+# Setup sys.path to allow imports from the parent directory.
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from common.media_derivatives import create_thumbnails, image_thumbnail, waveform_image
+
+
+def _png(width, height):
+    output = io.BytesIO()
+    Image.new("RGB", (width, height), (200, 100, 50)).save(output, format="PNG")
+    return output.getvalue()
+
+
+def _wav(seconds=1.0, rate=8000):
+    t = np.linspace(0, seconds, int(rate * seconds), endpoint=False)
+    samples = (np.sin(2 * np.pi * 440 * t) * t * 30000).astype(np.int16)
+    output = io.BytesIO()
+    with wave.open(output, "wb") as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(2)
+        wav.setframerate(rate)
+        wav.writeframes(samples.tobytes())
+    return output.getvalue()
+
+
+def test_image_thumbnail_is_small_webp():
+    original = _png(2048, 1024)
+    thumbnail = image_thumbnail(original, size=320)
+
+    with Image.open(io.BytesIO(thumbnail)) as image:
+        assert image.format == "WEBP"
+        assert image.size == (320, 160)
+    assert len(thumbnail) < len(original)
+
+
+def test_waveform_image_has_requested_width():
+    with Image.open(io.BytesIO(waveform_image(_wav(), size=200))) as image:
+        assert image.format == "WEBP"
+        assert image.size == (200, 100)
+
+
+@patch('common.media_derivatives.store_many_to_gcs')
+@patch('common.media_derivatives.download_from_gcs')
+def test_create_thumbnails_aligns_with_sources(mock_download, mock_store):
+    mock_download.side_effect = lambda uri: b"not an image" if "broken" in uri else _png(64, 64)
+    mock_store.side_effect = lambda uploads, bucket_name=None: [
+        SimpleNamespace(uri=f"gs://{bucket_name}/{u.folder}/{u.file_name}") for u in uploads
+    ]
+
+    uris = create_thumbnails(
+        "image/png",
+        ["gs://bucket/vto_results/a.png", "gs://bucket/vto_results/broken.png", "gs://bucket/b.png"],
+    )
+
+    assert uris == [
+        "gs://bucket/thumbnails/vto_results/a.webp",
+        "",
+        "gs://bucket/thumbnails/b.webp",
+    ]
+    assert create_thumbnails("application/json", ["gs://bucket/a.json"]) == []
+
+
+@patch('common.media_derivatives.store_many_to_gcs')
+@patch('common.media_derivatives.download_from_gcs')
+def test_create_thumbnails_survives_upload_failure(mock_download, mock_store):
+    mock_download.return_value = _png(64, 64)
+
+    def store(uploads, bucket_name=None):
+        if bucket_name == "down":
+            raise RuntimeError("upload failed")
+        return [SimpleNamespace(uri=f"gs://{bucket_name}/{u.folder}/{u.file_name}") for u in uploads]
+
+    mock_store.side_effect = store
+
+    uris = create_thumbnails("image/png", ["gs://down/a.png", "gs://bucket/b.png"])
+
+    assert uris == ["", "gs://bucket/thumbnails/b.webp"]
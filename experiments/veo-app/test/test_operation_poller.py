@@ -0,0 +1,76 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import os
+import sys
+from types import SimpleNamespace
+
+import pytest
+
+# Setup sys.path to allow imports from the parent directory.
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from common.operation_poller import OperationPoller
+
+
+class FakeOperations:
+    """Async operations API whose operations finish after `polls_needed` gets."""
+
+    def __init__(self, polls_needed: int, fail: bool = False):
+        self.polls_needed = polls_needed
+        self.fail = fail
+        self.calls = 0
+
+    async def get(self, operation):
+        self.calls += 1
+        if self.fail:
+            raise RuntimeError("unavailable")
+        remaining = operation.remaining - 1
+        return SimpleNamespace(name=operation.name, remaining=remaining, done=remaining <= 0)
+
+
+def _client(operations):
+    return SimpleNamespace(aio=SimpleNamespace(operations=operations))
+
+
+def test_poller_resolves_many_operations_from_one_task():
+    poller = OperationPoller(initial_interval=0.01, max_interval=0.05, backoff=2.0, timeout=5)
+    operations = FakeOperations(polls_needed=3)
+    client = _client(operations)
+
+    futures = [
+        poller.submit(SimpleNamespace(name=f"op{i}", remaining=3, done=False), client)
+        for i in range(10)
+    ]
+
+    results = [future.result(timeout=5) for future in futures]
+    assert all(result.done for result in results)
+    assert operations.calls == 30
+
+
+def test_poller_fails_after_repeated_errors():
+    poller = OperationPoller(
+        initial_interval=0.01, max_interval=0.01, timeout=5, max_consecutive_failures=2
+    )
+    future = poller.submit(
+        SimpleNamespace(name="op", remaining=1, done=False), _client(FakeOperations(1, fail=True))
+    )
+    with pytest.raises(RuntimeError):
+        future.result(timeout=5)
+
+
+def test_poller_returns_finished_operations_immediately():
+    poller = OperationPoller()
+    operation = SimpleNamespace(name="op", done=True)
+    assert poller.submit(operation, client=None).result(timeout=0) is operation
@@ -0,0 +1,83 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import os
+import sys
+import threading
+import time
+from unittest.mock import patch
+
+import pytest
+
+# Setup sys.path to allow imports from the parent directory.
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from common.storage import GCSUpload, store_many_to_gcs
+
+
+def _uploads(count):
+    return [GCSUpload("results", f"result_{i}.png", "image/png", b"png") for i in range(count)]
+
+
+@patch('common.storage.stream_to_gcs')
+def test_uploads_run_concurrently_and_keep_order(mock_stream):
+    in_flight = []
+    peak = []
+    lock = threading.Lock()
+
+    def upload(folder, file_name, mime_type, contents, decode=False, bucket_name=None):
+        with lock:
+            in_flight.append(file_name)
+            peak.append(len(in_flight))
+        # Later uploads finish first
+        time.sleep(0.2 - 0.04 * int(file_name[7]))
+        with lock:
+            in_flight.remove(file_name)
+        return f"gs://bucket/{folder}/{file_name}"
+
+    mock_stream.side_effect = upload
+
+    started = time.perf_counter()
+    results = store_many_to_gcs(_uploads(4), bucket_name="bucket")
+
+    assert time.perf_counter() - started < 0.5
+    assert max(peak) == 4
+    assert [r.uri for r in results] == [f"gs://bucket/results/result_{i}.png" for i in range(4)]
+    assert all(r.attempts == 1 and r.seconds > 0 for r in results)
+
+
+@patch('common.storage.stream_to_gcs')
+def test_failed_upload_is_retried_on_its_own(mock_stream):
+    failures = {"result_2.png": 1}
+
+    def upload(folder, file_name, mime_type, contents, decode=False, bucket_name=None):
+        if failures.get(file_name):
+            failures[file_name] -= 1
+            raise ConnectionError("reset")
+        return f"gs://bucket/{folder}/{file_name}"
+
+    mock_stream.side_effect = upload
+
+    results = store_many_to_gcs(_uploads(4), bucket_name="bucket")
+
+    assert [r.attempts for r in results] == [1, 1, 2, 1]
+    assert mock_stream.call_count == 5
+
+
+@patch('common.storage.stream_to_gcs', side_effect=ConnectionError("reset"))
+def test_single_use_iterators_are_not_retried(mock_stream):
+    upload = GCSUpload("results", "result.png", "image/png", iter([b"png"]))
+    with pytest.raises(ConnectionError):
+        store_many_to_gcs([upload], bucket_name="bucket")
+    assert mock_stream.call_count == 1
@@ -0,0 +1,73 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import hashlib
+import os
+import sys
+from unittest.mock import MagicMock, patch
+
+# Setup sys.path to allow imports from the parent directory.
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from common import storage
+
+CONTENTS = b"product shot"
+DIGEST = hashlib.sha256(CONTENTS).hexdigest()
+
+
+class FakeIndex:
+    """An in-memory stand-in for the upload index collection."""
+
+    def __init__(self):
+        self.docs = {}
+
+    def collection(self, name):
+        return self
+
+    def document(self, doc_id):
+        ref = MagicMock()
+        ref.get.side_effect = lambda: MagicMock(
+            exists=doc_id in self.docs, to_dict=lambda: self.docs[doc_id]
+        )
+        ref.set.side_effect = lambda data: self.docs.__setitem__(doc_id, data)
+        return ref
+
+
+@patch.dict(storage._upload_index_cache, clear=True)
+@patch('common.storage.stream_to_gcs')
+@patch('common.storage.db', new_callable=FakeIndex)
+def test_repeat_upload_is_stored_once_at_hash_path(index, mock_stream):
+    mock_stream.side_effect = lambda folder, file_name, *args, bucket_name=None, **kwargs: (
+        f"gs://{bucket_name}/{folder}/{file_name}"
+    )
+
+    first = storage.store_upload_to_gcs("uploads", "Shot.PNG", "image/png", CONTENTS, bucket_name="b")
+    second = storage.store_upload_to_gcs("vto_product_images", "copy.png", "image/png", CONTENTS, bucket_name="b")
+
+    assert first == second == f"gs://b/uploads/{DIGEST}.png"
+    mock_stream.assert_called_once()
+
+    # Another instance, with an empty in-process cache, finds it in the index
+    storage._upload_index_cache.clear()
+    assert storage.store_upload_to_gcs("uploads", "x.png", "image/png", CONTENTS, bucket_name="b") == first
+    mock_stream.assert_called_once()
+
+
+@patch.dict(storage._upload_index_cache, clear=True)
+@patch('common.storage.stream_to_gcs', return_value="gs://b/uploads/other.png")
+@patch('common.storage.db', new_callable=FakeIndex)
+def test_different_content_is_uploaded(index, mock_stream):
+    storage.store_upload_to_gcs("uploads", "a.png", "image/png", CONTENTS, bucket_name="b")
+    storage.store_upload_to_gcs("uploads", "a.png", "image/png", CONTENTS + b"!", bucket_name="b")
+    assert mock_stream.call_count == 2
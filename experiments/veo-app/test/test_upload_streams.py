@@ -0,0 +1,69 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import base64
+import binascii
+import io
+import os
+import sys
+
+import pytest
+
+# Setup sys.path to allow imports from the parent directory.
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from common.upload_streams import ChunkStream, decode_base64_chunks, iter_chunks
+
+PAYLOAD = os.urandom(100_003)
+ENCODED = base64.b64encode(PAYLOAD).decode("ascii")
+
+
+@pytest.mark.parametrize(
+    "source",
+    [
+        ENCODED,
+        ENCODED.encode("ascii"),
+        memoryview(ENCODED.encode("ascii")),
+        io.BytesIO(ENCODED.encode("ascii")),
+        [ENCODED[i : i + 777] for i in range(0, len(ENCODED), 777)],
+    ],
+)
+def test_base64_decodes_incrementally_from_any_source(source):
+    chunks = list(decode_base64_chunks(iter_chunks(source, read_size=4096)))
+    assert b"".join(chunks) == PAYLOAD
+    assert max(len(chunk) for chunk in chunks) <= 4096
+
+
+def test_base64_ignores_line_breaks_and_rejects_truncated_input():
+    wrapped = base64.encodebytes(PAYLOAD)
+    assert b"".join(decode_base64_chunks(iter_chunks(wrapped, read_size=1000))) == PAYLOAD
+    with pytest.raises(binascii.Error):
+        b"".join(decode_base64_chunks([ENCODED[:-1].encode("ascii")]))
+
+
+def test_chunk_stream_reads_in_requested_sizes_and_rereads_last_block():
+    stream = ChunkStream(iter_chunks(PAYLOAD, read_size=1000))
+
+    first = stream.read(4096)
+    assert first == PAYLOAD[:4096]
+    second = stream.read(4096)
+    assert stream.tell() == 8192
+
+    # A resumable upload resends an unconfirmed chunk
+    stream.seek(5000)
+    assert stream.read(3192) == second[5000 - 4096 :]
+    with pytest.raises(OSError):
+        stream.seek(0)
+    assert stream.read() == PAYLOAD[8192:]
+    assert stream.read(10) == b""
@@ -9,22 +9,30 @@ import os
 import sys
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
-from pages.veo import on_click_veo
+from pages.veo import on_click_veo, on_video_job_tick
 from state.veo_state import PageState
 from state.state import AppState
+from flask import Flask
 from common.metadata import MediaItem
+from common.video_jobs import RUNNING, SUCCEEDED, VideoJob
+from components.veo.video_job_status import resume_video_job
 
-@patch('pages.veo.add_media_item_to_firestore')
-@patch('pages.veo.generate_video', return_value="gs://fake-bucket/fake_video.mp4")
+@patch('mesop.query_params', new_callable=dict)
+@patch('components.veo.video_job_status.get_video_job')
+@patch('pages.veo.enqueue_video_generation', return_value="job-1")
 @patch('mesop.state')
-def test_veo_generation_flow_and_metadata(mock_state, mock_generate_video, mock_add_media_item):
+def test_veo_generation_flow_and_metadata(mock_state, mock_enqueue, mock_get_video_job, mock_query_params):
     """
     Tests the VEO generation flow, focusing on the data handling and metadata
-    creation after a successful API call.
+    queued with the job, and the result shown once the job succeeds.
     """
     # --- Arrange ---
     # Setup the mocked state that the on_click_veo function will use.
-    mock_app_state = AppState(user_email="test_user@example.com")
+    # AppState reads the user from the request environment, as it does when served.
+    with Flask(__name__).test_request_context(
+        environ_base={"MESOP_USER_EMAIL": "test_user@example.com", "MESOP_SESSION_ID": "test-session"}
+    ):
+        mock_app_state = AppState()
     mock_page_state = PageState(
         veo_prompt_input="a test prompt for veo",
         veo_model="2.0",
@@ -35,6 +43,8 @@ def test_veo_generation_flow_and_metadata(mock_state, mock_generate_video, mock_
         auto_enhance_prompt=False
     )
 
+    mock_get_video_job.return_value = VideoJob(job_id="job-1", user_email="test_user@example.com", status=SUCCEEDED, result_uri="gs://fake-bucket/fake_video.mp4")
+
     # Configure the mesop.state mock to return the correct state object when called.
     mock_state.side_effect = [mock_app_state, mock_page_state]
 
@@ -44,22 +54,80 @@ def test_veo_generation_flow_and_metadata(mock_state, mock_generate_video, mock_
         pass
 
     # --- Assert ---
-    # 1. Verify that our main video generation function was called.
-    mock_generate_video.assert_called_once()
-
-    # 2. Verify that the Firestore logging function was called.
-    mock_add_media_item.assert_called_once()
+    # 1. Verify that the video generation job was queued.
+    mock_enqueue.assert_called_once()
+    assert mock_get_video_job.call_args[0][0] == "job-1"
 
-    # 3. Inspect the data that was passed to the Firestore function.
+    # 2. Inspect the metadata queued with the job, which is logged when it finishes.
     # This is the crucial part that catches the `NameError` or `AttributeError`.
-    call_args, _ = mock_add_media_item.call_args
-    media_item_logged = call_args[0]
+    call_args, _ = mock_enqueue.call_args
+    media_item_logged = call_args[1]
 
     assert isinstance(media_item_logged, MediaItem)
     assert media_item_logged.user_email == "test_user@example.com"
     assert media_item_logged.prompt == "a test prompt for veo"
-    assert media_item_logged.gcsuri == "gs://fake-bucket/fake_video.mp4"
     assert media_item_logged.model == "veo-2.0-generate-001" # This comes from config
 
+    # 3. The finished job's video is shown and removed from the URL.
+    assert mock_page_state.result_video == "gs://fake-bucket/fake_video.mp4"
+    assert "video_job" not in mock_query_params
+
     print("\nComponent-level integration test for VEO passed successfully.")
 
+
+
+@patch('mesop.query_params', new_callable=dict)
+@patch('components.veo.video_job_status.get_video_job')
+@patch('pages.veo.enqueue_video_generation', return_value="job-1")
+@patch('mesop.state')
+def test_veo_running_job_is_checked_on_tick(mock_state, mock_enqueue, mock_get_video_job, mock_query_params):
+    """
+    Tests that the handler returns while the job is still running, and that a
+    later timer tick shows the result once the job has finished.
+    """
+    with Flask(__name__).test_request_context(
+        environ_base={"MESOP_USER_EMAIL": "test_user@example.com", "MESOP_SESSION_ID": "test-session"}
+    ):
+        mock_app_state = AppState()
+    mock_page_state = PageState(veo_prompt_input="a test prompt for veo", veo_model="2.0")
+    mock_state.side_effect = [mock_app_state, mock_page_state, mock_page_state, mock_app_state]
+
+    mock_get_video_job.return_value = VideoJob(job_id="job-1", user_email="test_user@example.com", status=RUNNING)
+    for _ in on_click_veo(MagicMock()):
+        pass
+
+    assert mock_page_state.is_loading
+    assert mock_query_params["video_job"] == "job-1"
+
+    mock_get_video_job.return_value = VideoJob(
+        job_id="job-1", user_email="test_user@example.com", status=SUCCEEDED, result_uri="gs://fake-bucket/fake_video.mp4"
+    )
+    for _ in on_video_job_tick(MagicMock()):
+        pass
+
+    assert not mock_page_state.is_loading
+    assert mock_page_state.result_video == "gs://fake-bucket/fake_video.mp4"
+    assert "video_job" not in mock_query_params
+
+
+@patch('mesop.query_params', new_callable=dict)
+@patch('components.veo.video_job_status.get_video_job')
+def test_another_users_job_is_not_shown(mock_get_video_job, mock_query_params):
+    """
+    Tests that a job ID in the URL belonging to someone else is treated as
+    not found, so its result is never shown.
+    """
+    mock_query_params["video_job"] = "job-1"
+    mock_get_video_job.return_value = VideoJob(
+        job_id="job-1", user_email="someone_else@example.com", status=SUCCEEDED,
+        result_uri="gs://fake-bucket/their_video.mp4",
+    )
+    page_state = PageState()
+
+    for _ in resume_video_job(page_state, "test_user@example.com"):
+        pass
+
+    assert page_state.result_video == ""
+    assert page_state.show_error_dialog
+    assert not page_state.is_loading
+    assert "video_job" not in mock_query_params
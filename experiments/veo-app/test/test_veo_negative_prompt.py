@@ -9,13 +9,16 @@ sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')
 from pages.veo import on_click_veo
 from state.veo_state import PageState
 from state.state import AppState
+from flask import Flask
 from common.metadata import MediaItem
+from common.video_jobs import SUCCEEDED, VideoJob
 from models.requests import VideoGenerationRequest
 
-@patch('pages.veo.add_media_item_to_firestore')
-@patch('pages.veo.generate_video')
+@patch('mesop.query_params', new_callable=dict)
+@patch('components.veo.video_job_status.get_video_job')
+@patch('pages.veo.enqueue_video_generation', return_value="job-1")
 @patch('mesop.state')
-def test_veo_negative_prompt_flow(mock_state, mock_generate_video, mock_add_media_item_to_firestore):
+def test_veo_negative_prompt_flow(mock_state, mock_enqueue, mock_get_video_job, mock_query_params):
     """
     Tests that the negative_prompt is correctly passed from the UI state
     through the generation request and into the final metadata logging.
@@ -24,11 +27,15 @@ def test_veo_negative_prompt_flow(mock_state, mock_generate_video, mock_add_medi
     prompt = "a cinematic shot of a raccoon"
     negative_prompt = "text, watermark, signature"
 
-    # Mock the return value of the video generation
-    mock_generate_video.return_value = ("gs://fake-bucket/video.mp4", "1080p")
+    # Mock the queued job finishing successfully
+    mock_get_video_job.return_value = VideoJob(job_id="job-1", user_email="test_user@example.com", status=SUCCEEDED, result_uri="gs://fake-bucket/video.mp4", resolution="1080p")
 
     # Setup the mocked states that me.state() will return upon subsequent calls
-    mock_app_state = AppState(user_email="test_user@example.com")
+    # AppState reads the user from the request environment, as it does when served.
+    with Flask(__name__).test_request_context(
+        environ_base={"MESOP_USER_EMAIL": "test_user@example.com", "MESOP_SESSION_ID": "test-session"}
+    ):
+        mock_app_state = AppState()
     mock_page_state = PageState(
         veo_prompt_input=prompt,
         negative_prompt=negative_prompt,
@@ -51,17 +58,16 @@ def test_veo_negative_prompt_flow(mock_state, mock_generate_video, mock_add_medi
         pass
 
     # --- Assert ---
-    # 1. Assert that the video generation function was called correctly.
-    mock_generate_video.assert_called_once()
-    request_arg = mock_generate_video.call_args[0][0]
+    # 1. Assert that the video generation job was queued with the right request.
+    mock_enqueue.assert_called_once()
+    request_arg = mock_enqueue.call_args[0][0]
 
     assert isinstance(request_arg, VideoGenerationRequest)
     assert request_arg.prompt == prompt
     assert request_arg.negative_prompt == negative_prompt
 
-    # 2. Assert that the Firestore logging function was called with the correct data.
-    mock_add_media_item_to_firestore.assert_called_once()
-    media_item_arg = mock_add_media_item_to_firestore.call_args[0][0]
+    # 2. Assert that the job carries the correct metadata to log when it finishes.
+    media_item_arg = mock_enqueue.call_args[0][1]
 
     assert isinstance(media_item_arg, MediaItem)
     assert media_item_arg.prompt == prompt
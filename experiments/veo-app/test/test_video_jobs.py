@@ -0,0 +1,194 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import concurrent.futures
+import os
+import sys
+import threading
+import time
+from types import SimpleNamespace
+
+# Setup sys.path to allow imports from the parent directory.
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from common.video_jobs import (
+    FAILED,
+    QUEUED,
+    RUNNING,
+    STARTING,
+    SUCCEEDED,
+    SQLiteJobStore,
+    VideoJob,
+    VideoJobQueue,
+)
+from models.requests import VideoGenerationRequest
+
+REQUEST = VideoGenerationRequest(
+    prompt="a raccoon",
+    duration_seconds=5,
+    aspect_ratio="16:9",
+    resolution="720p",
+    enhance_prompt=False,
+    model_version_id="2.0",
+    person_generation="Allow (All ages)",
+)
+
+
+def _queue(store, watch_result=("gs://bucket/video.mp4", "720p"), start_error=None, found_output=None):
+    finished = []
+    done = threading.Event()
+    watched = []
+    started = []
+
+    def start_operation(request, output_gcs_uri):
+        started.append(output_gcs_uri)
+        if start_error:
+            raise start_error
+        return SimpleNamespace(name="operations/123")
+
+    def watch_operation(operation, request):
+        watched.append(operation)
+        future = concurrent.futures.Future()
+        future.set_result(watch_result)
+        return future
+
+    def on_finished(job):
+        finished.append(job)
+        done.set()
+
+    queue = VideoJobQueue(
+        store,
+        start_operation=start_operation,
+        watch_operation=watch_operation,
+        request_type=VideoGenerationRequest,
+        on_finished=on_finished,
+        output_uri_for=lambda job_id: f"gs://bucket/jobs/{job_id}",
+        find_output=lambda output_gcs_uri, request: found_output,
+    )
+    return queue, finished, done, watched, started
+
+
+def test_enqueued_job_runs_and_is_recorded_once():
+    store = SQLiteJobStore()
+    queue, finished, done, _, started = _queue(store)
+
+    job_id = queue.enqueue(REQUEST, "user@example.com", {"prompt": "a raccoon"})
+
+    assert done.wait(timeout=5)
+    job = queue.get(job_id)
+    assert job.status == SUCCEEDED
+    assert job.operation_name == "operations/123"
+    assert job.result_uri == "gs://bucket/video.mp4"
+    assert [j.job_id for j in finished] == [job_id]
+    assert started == [f"gs://bucket/jobs/{job_id}"]
+
+
+def test_failed_start_marks_job_failed():
+    store = SQLiteJobStore()
+    queue, finished, done, _, _ = _queue(store, start_error=RuntimeError("quota"))
+
+    job_id = queue.enqueue(REQUEST, "user@example.com")
+
+    assert done.wait(timeout=5)
+    assert queue.get(job_id).status == FAILED
+    assert queue.get(job_id).error_message == "quota"
+
+
+def test_resume_watches_running_jobs_by_operation_name():
+    store = SQLiteJobStore()
+    now = time.time()
+    store.create(
+        VideoJob(
+            job_id="running",
+            request=REQUEST.model_dump(),
+            status=RUNNING,
+            operation_name="operations/456",
+            created_at=now,
+            updated_at=now,
+            started_at=now,
+        )
+    )
+    queue, finished, done, watched, _ = _queue(store)
+
+    assert queue.resume() == 1
+    assert done.wait(timeout=5)
+    assert watched == ["operations/456"]
+    assert queue.get("running").status == SUCCEEDED
+
+
+def test_transition_is_compare_and_set():
+    store = SQLiteJobStore()
+    store.create(VideoJob(job_id="job", status=QUEUED))
+
+    assert store.transition("job", [QUEUED], status=STARTING)
+    assert not store.transition("job", [QUEUED], status=STARTING)
+    assert store.get("job").status == STARTING
+
+
+def _stale_starting_job(store):
+    stale = time.time() - 3600
+    store.create(
+        VideoJob(
+            job_id="starting",
+            request=REQUEST.model_dump(),
+            status=STARTING,
+            output_gcs_uri="gs://bucket/jobs/starting",
+            created_at=stale,
+            updated_at=stale,
+        )
+    )
+
+
+def test_resume_finishes_interrupted_start_from_its_output():
+    store = SQLiteJobStore()
+    _stale_starting_job(store)
+    queue, finished, done, _, started = _queue(
+        store, found_output=("gs://bucket/jobs/starting/1/sample_0.mp4", "720p")
+    )
+
+    assert queue.resume() == 1
+    assert done.wait(timeout=5)
+    job = queue.get("starting")
+    assert job.status == SUCCEEDED
+    assert job.result_uri == "gs://bucket/jobs/starting/1/sample_0.mp4"
+    assert started == []
+
+
+def test_resume_fails_interrupted_start_without_output():
+    store = SQLiteJobStore()
+    _stale_starting_job(store)
+    queue, finished, done, _, started = _queue(store)
+
+    assert queue.resume() == 1
+    assert done.wait(timeout=5)
+    assert queue.get("starting").status == FAILED
+    assert "interrupted" in queue.get("starting").error_message
+    assert started == []
+
+
+def test_start_does_not_watch_a_job_recovered_meanwhile():
+    store = SQLiteJobStore()
+    queue, finished, done, watched, _ = _queue(store)
+
+    def start_operation(request, output_gcs_uri):
+        # Another instance gave up on the start while the API call was in flight
+        store.transition("job", [STARTING], status=FAILED)
+        return SimpleNamespace(name="operations/789")
+
+    queue._start_operation = start_operation
+    store.create(VideoJob(job_id="job", request=REQUEST.model_dump(), status=QUEUED))
+    queue._start("job")
+
+    assert watched == []
+    assert queue.get("job").status == FAILED
@@ -12,54 +12,86 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 """ Main Mesop App """
-import json
 import random
 from dataclasses import dataclass, field
+from typing import Iterator, Optional
 import datetime #The following import is for time limit of viewing signed urls of GCS objects. currently it is 60 minutes.
-import os
 
 import mesop as me
 import vertexai
-# The following import is for generating signed URLs for GCS objects
-from google.cloud import storage
-from google.cloud.aiplatform import telemetry
 from google.auth import default
-from google.oauth2 import service_account
-from vertexai.generative_models import (
-    GenerationConfig,
-    GenerativeModel,
-    HarmCategory,
-    Part,
-)
-from vertexai.preview.vision_models import ImageGenerationModel
+from vertexai.generative_models import Part
 from models.image_models import ImageModel
-from config.default import Config
+from models.imagen import ImageRequest, generate_image_uris
+from models.model_setup import get_gemini_model, warm_up_models
+from common.modifiers import ModifierRegistry
+from common.result_cache import PromptResultCache
+from common.signed_urls import SignedUrlCache
+from common.storage import get_storage_client
+from common.streaming import BackgroundStreams
+from config.default import IMAGE_MODIFIER_DEFAULTS, IMAGE_MODIFIER_OPTIONS, Config
 from prompts.critics import (
     MAGAZINE_EDITOR_PROMPT,
     REWRITER_PROMPT,
 )
+from prompts.library import PromptLibrary
 from svg_icon.svg_icon_component import svg_icon_component
 
-def get_storage_client():
-    """Get authenticated storage client for both local and Cloud Run environments"""
-    try:
-        # Check if we're running locally with service account key
-        if os.path.exists("credentials.json"):
-            credentials = service_account.Credentials.from_service_account_file(
-                "credentials.json"
-            )
-            return storage.Client(credentials=credentials)
-        else:
-            # Running in Cloud Run or with default credentials
-            return storage.Client()
-    except Exception as e:
-        print(f"Error creating storage client: {e}")
-        # Fallback to default credentials
-        return storage.Client()
-
 # Initialize Configuration
 cfg = Config()
 vertexai.init(project=cfg.PROJECT_ID, location=cfg.LOCATION)
+if cfg.WARM_UP_MODELS:
+    warm_up_models(
+        [m["model_name"] for m in cfg.display_image_models],
+        cfg.MODEL_GEMINI_MULTIMODAL,
+        cfg.gemini_settings,
+    )
+
+# Signed URLs are reused across renders until shortly before they expire
+signed_url_cache = SignedUrlCache(
+    client_factory=get_storage_client,
+    service_account_email=cfg.SERVICE_ACCOUNT_EMAIL,
+    expiration=datetime.timedelta(minutes=cfg.SIGNED_URL_EXPIRATION_MINUTES),
+    safety_margin=datetime.timedelta(minutes=cfg.SIGNED_URL_SAFETY_MARGIN_MINUTES),
+    max_entries=cfg.SIGNED_URL_CACHE_SIZE,
+    max_workers=cfg.SIGNED_URL_MAX_WORKERS,
+)
+
+# Modifier option tables and prompt composition are built once at import
+modifier_registry = ModifierRegistry(cfg.image_modifiers, IMAGE_MODIFIER_OPTIONS)
+_MODIFIER_SELECT_OPTIONS = {
+    key: [
+        me.SelectOption(label=label, value=value)
+        for label, value in zip(spec.labels, spec.values)
+    ]
+    for key, spec in modifier_registry.specs.items()
+}
+_MODIFIER_SELECT_STYLES = {
+    key: me.Style(width=spec.width) if spec.width else None
+    for key, spec in modifier_registry.specs.items()
+}
+_MODIFIER_ROWS = (
+    ("aspect_ratio", "content_type", "color_tone", "lighting", "composition"),
+    ("art_style", "mood_atmosphere", "texture", "lens_type"),
+)
+_ADVANCED_MODIFIER_ROWS = (
+    ("subject_age", "subject_gender", "subject_clothing", "subject_hair"),
+    ("environment_setting", "time_of_day", "weather_condition", "season"),
+    ("camera_angle", "aperture", "film_type", "focus_technique", "focal_length"),
+)
+
+# Preset prompts are loaded once and reloaded when the file changes
+prompt_library = PromptLibrary(
+    cfg.IMAGEN_PROMPTS_JSON, reload_interval=cfg.PROMPT_LIBRARY_RELOAD_SECONDS
+)
+
+# Seeded, unwatermarked requests are deterministic, so their results are reused.
+# The UI always watermarks; such requests come from batch runs (see batch.py).
+prompt_result_cache = PromptResultCache(
+    cfg.PROMPT_CACHE_INDEX,
+    max_entries=cfg.PROMPT_CACHE_SIZE,
+    ttl_seconds=cfg.PROMPT_CACHE_TTL_HOURS * 3600,
+)
 
 @me.stateclass
 @dataclass
@@ -70,6 +102,7 @@ class State:
     image_models: list[ImageModel] = field(default_factory=lambda: cfg.display_image_models.copy())
     image_output: list[str] = field(default_factory=list)
     image_commentary: str = ""
+    is_commentary_loading: bool = False
     image_model_name: str = cfg.MODEL_IMAGEN3_FAST
 
     # General UI state
@@ -80,6 +113,8 @@ class State:
     image_prompt_input: str = ""
     image_prompt_placeholder: str = ""
     image_textarea_key: int = 0
+    prompt_sample_seed: int = field(default_factory=lambda: random.getrandbits(31))
+    prompt_sample_position: int = 0
 
     image_negative_prompt_input: str = ""
     image_negative_prompt_placeholder: str = ""
@@ -91,11 +126,11 @@ class State:
     imagen_image_count: int = 3
 
     # Image style modifiers
-    image_content_type: str = "Photo"
-    image_color_tone: str = "Cinematic"
+    image_content_type: str = IMAGE_MODIFIER_DEFAULTS["content_type"]
+    image_color_tone: str = IMAGE_MODIFIER_DEFAULTS["color_tone"]
     image_lighting: str = "None"
-    image_composition: str = "Wide angle"
-    image_aspect_ratio: str = "16:9"
+    image_composition: str = IMAGE_MODIFIER_DEFAULTS["composition"]
+    image_aspect_ratio: str = IMAGE_MODIFIER_DEFAULTS["aspect_ratio"]
     image_art_style: str = "None"
     image_mood_atmosphere: str = "None"
     image_texture: str = "None"
@@ -137,15 +172,38 @@ def on_blur_image_negative_prompt(e: me.InputBlurEvent):
 
 
 def on_click_generate_images(e: me.ClickEvent):
-    """Click Event to generate images."""
+    """Click Event to generate images.
+
+    Images are shown as soon as they land in GCS. The critic starts once the
+    first image exists and its commentary streams in alongside the rest.
+    """
     state = me.state(State)
     state.is_loading = True
     state.image_output.clear()
+    state.image_commentary = ""
     yield
-    generate_images(state.image_prompt_input)
-    generate_compliment(state.image_prompt_input)
-    state.is_loading = False
-    yield
+    instruction = state.image_prompt_input
+    streams = BackgroundStreams()
+    streams.add("images", image_uris(*image_request(instruction)))
+    critic_started = False
+    for event in streams:
+        if event.name == "images":
+            state.image_output.extend(event.items)
+            if event.error:
+                print(f"Error generating images: {event.error}")
+            if state.image_output and not critic_started:
+                critic_started = True
+                state.is_commentary_loading = True
+                streams.add("critic", critic_chunks(list(state.image_output), instruction))
+            if event.done:
+                state.is_loading = False
+        else:
+            state.image_commentary += "".join(event.items)
+            if event.error:
+                print(f"Error generating commentary: {event.error}")
+            if event.done:
+                state.is_commentary_loading = False
+        yield
 
 
 def on_select_image_count(e: me.SelectSelectionChangeEvent):
@@ -154,91 +212,66 @@ def on_select_image_count(e: me.SelectSelectionChangeEvent):
     setattr(state, e.key, e.value)
 
 
-def generate_images(input_txt: str):
-    """Generate Images"""
+def image_request(input_txt: str) -> tuple[ImageRequest, Optional[str]]:
+    """The ImageRequest for the current settings, and its result cache key if deterministic"""
     state = me.state(State)
 
     # handle condition where someone hits "random" but doens't modify
     if not input_txt and state.image_prompt_placeholder:
         input_txt = state.image_prompt_placeholder
-    state.image_output.clear()
-    modifiers = []
-    for mod in cfg.image_modifiers:
-        if mod != "aspect_ratio":
-            if getattr(state, f"image_{mod}") != "None":
-                modifiers.append(getattr(state, f"image_{mod}"))
-    prompt_modifiers = ", ".join(modifiers)
-    prompt = f"{input_txt} {prompt_modifiers}"
+    prompt = modifier_registry.compose_prompt(input_txt, state)
     print(f"prompt: {prompt}")
     if state.image_negative_prompt_input:
         print(f"negative prompt: {state.image_negative_prompt_input}")
     print(f"model: {state.image_model_name}")
-    image_generation_model = ImageGenerationModel.from_pretrained(
-        state.image_model_name
+    request = ImageRequest(
+        prompt=prompt,
+        model_name=state.image_model_name,
+        aspect_ratio=state.image_aspect_ratio,
+        number_of_images=int(state.imagen_image_count),
+        negative_prompt=state.image_negative_prompt_input,
+        add_watermark=state.imagen_watermark,
+        seed=state.imagen_seed,
     )
-    number_of_images = int(state.imagen_image_count)
-
-    generation_params = {
-        "prompt": prompt,
-        "add_watermark": True,
-        "aspect_ratio": getattr(state, "image_aspect_ratio"),
-        "number_of_images": number_of_images,
-        "language": "auto",
-        "negative_prompt": state.image_negative_prompt_input,
-    }
+    cache_key = None
+    if request.deterministic:
+        cache_key = PromptResultCache.key(request.model_name, request.generation_params())
+    return request, cache_key
+
+
+def image_uris(request: ImageRequest, cache_key: Optional[str]) -> Iterator[str]:
+    """GCS URIs of the request's images as they are generated; reads no page state"""
+    # Deterministic requests that were seen before reuse their earlier results
+    if cache_key:
+        cached_uris = prompt_result_cache.get(cache_key)
+        if cached_uris:
+            print(f"prompt cache hit: {cache_key}")
+            yield from cached_uris
+            return
 
     folder_name = datetime.datetime.now().strftime("%Y-%m-%d-%H-%M-%S")
-    if state.image_model_name == cfg.MODEL_IMAGEN4_ULTRA:
-        generation_params["number_of_images"] = 1
-    else:
-        generation_params["output_gcs_uri"] = f"gs://{cfg.IMAGE_CREATION_BUCKET}/{folder_name}"
-
-    # Save prompt to a file
-    storage_client = get_storage_client()
-    bucket = storage_client.bucket(cfg.IMAGE_CREATION_BUCKET)
-    prompt_filename = f"{folder_name}/prompt.txt"
-    prompt_blob = bucket.blob(prompt_filename)
-    prompt_blob.upload_from_string(prompt, content_type="text/plain")
-
-    response = image_generation_model.generate_images(**generation_params)
-
-    print(f"Response object: {response}")
-
-    if state.image_model_name == cfg.MODEL_IMAGEN4_ULTRA:
-        storage_client = get_storage_client()
-        bucket = storage_client.bucket(cfg.IMAGE_CREATION_BUCKET)
-        filename = f"{folder_name}/image-{datetime.datetime.now().strftime('%Y%m%d%H%M%S%f')}.png"
-        blob = bucket.blob(filename)
-        blob.upload_from_string(response[0]._image_bytes, content_type="image/png")
-        gcs_uri = f"gs://{cfg.IMAGE_CREATION_BUCKET}/{filename}"
-        state.image_output.append(gcs_uri)
-    else:
-        try:
-            for idx, img in enumerate(response):
-                print(
-                    f"generated image: {idx} size: {len(img._as_base64_string())} at {img._gcs_uri}"
-                )
-                state.image_output.append(img._gcs_uri) # type: ignore
-        except Exception as e:
-            print(f"Error processing image response: {e}")
-            # Handle the case where the response is a single image object
-            if not isinstance(response, list):
-                try:
-                    print(
-                        f"generated image: 0 size: {len(response._as_base64_string())} at {response._gcs_uri}"
-                    )
-                    state.image_output.append(response._gcs_uri) # type: ignore
-                except Exception as e2:
-                    print(f"Error processing single image response: {e2}")
+    uris = []
+    for gcs_uri in generate_image_uris(request, cfg.IMAGE_CREATION_BUCKET, folder_name):
+        uris.append(gcs_uri)
+        yield gcs_uri
+
+    # A partial result (e.g. a failed Ultra call) is not reused
+    if cache_key and len(uris) == request.number_of_images:
+        prompt_result_cache.put(cache_key, uris)
 
 
 def random_prompt_generator(e: me.ClickEvent):
     """Click Event to generate a random prompt from a list of predefined prompts."""
     state = me.state(State)
-    with open(cfg.IMAGEN_PROMPTS_JSON, "r", encoding="utf-8") as file:
-        data = file.read()
-    prompts = json.loads(data)
-    random_prompt = random.choice(prompts["imagen"])
+    # Walk the library without repeats, skipping prompts that clash with the selected modifiers
+    random_prompt, state.prompt_sample_position = prompt_library.sample_without_repeats(
+        state.prompt_sample_seed,
+        state.prompt_sample_position,
+        modifiers=modifier_registry.prompt_values(state),
+    )
+    if not random_prompt:
+        print("no compatible preset prompt found")
+        return
     state.image_prompt_placeholder = random_prompt
     on_image_input(
         me.InputEvent(key=str(state.image_textarea_key), value=random_prompt)
@@ -288,77 +321,37 @@ def rewrite_prompt(original_prompt: str):
         original_prompt (str): artists's original prompt
     """
     # state = me.state(State)
-    with telemetry.tool_context_manager("creative-studio"):
-        rewriting_model = GenerativeModel(cfg.MODEL_GEMINI_MULTIMODAL)
-    model_config = cfg.gemini_settings
-    generation_cfg = GenerationConfig(
-        temperature=model_config.generation["temperature"],
-        max_output_tokens=model_config.generation["max_output_tokens"],
-    )
-    safety_filters = {
-        HarmCategory.HARM_CATEGORY_DANGEROUS_CONTENT: model_config.safety_settings[
-            "DANGEROUS_CONTENT"
-        ],
-        HarmCategory.HARM_CATEGORY_HATE_SPEECH: model_config.safety_settings[
-            "HATE_SPEECH"
-        ],
-        HarmCategory.HARM_CATEGORY_SEXUALLY_EXPLICIT: model_config.safety_settings[
-            "SEXUALLY_EXPLICIT"
-        ],
-        HarmCategory.HARM_CATEGORY_HARASSMENT: model_config.safety_settings[
-            "HARASSMENT"
-        ],
-    }
+    rewriting_model = get_gemini_model(cfg.MODEL_GEMINI_MULTIMODAL, cfg.gemini_settings)
     response = rewriting_model.generate_content(
         REWRITER_PROMPT.format(original_prompt),
-        generation_config=generation_cfg,
-        safety_settings=safety_filters,
     )
     print(f"asked to rewrite: '{original_prompt}")
     print(f"rewritten as: {response.text}")
     return response.text
 
 
-def generate_compliment(generation_instruction: str):
-    """
-    Outputs a Gemini generated comment about images
-    """
-    state = me.state(State)
-    with telemetry.tool_context_manager("creative-studio"):
-        generation_model = GenerativeModel(cfg.MODEL_GEMINI_MULTIMODAL)
-    model_config = cfg.gemini_settings
-    generation_cfg = GenerationConfig(
-        temperature=model_config.generation["temperature"],
-        max_output_tokens=model_config.generation["max_output_tokens"],
-    )
-    safety_filters = {
-        HarmCategory.HARM_CATEGORY_DANGEROUS_CONTENT: model_config.safety_settings[
-            "DANGEROUS_CONTENT"
-        ],
-        HarmCategory.HARM_CATEGORY_HATE_SPEECH: model_config.safety_settings[
-            "HATE_SPEECH"
-        ],
-        HarmCategory.HARM_CATEGORY_SEXUALLY_EXPLICIT: model_config.safety_settings[
-            "SEXUALLY_EXPLICIT"
-        ],
-        HarmCategory.HARM_CATEGORY_HARASSMENT: model_config.safety_settings[
-            "HARASSMENT"
-        ],
-    }
+def _chunk_text(chunk) -> str:
+    """Text of a streamed Gemini chunk; empty when the chunk carries none."""
+    try:
+        return chunk.text
+    except (ValueError, AttributeError):
+        return ""
+
+
+def critic_chunks(image_uris: list[str], generation_instruction: str) -> Iterator[str]:
+    """Streams the text of a Gemini generated comment about images"""
+    generation_model = get_gemini_model(cfg.MODEL_GEMINI_MULTIMODAL, cfg.gemini_settings)
     prompt_parts = []
-    for idx, img in enumerate(state.image_output):
+    for idx, img in enumerate(image_uris):
         # not bytes
         # prompt_parts.append(Part.from_data(data=img, mime_type="image/png"))
         # now gcs uri
         prompt_parts.append(f"""image {idx+1}""")
         prompt_parts.append(Part.from_uri(uri=img, mime_type="image/png"))
     prompt_parts.append(MAGAZINE_EDITOR_PROMPT.format(generation_instruction))
-    response = generation_model.generate_content(
-        prompt_parts,
-        generation_config=generation_cfg,
-        safety_settings=safety_filters,
-    )
-    state.image_commentary = response.text
+    responses = generation_model.generate_content(prompt_parts, stream=True)
+    for chunk in responses:
+        yield _chunk_text(chunk)
 
 
 @me.page(
@@ -526,302 +519,8 @@ def app():
                                             me.icon("expand_more")
 
                             # Default Modifiers
-                            me.select(
-                                label="Aspect Ratio",
-                                options=[
-                                    me.SelectOption(label="1:1", value="1:1"),
-                                    me.SelectOption(label="3:4", value="3:4"),
-                                    me.SelectOption(label="4:3", value="4:3"),
-                                    me.SelectOption(label="16:9", value="16:9"),
-                                    me.SelectOption(label="9:16", value="9:16"),
-                                ],
-                                key="aspect_ratio",
-                                on_selection_change=on_selection_change_image,
-                                style=me.Style(width="160px"),
-                                value=state.image_aspect_ratio,
-                            )
-                            content_type_options = []
-                            for content in [
-                                "None",
-                                "Abstract",
-                                "Aerial",
-                                "Architecture",
-                                "Art",
-                                "Commercial",
-                                "Conceptual",
-                                "Concert",
-                                "Documentary",
-                                "Editorial",
-                                "Fashion",
-                                "Fine Art",
-                                "Food Photography",
-                                "Illustration",
-                                "Landscape",
-                                "Macro",
-                                "Minimalist",
-                                "Modern",
-                                "Night Photography",
-                                "Painting",
-                                "Photo",
-                                "Portrait",
-                                "Product Photography",
-                                "Sketch",
-                                "Sports",
-                                "Still Life",
-                                "Street Photography",
-                                "Surreal",
-                                "Travel",
-                                "Underwater",
-                                "Vintage",
-                                "Wedding",
-                                "Wildlife",
-                            ]:
-                                content_type_options.append(
-                                    me.SelectOption(label=content, value=content)
-                                )
-                            me.select(
-                                label="Content Type",
-                                options=content_type_options,
-                                key="content_type",
-                                on_selection_change=on_selection_change_image,
-                                style=me.Style(width="160px"),
-                                value=state.image_content_type,
-                            )
-
-                            color_and_tone_options = []
-                            for c in [
-                                "None",
-                                "Cinematic",
-                                "4K HDR",
-                                "Analogous colors",
-                                "Black and white",
-                                "Bleach bypass",
-                                "Blue tone",
-                                "Color grading",
-                                "Color splash",
-                                "Complementary colors",
-                                "Cool tone",
-                                "Cross processed",
-                                "Cyan tone",
-                                "Desaturated",
-                                "Duotone",
-                                "Earth tones",
-                                "Film noir",
-                                "Golden",
-                                "Gradient",
-                                "Green tone",
-                                "High contrast",
-                                "Infrared",
-                                "Jewel tones",
-                                "Kodachrome",
-                                "Low contrast",
-                                "Magenta tone",
-                                "Monochromatic",
-                                "Muted color",
-                                "Muted orange warm tones",
-                                "Neon",
-                                "Ombre",
-                                "Orange tone",
-                                "Pastel color",
-                                "Pink tone",
-                                "Polaroid",
-                                "Purple tone",
-                                "Red tone",
-                                "Saturated",
-                                "Sepia",
-                                "Split complementary",
-                                "Technicolor",
-                                "Tetradic colors",
-                                "Toned image",
-                                "Triadic colors",
-                                "Vibrant",
-                                "Vintage",
-                                "Warm tone",
-                                "Yellow tone",
-                            ]:
-                                color_and_tone_options.append(
-                                    me.SelectOption(label=c, value=c)
-                                )
-                            me.select(
-                                label="Color & Tone",
-                                options=color_and_tone_options,
-                                key="color_tone",
-                                on_selection_change=on_selection_change_image,
-                                style=me.Style(width="160px"),
-                                value=state.image_color_tone,
-                            )
-
-                            lighting_options = []
-                            for l in [
-                                "None",
-                                "Accent lighting",
-                                "Ambient light",
-                                "Backlighting",
-                                "Background light",
-                                "Beauty lighting",
-                                "Blue hour",
-                                "Bottom lighting",
-                                "Broad lighting",
-                                "Butterfly lighting",
-                                "Candlelight",
-                                "Chiaroscuro",
-                                "Cinematic lighting",
-                                "Cloudy",
-                                "Cold lighting",
-                                "Concert lighting",
-                                "Contre-jour",
-                                "Dawn",
-                                "Diffused light",
-                                "Directional light",
-                                "Dramatic light",
-                                "Dusk",
-                                "Fill light",
-                                "Firelight",
-                                "Flash photography",
-                                "Floodlight",
-                                "Fluorescent",
-                                "Front lighting",
-                                "God rays",
-                                "Golden hour",
-                                "Hair light",
-                                "Hard light",
-                                "Harsh light",
-                                "High key lighting",
-                                "High Contrast",
-                                "Incandescent",
-                                "Key light",
-                                "LED lighting",
-                                "Long-time exposure",
-                                "Loop lighting",
-                                "Low key lighting",
-                                "Low lighting",
-                                "Magic hour",
-                                "Moonlight",
-                                "Moody lighting",
-                                "Multiexposure",
-                                "Natural light",
-                                "Neon lighting",
-                                "Overcast",
-                                "Rembrandt lighting",
-                                "Rim lighting",
-                                "Ring light",
-                                "Short lighting",
-                                "Side lighting",
-                                "Silhouette",
-                                "Soft light",
-                                "Softbox",
-                                "Split lighting",
-                                "Spotlight",
-                                "Stage lighting",
-                                "Stormy lighting",
-                                "Strobe light",
-                                "Studio light",
-                                "Sunbeam",
-                                "Sunny",
-                                "Surreal lighting",
-                                "Top lighting",
-                                "Twilight",
-                                "Umbrella lighting",
-                                "Underwater lighting",
-                                "Volumetric lighting",
-                                "Warm lighting",
-                            ]:
-                                lighting_options.append(
-                                    me.SelectOption(label=l, value=l)
-                                )
-                            me.select(
-                                label="Lighting",
-                                options=lighting_options,
-                                key="lighting",
-                                on_selection_change=on_selection_change_image,
-                                value=state.image_lighting,
-                            )
-
-                            composition_options = []
-                            for c in [
-                                "None",
-                                "Shallow depth of field",
-                                "Abstract composition",
-                                "Action shot",
-                                "Aerial",
-                                "Asymmetrical",
-                                "Backlit",
-                                "Background focus",
-                                "Bird's eye view",
-                                "Bokeh",
-                                "Busy composition",
-                                "Candid",
-                                "Centered composition",
-                                "Circular composition",
-                                "Closeup",
-                                "Collage",
-                                "Depth of field",
-                                "Diagonal composition",
-                                "Diptych",
-                                "Double exposure",
-                                "Dutch angle",
-                                "Dynamic composition",
-                                "Environmental portrait",
-                                "Extreme closeup",
-                                "Extreme wide shot",
-                                "Eye level",
-                                "Fish eye",
-                                "Foreground focus",
-                                "Frame within frame",
-                                "From below",
-                                "Full body shot",
-                                "Geometric",
-                                "Golden ratio",
-                                "Group composition",
-                                "Half body shot",
-                                "Head and shoulders",
-                                "High angle",
-                                "Isolated subject",
-                                "Knolling",
-                                "Landscape photography",
-                                "Layered composition",
-                                "Leading lines",
-                                "Long shot",
-                                "Low angle",
-                                "Macro photography",
-                                "Medium shot",
-                                "Minimalist composition",
-                                "Montage",
-                                "Negative space",
-                                "Off-center",
-                                "Organic shapes",
-                                "Over the shoulder",
-                                "Panoramic",
-                                "Photographed through window",
-                                "Point of view",
-                                "Posed",
-                                "Profile shot",
-                                "Reflection",
-                                "Rule of thirds",
-                                "Shot from above",
-                                "Shot from below",
-                                "Silhouette",
-                                "Still life",
-                                "Straight angle",
-                                "Surface detail",
-                                "Symmetrical",
-                                "Taken from far away",
-                                "Three-quarter view",
-                                "Tilt-shift",
-                                "Triptych",
-                                "Wide angle",
-                                "Worm's eye view",
-                            ]:
-                                composition_options.append(
-                                    me.SelectOption(label=c, value=c)
-                                )
-                            me.select(
-                                label="Composition",
-                                options=composition_options,
-                                key="composition",
-                                on_selection_change=on_selection_change_image,
-                                value=state.image_composition,
-                            )
+                            for key in _MODIFIER_ROWS[0]:
+                                modifier_select(state, key)
 
                         # Second row of modifiers - New Phase 1 Features
                         with me.box(
@@ -834,459 +533,25 @@ def app():
                                 flex_wrap="wrap",
                             )
                         ):
-                            # Art Style
-                            art_style_options = []
-                            for style in [
-                                "None",
-                                "Realistic",
-                                "Photorealistic",
-                                "Hyperrealistic",
-                                "Studio Ghibli",
-                                "Anime",
-                                "Manga",
-                                "Disney",
-                                "Pixar",
-                                "Impressionist painting",
-                                "Van Gogh",
-                                "Monet",
-                                "Picasso",
-                                "Surreal",
-                                "Salvador Dali",
-                                "Abstract",
-                                "Minimalist",
-                                "Fantasy",
-                                "Pop Art",
-                                "Andy Warhol",
-                                "Watercolor",
-                                "Oil Painting",
-                                "Acrylic",
-                                "Digital art",
-                                "Concept Art",
-                                "3D Render",
-                                "Pixel Art",
-                                "Vector Art",
-                                "Technical pencil drawing",
-                                "Charcoal drawing",
-                                "Color pencil drawing",
-                                "Pastel painting",
-                                "Sketch",
-                                "Pencil Drawing",
-                                "Charcoal",
-                                "Ink Drawing",
-                                "Pastel",
-                                "Art Nouveau",
-                                "Art Deco (poster)",
-                                "Renaissance painting",
-                                "Baroque",
-                                "Gothic",
-                                "Cyberpunk",
-                                "Steampunk",
-                                "Retro",
-                                "Vintage",
-                                "Grunge",
-                            ]:
-                                art_style_options.append(
-                                    me.SelectOption(label=style, value=style)
-                                )
-                            me.select(
-                                label="Art Style",
-                                options=art_style_options,
-                                key="art_style",
-                                on_selection_change=on_selection_change_image,
-                                style=me.Style(width="160px"),
-                                value=state.image_art_style,
-                            )
-
-                            # Mood/Atmosphere
-                            mood_options = []
-                            for mood in [
-                                "None",
-                                "Futuristic",
-                                "Calm",
-                                "Peaceful",
-                                "Serene",
-                                "Tranquil",
-                                "Energetic",
-                                "Dynamic",
-                                "Vibrant",
-                                "Lively",
-                                "Mysterious",
-                                "Enigmatic",
-                                "Dark",
-                                "Moody",
-                                "Romantic",
-                                "Dreamy",
-                                "Whimsical",
-                                "Dramatic",
-                                "Intense",
-                                "Epic",
-                                "Heroic",
-                                "Melancholic",
-                                "Nostalgic",
-                                "Joyful",
-                                "Cheerful",
-                                "Uplifting",
-                                "Ominous",
-                                "Foreboding",
-                                "Ethereal",
-                                "Magical",
-                                "Mystical",
-                                "Cozy",
-                                "Warm",
-                                "Cold",
-                                "Lonely",
-                                "Crowded",
-                                "Bustling",
-                                "Quiet",
-                                "Loud",
-                                "Chaotic",
-                                "Orderly",
-                                "Ancient",
-                                "Timeless",
-                            ]:
-                                mood_options.append(
-                                    me.SelectOption(label=mood, value=mood)
-                                )
-                            me.select(
-                                label="Mood/Atmosphere",
-                                options=mood_options,
-                                key="mood_atmosphere",
-                                on_selection_change=on_selection_change_image,
-                                style=me.Style(width="160px"),
-                                value=state.image_mood_atmosphere,
-                            )
-
-                            # Texture
-                            texture_options = []
-                            for texture in [
-                                "None",
-                                "Smooth",
-                                "Rough",
-                                "Glossy",
-                                "Matte",
-                                "Metallic",
-                                "Shiny",
-                                "Reflective",
-                                "Realistic Human skin texture",
-                                "Soft skin",
-                                "Detailed skin",
-                                "Pore detail",
-                                "Skin imperfections",
-                                "Natural complexion",
-                                "Healthy skin",
-                                "Youthful skin",
-                                "Mature skin",
-                                "Fabric",
-                                "Cotton",
-                                "Silk",
-                                "Velvet",
-                                "Leather",
-                                "Wood",
-                                "Oak",
-                                "Pine",
-                                "Bamboo",
-                                "Stone",
-                                "Marble",
-                                "Granite",
-                                "Concrete",
-                                "Brick",
-                                "Glass",
-                                "Crystal",
-                                "Plastic",
-                                "Rubber",
-                                "Paper",
-                                "Cardboard",
-                                "Sand",
-                                "Gravel",
-                                "Fur",
-                                "Feathers",
-                                "Scales",
-                                "Bark",
-                                "Moss",
-                                "Rust",
-                                "Weathered",
-                                "Cracked",
-                                "Worn",
-                                "Polished",
-                                "Brushed",
-                                "Hammered",
-                                "Embossed",
-                                "Textured",
-                            ]:
-                                texture_options.append(
-                                    me.SelectOption(label=texture, value=texture)
-                                )
-                            me.select(
-                                label="Texture",
-                                options=texture_options,
-                                key="texture",
-                                on_selection_change=on_selection_change_image,
-                                style=me.Style(width="160px"),
-                                value=state.image_texture,
-                            )
-
-                            # Lens Type
-                            lens_type_options = [
-                                me.SelectOption(label="None", value="None"),
-                                me.SelectOption(label="Fisheye", value="Fisheye"),
-                                me.SelectOption(label="Ultra-Wide", value="Ultra-Wide)"),
-                                me.SelectOption(label="Wide Angle)", value="Wide Angle"),
-                                me.SelectOption(label="Cinematic Prime", value="Cinematic Prime"),
-                                me.SelectOption(label="Standard", value="Standard"),
-                                me.SelectOption(label="Macro Standard", value="Macro"),
-                                me.SelectOption(label="Telephoto (85mm)", value="Telephoto"),
-                                me.SelectOption(label="Macro", value="Macro 105mm"),
-                                me.SelectOption(label="Anamorphic", value="Anamorphic"),
-                            ]
-                            me.select(
-                                label="Lens Type",
-                                options=lens_type_options,
-                                key="lens_type",
-                                on_selection_change=on_selection_change_image,
-                                style=me.Style(width="160px"),
-                                value=state.image_lens_type,
-                            )
+                            for key in _MODIFIER_ROWS[1]:
+                                modifier_select(state, key)
 
                         # Third row of modifiers - Phase 2: Subject-Specific Options (Advanced)
                         if state.show_advanced:
-                            # Subject Details
-                            with me.box(
-                                style=me.Style(
-                                    display="flex",
-                                    justify_content="center",
-                                    gap=2,
-                                    width="100%",
-                                    margin=me.Margin(top=10),
-                                    flex_wrap="wrap",
-                                )
-                            ):
-                                # Subject Age
-                                subject_age_options = []
-                                for age in ["None", "Child", "Elderly", "Middle-aged", "Senior", "Teen", "Young Adult"]:
-                                    subject_age_options.append(me.SelectOption(label=age, value=age))
-                                me.select(
-                                    label="Subject Age",
-                                    options=subject_age_options,
-                                    key="subject_age",
-                                    on_selection_change=on_selection_change_image,
-                                    style=me.Style(width="160px"),
-                                    value=state.image_subject_age,
-                                )
-
-                                # Facial Expression
-                                facial_expression_options = []
-                                for expression in ["None", "Angry", "Calm", "Cheerful", "Confident", "Contemplative", "Curious", "Determined", "Disappointed", "Excited", "Focused", "Happy", "Joyful", "Laughing", "Melancholic", "Peaceful", "Playful", "Relaxed", "Sad", "Serious", "Smiling", "Surprised", "Thoughtful", "Worried"]:
-                                    facial_expression_options.append(me.SelectOption(label=expression, value=expression))
-                                me.select(
-                                    label="Facial Expression",
-                                    options=facial_expression_options,
-                                    key="subject_gender",
-                                    on_selection_change=on_selection_change_image,
-                                    style=me.Style(width="160px"),
-                                    value=state.image_subject_gender,
-                                )
-
-                                # Subject Clothing
-                                subject_clothing_options = []
-                                for clothing in ["None", "Bohemian", "Business", "Casual", "Elegant", "Evening wear", "Formal", "Minimalist", "Modern", "Professional", "Sporty", "Streetwear", "Summer clothes", "Traditional", "Vintage", "Winter clothes"]:
-                                    subject_clothing_options.append(me.SelectOption(label=clothing, value=clothing))
-                                me.select(
-                                    label="Subject Clothing",
-                                    options=subject_clothing_options,
-                                    key="subject_clothing",
-                                    on_selection_change=on_selection_change_image,
-                                    style=me.Style(width="160px"),
-                                    value=state.image_subject_clothing,
-                                )
-
-                                # Subject Hair
-                                subject_hair_options = []
-                                for hair in ["None", "Bald", "Black", "Blonde", "Braided", "Brunette", "Colorful", "Curly", "Gray", "Long", "Medium", "Messy", "Natural", "Ponytail", "Red", "Short", "Straight", "Styled", "Wavy"]:
-                                    subject_hair_options.append(me.SelectOption(label=hair, value=hair))
-                                me.select(
-                                    label="Subject Hair",
-                                    options=subject_hair_options,
-                                    key="subject_hair",
-                                    on_selection_change=on_selection_change_image,
-                                    style=me.Style(width="160px"),
-                                    value=state.image_subject_hair,
-                                )
-
-                            # Environment Details
-                            with me.box(
-                                style=me.Style(
-                                    display="flex",
-                                    justify_content="center",
-                                    gap=2,
-                                    width="100%",
-                                    margin=me.Margin(top=10),
-                                    flex_wrap="wrap",
-                                )
-                            ):
-                                # Environment Setting
-                                environment_options = []
-                                for env in ["None", "Beach", "Cafe", "City", "Desert", "Forest", "Gallery", "Home", "Indoor", "Mountain", "Museum", "Natural setting", "Office", "Outdoor", "Park", "Restaurant", "Rural", "Street", "Studio", "Urban"]:
-                                    environment_options.append(me.SelectOption(label=env, value=env))
-                                me.select(
-                                    label="Environment",
-                                    options=environment_options,
-                                    key="environment_setting",
-                                    on_selection_change=on_selection_change_image,
-                                    style=me.Style(width="160px"),
-                                    value=state.image_environment_setting,
-                                )
-
-                                # Time of Day
-                                time_options = []
-                                for time in ["None", "Afternoon", "Blue hour", "Dawn", "Evening", "Golden hour", "Midnight", "Morning", "Night", "Noon", "Sunrise", "Sunset", "Twilight"]:
-                                    time_options.append(me.SelectOption(label=time, value=time))
-                                me.select(
-                                    label="Time of Day",
-                                    options=time_options,
-                                    key="time_of_day",
-                                    on_selection_change=on_selection_change_image,
-                                    style=me.Style(width="160px"),
-                                    value=state.image_time_of_day,
-                                )
-
-                                # Weather Condition
-                                weather_options = []
-                                for weather in ["None", "Clear sky", "Cloudy", "Cold", "Dry", "Foggy", "Humid", "Misty", "Overcast", "Partly cloudy", "Rainy", "Snowy", "Stormy", "Sunny", "Warm", "Windy"]:
-                                    weather_options.append(me.SelectOption(label=weather, value=weather))
-                                me.select(
-                                    label="Weather",
-                                    options=weather_options,
-                                    key="weather_condition",
-                                    on_selection_change=on_selection_change_image,
-                                    style=me.Style(width="160px"),
-                                    value=state.image_weather_condition,
-                                )
-
-                                # Season
-                                season_options = []
-                                for season in ["None", "Autumn", "Early spring", "Fall", "Holiday season", "Late summer", "Mid-winter", "Spring", "Summer", "Winter"]:
-                                    season_options.append(me.SelectOption(label=season, value=season))
-                                me.select(
-                                    label="Season",
-                                    options=season_options,
-                                    key="season",
-                                    on_selection_change=on_selection_change_image,
-                                    style=me.Style(width="160px"),
-                                    value=state.image_season,
-                                )
-
-                            # Composition Tools
-                            with me.box(
-                                style=me.Style(
-                                    display="flex",
-                                    justify_content="center",
-                                    gap=2,
-                                    width="100%",
-                                    margin=me.Margin(top=10),
-                                    flex_wrap="wrap",
-                                )
-                            ):
-                                # Camera Angle
-                                camera_angle_options = [me.SelectOption(label="None", value="None")]
-                                for angle in ["Eye-Level", "Low-Angle", "High-Angle", "Bird's-Eye View", "Dutch Angle"]:
-                                    camera_angle_options.append(me.SelectOption(label=angle, value=angle))
-                                me.select(
-                                    label="Camera Angle",
-                                    options=camera_angle_options,
-                                    key="camera_angle",
-                                    on_selection_change=on_selection_change_image,
-                                    style=me.Style(width="160px"),
-                                    value=state.image_camera_angle,
-                                )
-
-                                # Aperture
-                                aperture_options = [me.SelectOption(label="None", value="None")]
-                                for aperture in [
-                                    "f/1.2",  # Ultra wide, specialty portrait lenses
-                                    "f/1.4",  
-                                    "f/1.8",  # Very common fast prime lenses
-                                    "f/2",
-                                    "f/2.8",
-                                    "f/4",
-                                    "f/5.6",
-                                    "f/8",
-                                    "f/11",
-                                    "f/16",
-                                    "f/22",   # Very narrow, landscape, max DoF
-                                ]:
-                                    aperture_options.append(me.SelectOption(label=aperture, value=aperture))
-                                me.select(
-                                    label="Aperture",
-                                    options=aperture_options,
-                                    key="aperture",
-                                    on_selection_change=on_selection_change_image,
-                                    style=me.Style(width="160px"),
-                                    value=state.image_aperture,
-                                )
-
-                                # Film Type
-                                film_type_options = [me.SelectOption(label="None", value="None")]
-                                for film in ["black and white", "polaroid", "Film noir", "duotone", "Grainy film", "Sepia tone"]:
-                                    film_type_options.append(me.SelectOption(label=film, value=film))
-                                me.select(
-                                    label="Film Type",
-                                    options=film_type_options,
-                                    key="film_type",
-                                    on_selection_change=on_selection_change_image,
-                                    style=me.Style(width="160px"),
-                                    value=state.image_film_type,
-                                )
-
-                                # Depth of Field
-                                # Focus Technique
-                                focus_technique_options = [
-                                    me.SelectOption(label="None", value="None"),
-                                     # Common cinematic/photography focus styles
-                                    me.SelectOption(label="-Soft focus (Dreamy)", value="Soft focus"),
-                                    me.SelectOption(label="-Deep focus (Everything sharp)", value="Deep focus"),
-                                    me.SelectOption(label="-Zone focusing (street photography)", value="Zone focusing"),
-                                    me.SelectOption(label="-Shallow focus (bokeh)", value="Shallow focus"),
-                                    me.SelectOption(label="-Selective focus (Isolate a specific detail)", value="Selective focus"),
-                                    me.SelectOption(label="-Split diopter (Multi focus with bokeh)", value="Split diopter"),
-                                    me.SelectOption(label="-Follow focus (moving subject)", value="Follow focus"),
-                                    me.SelectOption(label="-Motion blur (Dynamic movement)", value="Motion blur"),
-
-                                ]
-                                me.select(
-                                    label="Focus Technique",
-                                    options=focus_technique_options,
-                                    key="focus_technique",
-                                    on_selection_change=on_selection_change_image,
-                                    style=me.Style(width="160px"),
-                                    value=state.image_focus_technique,
-                                )
-
-                                # Focal Length
-                                focal_length_options = [
-                                    me.SelectOption(label="None", value="None"),
-                                    # Wide / Ultra-wide
-                                    me.SelectOption(label="-10mm (Ultra wide-angle, Landscapes, Architecture, Long exposure.)", value="10mm"),
-                                    me.SelectOption(label="-24mm (Wide-angle, Environmental portraits, Street, Travel.)", value="24mm"),
-                                    me.SelectOption(label="-35mm (Street, Documentary, Environmental portraits.)", value="35mm"),
-                                    # Standard range
-                                    me.SelectOption(label="-50mm (Standard, Classic portraits, Everyday photography, Natural perspective.)", value="50mm"),
-                                    # Macro / Still life
-                                    me.SelectOption(label="-60mm (Macro, Still life, Controlled lighting, Product photography.)", value="60mm"),
-                                    # Portrait primes
-                                    me.SelectOption(label="-85mm (Portraits, Bokeh, Shallow depth of field, Classic headshots.)", value="85mm"),
-                                    me.SelectOption(label="-105mm (Macro, Portraits, Short telephoto, Precise focusing.)", value="105mm"),
-                                    # Telephoto range
-                                    me.SelectOption(label="-200mm (Portraits, Sports, Compression effect, Telephoto.)", value="200mm"),
-                                    me.SelectOption(label="-400mm (Sports, Wildlife, Action, Super telephoto, Fast shutter.)", value="400mm"),
-                                ]
-                                me.select(
-                                    label="Focal Length",
-                                    options=focal_length_options,
-                                    key="focal_length",
-                                    on_selection_change=on_selection_change_image,
-                                    style=me.Style(width="160px"),
-                                    value=state.image_focal_length,
-                                )
+                            # Subject details, environment details and composition tools
+                            for row in _ADVANCED_MODIFIER_ROWS:
+                                with me.box(
+                                    style=me.Style(
+                                        display="flex",
+                                        justify_content="center",
+                                        gap=2,
+                                        width="100%",
+                                        margin=me.Margin(top=10),
+                                        flex_wrap="wrap",
+                                    )
+                                ):
+                                    for key in row:
+                                        modifier_select(state, key)
 
                         # Advanced controls
                         # negative prompt
@@ -1320,7 +585,6 @@ def app():
                                     on_selection_change=on_select_image_count,
                                     key="imagen_image_count",
                                     style=me.Style(width="155px"),
-                                    disabled=state.image_model_name == cfg.MODEL_IMAGEN4_ULTRA,
                                 )
                                 me.checkbox(
                                     label="watermark",
@@ -1360,32 +624,20 @@ def app():
                                         flex_wrap="wrap", display="flex", gap="15px"
                                     )
                                 ):
-                                    storage_client = get_storage_client()
-                                    for _, img in enumerate(state.image_output):
-                                        try:
-                                            bucket_name, blob_name = img.replace("gs://", "").split("/", 1)
-                                            bucket = storage_client.bucket(bucket_name)
-                                            blob = bucket.blob(blob_name)
-                                            # Use the service account associated with the Cloud Run service to sign the URL
-                                            project_id = os.environ.get("PROJECT_ID")
-                                            sa_email = f"sa-imagen-studio@{project_id}.iam.gserviceaccount.com"
-                                            signed_url = blob.generate_signed_url(
-                                                version="v4",
-                                                expiration=datetime.timedelta(minutes=60),
-                                                method="GET",
-                                                service_account_email=sa_email,
-                                                access_token=None,  # Use IAM to sign
-                                            )
-                                            me.image(
-                                                src=signed_url,
-                                                style=me.Style(
-                                                    width="300px",
-                                                    margin=me.Margin(top=10),
-                                                    border_radius="35px",
-                                                ),
-                                            )
-                                        except Exception as e:
-                                            print(f"Error displaying image: {e}")
+                                    # Use the service account associated with the Cloud Run service to sign the URLs
+                                    signed_urls = signed_url_cache.get_many(state.image_output)
+                                    for img, signed_url in zip(state.image_output, signed_urls):
+                                        if not signed_url:
+                                            print(f"Error displaying image: could not sign {img}")
+                                            continue
+                                        me.image(
+                                            src=signed_url,
+                                            style=me.Style(
+                                                width="300px",
+                                                margin=me.Margin(top=10),
+                                                border_radius="35px",
+                                            ),
+                                        )
 
                                 # SynthID notice
                                 with me.box(
@@ -1451,6 +703,8 @@ def app():
                                         "magazine editor",
                                         style=me.Style(font_weight=500),
                                     )
+                                    if state.is_commentary_loading and not state.image_commentary:
+                                        me.progress_spinner(diameter=20, stroke_width=3)
                                     me.markdown(
                                         text=state.image_commentary,
                                         style=me.Style(padding=me.Padding(left=15, right=15, top=15, bottom=15)),
@@ -1459,6 +713,19 @@ def app():
         footer()
 
 
+def modifier_select(state: State, key: str):
+    """Select control for an image modifier, from the precomputed registry"""
+    spec = modifier_registry[key]
+    me.select(
+        label=spec.label,
+        options=_MODIFIER_SELECT_OPTIONS[key],
+        key=key,
+        on_selection_change=on_selection_change_image,
+        style=_MODIFIER_SELECT_STYLES[key],
+        value=getattr(state, f"image_{key}"),
+    )
+
+
 def footer():
     """Creates the footer of the application"""
     with me.box(
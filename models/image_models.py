@@ -12,7 +12,11 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 """ Image Models type definitions """
-from typing import TypedDict
+import base64
+import hashlib
+from dataclasses import dataclass
+from functools import cached_property
+from typing import Optional, TypedDict
 
 
 class ImageModel(TypedDict):
@@ -20,3 +24,64 @@ class ImageModel(TypedDict):
 
     display: str
     model_name: str
+
+
+@dataclass
+class ImageResult:
+    """A generated image, held as raw bytes and/or its GCS location.
+
+    Sizes and content hashes are computed from the raw bytes; base64 is only
+    produced when a consumer asks for it.
+    """
+
+    gcs_uri: Optional[str] = None
+    data: Optional[memoryview] = None
+    mime_type: str = "image/png"
+
+    @classmethod
+    def from_imagen(cls, image, gcs_uri: Optional[str] = None) -> "ImageResult":
+        """Wraps a vertexai GeneratedImage without downloading or encoding it.
+
+        Images written by Imagen to output_gcs_uri have no bytes loaded; reading
+        `_image_bytes` on them would download the file, so only bytes that are
+        already in memory are used.
+        """
+        raw = getattr(image, "_loaded_bytes", None)
+        if raw is None and not getattr(image, "_gcs_uri", None):
+            raw = image._image_bytes
+        return cls(
+            gcs_uri=gcs_uri or getattr(image, "_gcs_uri", None),
+            data=memoryview(raw) if raw is not None else None,
+        )
+
+    @property
+    def size(self) -> Optional[int]:
+        """Size in bytes, or None when only the GCS location is known."""
+        return self.data.nbytes if self.data is not None else None
+
+    @cached_property
+    def sha256(self) -> Optional[str]:
+        """Hex digest of the image bytes."""
+        if self.data is None:
+            return None
+        return hashlib.sha256(self.data).hexdigest()
+
+    def to_bytes(self) -> bytes:
+        """The image bytes, without copying when they are already a bytes object."""
+        if self.data is None:
+            raise ValueError(f"no image bytes loaded for {self.gcs_uri}")
+        if isinstance(self.data.obj, bytes) and self.data.nbytes == len(self.data.obj):
+            return self.data.obj
+        return self.data.tobytes()
+
+    def as_base64(self) -> str:
+        """Base64 encoding of the image, for consumers that need it inline."""
+        if self.data is None:
+            raise ValueError(f"no image bytes loaded for {self.gcs_uri}")
+        return base64.b64encode(self.data).decode("ascii")
+
+    def describe(self) -> str:
+        """Short description for logging."""
+        if self.data is None:
+            return f"at {self.gcs_uri}"
+        return f"size: {self.size} sha256: {self.sha256[:12]} at {self.gcs_uri}"
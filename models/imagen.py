@@ -0,0 +1,193 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+""" Imagen generation helpers: quota-aware retries and parallel fan-out """
+import datetime
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass
+from typing import Callable, Iterator
+
+from google.api_core import exceptions
+
+from common.storage import get_storage_client
+from config.default import Config
+from models.image_models import ImageResult
+from models.model_setup import get_image_generation_model
+
+cfg = Config()
+
+# Errors that indicate quota pressure or a transient backend problem
+RETRYABLE_ERRORS = (
+    exceptions.ResourceExhausted,
+    exceptions.TooManyRequests,
+    exceptions.ServiceUnavailable,
+)
+
+_executor = ThreadPoolExecutor(
+    max_workers=cfg.IMAGEN_FAN_OUT_MAX_WORKERS, thread_name_prefix="imagen-fan-out"
+)
+_model_semaphores: dict[str, threading.BoundedSemaphore] = {}
+_semaphores_lock = threading.Lock()
+
+
+def model_semaphore(model_name: str) -> threading.BoundedSemaphore:
+    """Semaphore bounding the concurrent in-flight requests to a model."""
+    with _semaphores_lock:
+        semaphore = _model_semaphores.get(model_name)
+        if semaphore is None:
+            limit = cfg.IMAGEN_MODEL_CONCURRENCY.get(
+                model_name, cfg.IMAGEN_DEFAULT_CONCURRENCY
+            )
+            semaphore = threading.BoundedSemaphore(limit)
+            _model_semaphores[model_name] = semaphore
+        return semaphore
+
+
+def backoff_delay(attempt: int, base_delay: float, max_delay: float) -> float:
+    """Exponential backoff with full jitter for the given 0-based attempt."""
+    return random.uniform(0, min(max_delay, base_delay * (2**attempt)))
+
+
+def generate_with_backoff(model_name: str, generation_params: dict):
+    """Calls Imagen under the model's concurrency limit, retrying on quota errors."""
+    model = get_image_generation_model(model_name)
+    for attempt in range(cfg.IMAGEN_RETRY_ATTEMPTS):
+        try:
+            with model_semaphore(model_name):
+                return model.generate_images(**generation_params)
+        except RETRYABLE_ERRORS as e:
+            if attempt == cfg.IMAGEN_RETRY_ATTEMPTS - 1:
+                raise
+            delay = backoff_delay(
+                attempt, cfg.IMAGEN_RETRY_BASE_DELAY, cfg.IMAGEN_RETRY_MAX_DELAY
+            )
+            print(f"{model_name} quota/backend error ({e}); retrying in {delay:.1f}s")
+            time.sleep(delay)
+
+
+def fan_out_generate(
+    model_name: str,
+    generation_params: dict,
+    count: int,
+    upload: Callable[[int, ImageResult], str],
+) -> Iterator[str]:
+    """Generates count images as concurrent single-image requests.
+
+    For models that only return one image per call (Imagen 4 Ultra). Each
+    result is uploaded with upload(index, image_result) on the same worker,
+    and the resulting gs:// uris are yielded in completion order. Failed
+    requests are logged and skipped. A seed, if given, is offset by the
+    index so the requests do not all return the same image.
+    """
+    params = dict(generation_params, number_of_images=1)
+    params.pop("output_gcs_uri", None)
+
+    def _generate_one(index: int) -> str:
+        request_params = params
+        if params.get("seed") is not None:
+            request_params = dict(params, seed=params["seed"] + index)
+        response = generate_with_backoff(model_name, request_params)
+        return upload(index, ImageResult.from_imagen(response[0]))
+
+    futures = [_executor.submit(_generate_one, idx) for idx in range(count)]
+    for future in as_completed(futures):
+        try:
+            yield future.result()
+        except Exception as e:
+            print(f"Error generating {model_name} image: {e}")
+
+
+@dataclass
+class ImageRequest:
+    """A fully-composed Imagen request, independent of any UI state."""
+
+    prompt: str
+    model_name: str
+    aspect_ratio: str = "1:1"
+    number_of_images: int = 1
+    negative_prompt: str = ""
+    add_watermark: bool = True
+    seed: int = 0
+
+    @property
+    def deterministic(self) -> bool:
+        """A seed is only honoured without a watermark; such requests repeat exactly."""
+        return bool(self.seed) and not self.add_watermark
+
+    def generation_params(self) -> dict:
+        params = {
+            "prompt": self.prompt,
+            "add_watermark": self.add_watermark,
+            "aspect_ratio": self.aspect_ratio,
+            "number_of_images": self.number_of_images,
+            "language": "auto",
+            "negative_prompt": self.negative_prompt,
+        }
+        if self.deterministic:
+            params["seed"] = self.seed
+        return params
+
+
+def generate_image_uris(
+    request: ImageRequest, bucket_name: str, folder_name: str
+) -> Iterator[str]:
+    """Generates the request's images under gs://bucket_name/folder_name.
+
+    The prompt is saved alongside the images, and gs:// uris are yielded as
+    images become available.
+    """
+    generation_params = request.generation_params()
+    if request.model_name != cfg.MODEL_IMAGEN4_ULTRA:
+        generation_params["output_gcs_uri"] = f"gs://{bucket_name}/{folder_name}"
+
+    # Save prompt to a file
+    bucket = get_storage_client().bucket(bucket_name)
+    prompt_blob = bucket.blob(f"{folder_name}/prompt.txt")
+    prompt_blob.upload_from_string(request.prompt, content_type="text/plain")
+
+    if request.model_name == cfg.MODEL_IMAGEN4_ULTRA:
+        # Ultra returns one image per request, so fan out N concurrent requests
+        def upload_image(idx: int, result: ImageResult) -> str:
+            filename = f"{folder_name}/image-{idx}-{datetime.datetime.now().strftime('%Y%m%d%H%M%S%f')}.png"
+            bucket.blob(filename).upload_from_string(result.to_bytes(), content_type=result.mime_type)
+            result.gcs_uri = f"gs://{bucket_name}/{filename}"
+            print(f"generated image: {idx} {result.describe()}")
+            return result.gcs_uri
+
+        yield from fan_out_generate(
+            request.model_name, generation_params, request.number_of_images, upload_image
+        )
+        return
+
+    response = generate_with_backoff(request.model_name, generation_params)
+
+    print(f"Response object: {response}")
+
+    try:
+        for idx, img in enumerate(response):
+            result = ImageResult.from_imagen(img)
+            print(f"generated image: {idx} {result.describe()}")
+            yield result.gcs_uri
+    except Exception as e:
+        print(f"Error processing image response: {e}")
+        # Handle the case where the response is a single image object
+        if not isinstance(response, list):
+            try:
+                result = ImageResult.from_imagen(response)
+                print(f"generated image: 0 {result.describe()}")
+                yield result.gcs_uri
+            except Exception as e2:
+                print(f"Error processing single image response: {e2}")
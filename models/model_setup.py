@@ -0,0 +1,142 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+""" Cached model handles for Imagen and Gemini """
+import threading
+from typing import Any, Callable, Hashable
+
+from google.cloud.aiplatform import telemetry
+from vertexai.generative_models import (
+    GenerationConfig,
+    GenerativeModel,
+    HarmCategory,
+)
+from vertexai.preview.vision_models import ImageGenerationModel
+
+from config.default import GeminiModelConfig
+
+
+class ModelHandleCache:
+    """Thread-safe cache of constructed model handles.
+
+    Each key is constructed at most once; concurrent callers for the same key
+    wait for the first construction instead of repeating it.
+    """
+
+    def __init__(self):
+        self._handles: dict[Hashable, Any] = {}
+        self._key_locks: dict[Hashable, threading.Lock] = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable, factory: Callable[[], Any]) -> Any:
+        handle = self._handles.get(key)
+        if handle is not None:
+            return handle
+        with self._lock:
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+        with key_lock:
+            handle = self._handles.get(key)
+            if handle is None:
+                handle = factory()
+                self._handles[key] = handle
+        return handle
+
+    def __len__(self) -> int:
+        return len(self._handles)
+
+
+_model_handles = ModelHandleCache()
+
+
+def config_fingerprint(model_config: GeminiModelConfig) -> tuple:
+    """Hashable summary of the settings baked into a Gemini model handle."""
+    return (
+        tuple(sorted((k, repr(v)) for k, v in model_config.generation.items())),
+        tuple(sorted((k, repr(v)) for k, v in model_config.safety_settings.items())),
+    )
+
+
+def get_image_generation_model(model_name: str) -> ImageGenerationModel:
+    """Returns the shared ImageGenerationModel handle for model_name."""
+    return _model_handles.get(
+        ("imagen", model_name),
+        lambda: ImageGenerationModel.from_pretrained(model_name),
+    )
+
+
+def _create_gemini_model(
+    model_name: str, model_config: GeminiModelConfig
+) -> GenerativeModel:
+    generation_cfg = GenerationConfig(
+        temperature=model_config.generation["temperature"],
+        max_output_tokens=model_config.generation["max_output_tokens"],
+    )
+    safety_filters = {
+        HarmCategory.HARM_CATEGORY_DANGEROUS_CONTENT: model_config.safety_settings[
+            "DANGEROUS_CONTENT"
+        ],
+        HarmCategory.HARM_CATEGORY_HATE_SPEECH: model_config.safety_settings[
+            "HATE_SPEECH"
+        ],
+        HarmCategory.HARM_CATEGORY_SEXUALLY_EXPLICIT: model_config.safety_settings[
+            "SEXUALLY_EXPLICIT"
+        ],
+        HarmCategory.HARM_CATEGORY_HARASSMENT: model_config.safety_settings[
+            "HARASSMENT"
+        ],
+    }
+    with telemetry.tool_context_manager("creative-studio"):
+        return GenerativeModel(
+            model_name,
+            generation_config=generation_cfg,
+            safety_settings=safety_filters,
+        )
+
+
+def get_gemini_model(
+    model_name: str, model_config: GeminiModelConfig
+) -> GenerativeModel:
+    """Returns the shared GenerativeModel for model_name with model_config's
+    generation and safety settings applied."""
+    return _model_handles.get(
+        ("gemini", model_name, config_fingerprint(model_config)),
+        lambda: _create_gemini_model(model_name, model_config),
+    )
+
+
+def warm_up_models(
+    image_model_names: list[str],
+    gemini_model_name: str,
+    model_config: GeminiModelConfig,
+) -> threading.Thread:
+    """Constructs all model handles on a background thread.
+
+    Requests that arrive before warm-up finishes simply wait for (or perform)
+    the construction of the handle they need.
+    """
+
+    def _warm_up():
+        for model_name in image_model_names:
+            try:
+                get_image_generation_model(model_name)
+            except Exception as e:
+                print(f"Error warming up {model_name}: {e}")
+        try:
+            get_gemini_model(gemini_model_name, model_config)
+        except Exception as e:
+            print(f"Error warming up {gemini_model_name}: {e}")
+        print(f"model handles warmed up: {len(_model_handles)}")
+
+    thread = threading.Thread(target=_warm_up, name="model-warm-up", daemon=True)
+    thread.start()
+    return thread
@@ -0,0 +1,190 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Indexed prompt library for random prompt sampling.
+
+The library file maps a category name to a list of entries. An entry is
+either a prompt string or an object:
+
+    {"prompt": "...", "tags": ["people"], "incompatible_modifiers": ["Macro"]}
+
+`incompatible_modifiers` lists modifier values that the prompt should not be
+combined with; filtered sampling skips such prompts.
+"""
+import json
+import math
+import os
+import random
+import threading
+import time
+from array import array
+from dataclasses import dataclass, field
+from typing import Iterable, Optional
+
+
+@dataclass
+class _Snapshot:
+    """Immutable view of one version of the library file."""
+
+    prompts: list[str] = field(default_factory=list)
+    categories: dict[str, array] = field(default_factory=dict)
+    tags: dict[str, array] = field(default_factory=dict)
+    # prompt id -> modifier values it is incompatible with (sparse)
+    incompatible: dict[int, frozenset[str]] = field(default_factory=dict)
+    mtime: float = 0.0
+
+
+def _load_snapshot(path: str) -> _Snapshot:
+    mtime = os.stat(path).st_mtime
+    with open(path, "r", encoding="utf-8") as file:
+        data = json.load(file)
+    snapshot = _Snapshot(mtime=mtime)
+    categories: dict[str, list[int]] = {}
+    tags: dict[str, list[int]] = {}
+    interned: dict[str, str] = {}
+    for category, entries in data.items():
+        for entry in entries:
+            if isinstance(entry, str):
+                entry = {"prompt": entry}
+            prompt_id = len(snapshot.prompts)
+            snapshot.prompts.append(entry["prompt"])
+            categories.setdefault(category, []).append(prompt_id)
+            for tag in entry.get("tags", ()):
+                tags.setdefault(interned.setdefault(tag, tag), []).append(prompt_id)
+            if entry.get("incompatible_modifiers"):
+                snapshot.incompatible[prompt_id] = frozenset(
+                    interned.setdefault(v, v) for v in entry["incompatible_modifiers"]
+                )
+    snapshot.categories = {k: array("I", v) for k, v in categories.items()}
+    snapshot.tags = {k: array("I", v) for k, v in tags.items()}
+    return snapshot
+
+
+def _permuted_index(seed: int, position: int, size: int) -> int:
+    """position-th element of a seeded pseudo-random permutation of range(size).
+
+    Uses an affine map i -> (a * i + b) mod size with gcd(a, size) == 1, so a
+    session only needs (seed, position) to walk the pool without repeats.
+    A fresh permutation is used for each full pass.
+    """
+    cycle, offset = divmod(position, size)
+    rng = random.Random(seed * 1_000_003 + cycle)
+    a = rng.randrange(1, size) if size > 1 else 1
+    while math.gcd(a, size) != 1:
+        a += 1
+    b = rng.randrange(size)
+    return (a * offset + b) % size
+
+
+class PromptLibrary:
+    """Prompt library loaded once per process and reloaded when the file changes.
+
+    Memory is shared by all sessions; per-session state for sampling without
+    repeats is just a seed and a position.
+    """
+
+    def __init__(self, path: str, reload_interval: float = 5.0):
+        self._path = path
+        self._reload_interval = reload_interval
+        self._lock = threading.Lock()
+        self._snapshot = _load_snapshot(path)
+        self._checked_at = time.monotonic()
+
+    def _current(self) -> _Snapshot:
+        """The current snapshot, reloading it if the file has changed."""
+        now = time.monotonic()
+        if now - self._checked_at < self._reload_interval:
+            return self._snapshot
+        with self._lock:
+            if now - self._checked_at >= self._reload_interval:
+                self._checked_at = now
+                try:
+                    if os.stat(self._path).st_mtime != self._snapshot.mtime:
+                        self._snapshot = _load_snapshot(self._path)
+                        print(f"reloaded prompt library: {len(self._snapshot.prompts)} prompts")
+                except (OSError, ValueError) as e:
+                    print(f"Error reloading prompt library {self._path}: {e}")
+        return self._snapshot
+
+    def __len__(self) -> int:
+        return len(self._current().prompts)
+
+    @property
+    def categories(self) -> list[str]:
+        return list(self._current().categories)
+
+    @property
+    def tags(self) -> list[str]:
+        return list(self._current().tags)
+
+    @staticmethod
+    def _pool(snapshot: _Snapshot, category: Optional[str], tag: Optional[str]):
+        """Candidate prompt ids: an index array, or a range over all prompts."""
+        if category is not None:
+            return snapshot.categories.get(category, array("I"))
+        if tag is not None:
+            return snapshot.tags.get(tag, array("I"))
+        return range(len(snapshot.prompts))
+
+    @staticmethod
+    def _compatible(snapshot: _Snapshot, prompt_id: int, modifiers: frozenset[str]) -> bool:
+        incompatible = snapshot.incompatible.get(prompt_id)
+        return not (incompatible and modifiers and not incompatible.isdisjoint(modifiers))
+
+    def sample(
+        self,
+        category: Optional[str] = None,
+        tag: Optional[str] = None,
+        modifiers: Iterable[str] = (),
+        rng: random.Random | None = None,
+    ) -> Optional[str]:
+        """A random prompt, optionally restricted to a category or tag and to
+        prompts compatible with the selected modifier values."""
+        snapshot = self._current()
+        pool = self._pool(snapshot, category, tag)
+        if not pool:
+            return None
+        rng = rng or random
+        selected = frozenset(modifiers)
+        # Rejection sampling is O(1) expected while most prompts are compatible
+        for _ in range(32):
+            prompt_id = pool[rng.randrange(len(pool))]
+            if self._compatible(snapshot, prompt_id, selected):
+                return snapshot.prompts[prompt_id]
+        compatible = [i for i in pool if self._compatible(snapshot, i, selected)]
+        return snapshot.prompts[rng.choice(compatible)] if compatible else None
+
+    def sample_without_repeats(
+        self,
+        seed: int,
+        position: int,
+        category: Optional[str] = None,
+        tag: Optional[str] = None,
+        modifiers: Iterable[str] = (),
+    ) -> tuple[Optional[str], int]:
+        """Next prompt of a session's non-repeating walk through the pool.
+
+        Returns the prompt and the session's new position. Prompts repeat only
+        after the whole pool has been seen.
+        """
+        snapshot = self._current()
+        pool = self._pool(snapshot, category, tag)
+        if not pool:
+            return None, position
+        selected = frozenset(modifiers)
+        for _ in range(len(pool)):
+            prompt_id = pool[_permuted_index(seed, position, len(pool))]
+            position += 1
+            if self._compatible(snapshot, prompt_id, selected):
+                return snapshot.prompts[prompt_id], position
+        return None, position